@@ -0,0 +1,187 @@
+'''
+File:        benchmark_suite.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     synthetic_data.py
+             recipe_store.py
+             search.py
+             catalogue.py
+             feedme_core.py
+             user_store.py
+             store_map.py
+             FeedMe.py
+             Pandas
+             NumPy
+             ArgParse
+             Platform
+             TempFile
+             JSON
+             Time
+             Sys
+             OS
+
+Imported By: N/A
+
+This file times the paths a FeedMe user waits on, on synthetic catalogues of
+each size written by synthetic_data.py: importing the recipe CSV, saving and
+loading the snapshot, loading the store CSV, each of the four searches,
+laying out recipes for display, adding and removing favorites in the user
+database, and building the store map. Every case is run several times and its
+best time is kept.
+
+The times can be saved as a baseline and later runs compared against it, so a
+change that slows a path down is caught before it is deployed. A case counts
+as a regression when it is slower than its baseline by more than the tolerance
+and by more than half a millisecond, below which timings are noise, and the
+script then exits with status 1. Baselines only compare fairly on the machine
+they were saved on.
+
+Usage: python benchmark_suite.py [--sizes 1000 100000] [--repeat 3] [--save benchmark_baseline.json]
+       python benchmark_suite.py [--sizes 1000 100000] --compare benchmark_baseline.json [--tolerance 0.25]
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import catalogue
+import feedme_core
+import recipe_store
+import search
+import store_map
+import synthetic_data
+import user_store
+from FeedMe import format_recipe
+
+DEFAULT_SIZES = [1000, 100000]
+DEFAULT_TOLERANCE = 0.25
+# Changes smaller than this are timer noise on the fastest cases, whatever their share
+NOISE_MS = 0.5
+RENDERED_RECIPES = 1000
+FAVORITES = 100
+
+# Function to time a call, returning the best of several runs in milliseconds and the last result
+def best_of(repeat, call):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+# Function to add and then remove favorites through the application, reading them back each time
+def toggle_favorites(app, indexes):
+    for index in indexes:
+        app.toggle_favorite(index)
+    added = len(app.favorites)
+    for index in indexes:
+        app.toggle_favorite(index)
+    return added, len(app.favorites)
+
+# Function to time every case on the files of one size
+def run_size(rows, directory, repeat):
+    recipes_file, stores_file = synthetic_data.dataset(rows, directory)
+    results = {}
+
+    def case(name, call, runs=repeat):
+        results[name], result = best_of(runs, call)
+        print(f'{rows:>8} {name:<20} {results[name]:>11.2f} ms', flush=True)
+        return result
+
+    # Loading: importing the CSV is slow enough at a million rows that it is timed once
+    store = case("csv_load", lambda: recipe_store.RecipeStore.from_csv(recipes_file), runs=1)
+    with tempfile.TemporaryDirectory() as temp:
+        snapshot = os.path.join(temp, recipe_store.SNAPSHOT_FILE)
+        case("snapshot_save", lambda: store.save(snapshot))
+        case("snapshot_load", lambda: recipe_store.RecipeStore.load(snapshot))
+
+        # The four searches of the search menu, over an index built once
+        searcher = search.RecipeSearch(store)
+        case("search_name", lambda: searcher.search(name="soup"))
+        case("search_time", lambda: searcher.search(max_minutes=30))
+        case("search_calories", lambda: searcher.search(max_calories=500))
+        case("search_ingredient", lambda: searcher.search(ingredient="garlic"))
+
+        picks = np.random.default_rng(0).integers(0, rows, size=min(RENDERED_RECIPES, rows)).tolist()
+        case("render_recipes", lambda: [format_recipe(store.recipe(x)) for x in picks])
+
+        # Favorites go through a FeedMe object and its own user database, as in the application
+        data = catalogue.Catalogue(stores_file)
+        data.recipes = store
+        with user_store.UserStore(os.path.join(temp, "feedme.db")) as users:
+            app = feedme_core.FeedMe("benchmark", users, data, legacy_files=None)
+            favorites = list(dict.fromkeys(picks))[:FAVORITES]
+            added, left = case("favorites", lambda: toggle_favorites(app, favorites))
+            assert added == len(favorites) and left == 0, "favorites were not saved and removed"
+
+        stores = case("stores_load", lambda: pd.read_csv(stores_file, index_col=0))
+        map_file = os.path.join(temp, "map.html")
+        case("map", lambda: store_map.render_clustered(stores).save(map_file))
+    return results
+
+# Function to compare a run against a baseline, returning the cases that got slower than the tolerance allows
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f'\n{"case":<30} {"baseline ms":>12} {"now ms":>12} {"change":>8}')
+    for key, now in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f'{key:<30} {"-":>12} {now:>12.2f} {"new":>8}')
+            continue
+        change = now / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > tolerance and now - before > NOISE_MS:
+            regressions.append(key)
+            flag = "  slower"
+        print(f'{key:<30} {before:>12.2f} {now:>12.2f} {change:>+8.0%}{flag}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time FeedMe's hot paths on synthetic data and compare them against a baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="recipes and stores in each dataset")
+    parser.add_argument("--directory", default=synthetic_data.DEFAULT_DIRECTORY, help="where the synthetic files are kept")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each case, of which the best is kept")
+    parser.add_argument("--save", help="file to save the times to as a new baseline")
+    parser.add_argument("--compare", help="baseline file to compare the times against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="share a case may slow down by before it fails")
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"rows":>8} {"case":<20} {"best time":>14}')
+    for rows in args.sizes:
+        for name, value in run_size(rows, args.directory, args.repeat).items():
+            results[name + "@" + str(rows)] = value
+
+    if args.save:
+        data = {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node(),
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}
+        temp = args.save + ".tmp"
+        with open(temp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp, args.save)
+        print("\nBaseline saved to", args.save)
+
+    if args.compare:
+        with open(args.compare, "rt", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("node") != platform.node():
+            print("\nThe baseline was saved on", baseline.get("node"), "and may not compare fairly with this machine.")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("\nSlower than the baseline by more than", format(args.tolerance, ".0%") + ":", ", ".join(regressions))
+            sys.exit(1)
+        print("\nNo case is slower than the baseline by more than", format(args.tolerance, ".0%") + ".")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+'''
+File:        catalogue.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     instrumentation.py
+             recipe_store.py
+             search.py
+             ingredient_index.py
+             name_index.py
+             meal_planner.py
+             grocery_list.py
+             recipe_similarity.py
+             store_locator.py
+             store_supply.py
+             Pandas
+             FuncTools
+
+Imported By: feedme_core.py
+             feedme_server.py
+             startup_check.py
+
+This file holds the recipe catalogue, the store table and the indexes built
+over them. Each piece is loaded the first time it is used, and the modules
+behind it (including Pandas and NumPy) are only imported at that point, so a
+session that never searches or opens the map never pays for loading them.
+Loading each piece is timed as the load_<piece> operation when instrumentation
+is on (see instrumentation.py).
+'''
+
+import functools
+
+import instrumentation
+
+DEFAULT_STORE_FILE = "stores_default.csv"
+PARTS = ["recipes", "searcher", "ingredients", "names", "planner", "groceries", "similarity", "stores", "store_index", "supply"]
+
+# Class to load the recipe catalogue, store table and their indexes on first use
+class Catalogue:
+    def __init__(self, store_file=DEFAULT_STORE_FILE):
+        self.store_file = store_file
+
+    # Typed recipe catalogue, loaded from its snapshot
+    @functools.cached_property
+    def recipes(self):
+        with instrumentation.timer("load_recipes"):
+            import recipe_store
+            return recipe_store.load_catalogue()
+
+    # Column-mask search over the recipe catalogue
+    @functools.cached_property
+    def searcher(self):
+        with instrumentation.timer("load_searcher"):
+            import search
+            return search.RecipeSearch(self.recipes)
+
+    # Inverted ingredient index
+    @functools.cached_property
+    def ingredients(self):
+        with instrumentation.timer("load_ingredients"):
+            import ingredient_index
+            return ingredient_index.load_index(self.recipes)
+
+    # Fuzzy and prefix index over recipe names
+    @functools.cached_property
+    def names(self):
+        with instrumentation.timer("load_names"):
+            import name_index
+            return name_index.load_index(self.recipes)
+
+    # Meal planner over the recipes' calories and macronutrients
+    @functools.cached_property
+    def planner(self):
+        with instrumentation.timer("load_planner"):
+            import meal_planner
+            return meal_planner.MealPlanner(self.recipes)
+
+    # Shopping list builder over the recipes' parsed ingredients
+    @functools.cached_property
+    def groceries(self):
+        with instrumentation.timer("load_groceries"):
+            import grocery_list
+            return grocery_list.GroceryList(self.recipes)
+
+    # Similar recipes and recommendations, with the saved table of each recipe's neighbours
+    @functools.cached_property
+    def similarity(self):
+        with instrumentation.timer("load_similarity"):
+            import recipe_similarity
+            return recipe_similarity.load_index(self.recipes)
+
+    # Store locations
+    @functools.cached_property
+    def stores(self):
+        with instrumentation.timer("load_stores"):
+            import pandas as pd
+            return pd.read_csv(self.store_file, index_col=0)
+
+    # Spatial index over the store locations
+    @functools.cached_property
+    def store_index(self):
+        with instrumentation.timer("load_store_index"):
+            import store_locator
+            return store_locator.StoreIndex(self.stores)
+
+    # Stores able to supply each recipe near a location, from the store inventory file
+    @functools.cached_property
+    def supply(self):
+        with instrumentation.timer("load_supply"):
+            import store_supply
+            return store_supply.StoreSupply(self.recipes, self.store_index)
+
+    # Function to switch to freshly scraped files, dropping everything built from the old ones
+    def reload(self, recipe_files, store_file):
+        import recipe_store
+        for x in PARTS:
+            self.__dict__.pop(x, None)
+        self.recipes = recipe_store.build_snapshot(recipe_files)
+        self.store_file = store_file
+
+    # Function to load every piece now rather than on first use
+    def load_all(self):
+        for x in PARTS:
+            getattr(self, x)
+        return self
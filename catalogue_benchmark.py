@@ -0,0 +1,87 @@
+'''
+File:        catalogue_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             synthetic_data.py
+             ArgParse
+             TraceMalloc
+             Time
+             OS
+
+Imported By: N/A
+
+This file measures how long the recipe snapshot takes to open and how much
+memory the open catalogue holds, on synthetic catalogues of each size. The
+snapshot of each size is built once from its synthetic CSV file and kept next
+to it. The catalogue is then opened as the application opens it, with the list
+fields left packed, and the time to show a few recipes is measured. For
+comparison, every list entry and URL is then decoded into Python strings, as
+catalogues were held before the fields were packed, and the memory that takes
+is measured too. Memory is counted with tracemalloc, which leaves out the
+pages of the memory-mapped snapshot, since the operating system reads those
+from disk as they are used and can drop them again.
+
+Usage: python catalogue_benchmark.py [--sizes 1000 100000 1000000] [--directory benchmark_data]
+'''
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import recipe_store
+import synthetic_data
+
+SHOWN_RECIPES = 100
+
+# Function to get the snapshot of one size, building it from the synthetic CSV file if it does not exist yet
+def snapshot(rows, directory):
+    recipes_file, _ = synthetic_data.dataset(rows, directory)
+    file = os.path.join(directory, "allrecipes_" + str(rows) + ".catalogue")
+    if not os.path.isfile(file):
+        start = time.perf_counter()
+        recipe_store.build_snapshot([recipes_file], file)
+        print(f'{rows:>8} built the snapshot in {time.perf_counter() - start:.1f} s', flush=True)
+    return file
+
+# Function to time a call, then run it again under tracemalloc, which slows it down, for the memory it keeps in MB
+def measure(call):
+    start = time.perf_counter()
+    call()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    result = call()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, kept / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Time opening the recipe snapshot and measure the memory the catalogue holds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=synthetic_data.DEFAULT_SIZES, help="recipes in each catalogue")
+    parser.add_argument("--directory", default=synthetic_data.DEFAULT_DIRECTORY, help="where the synthetic files are kept")
+    args = parser.parse_args()
+
+    print(f'{"rows":>8} {"snapshot MB":>12} {"open s":>8} {"open MB":>9} {"show ms":>9} {"decoded s":>10} {"decoded MB":>11}')
+    for rows in args.sizes:
+        file = snapshot(rows, args.directory)
+        store, opened, packed = measure(lambda: recipe_store.RecipeStore.load(file))
+
+        start = time.perf_counter()
+        for index in range(0, rows, max(1, rows // SHOWN_RECIPES)):
+            store.recipe(index)
+        shown = (time.perf_counter() - start) * 1000 / min(rows, SHOWN_RECIPES)
+
+        # Every entry as a Python string, the way the whole catalogue used to be held in memory
+        decoded, decoding, strings = measure(lambda: ({x: list(store.lists[x]) for x in recipe_store.LIST_FIELDS},
+                                                      store.urls.strings()))
+        print(f'{rows:>8} {os.path.getsize(file) / 1e6:>12.1f} {opened:>8.3f} {packed:>9.1f} {shown:>9.3f} '
+              f'{decoding:>10.2f} {packed + strings:>11.1f}', flush=True)
+        del store, decoded
+
+if __name__ == "__main__":
+    main()
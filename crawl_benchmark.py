@@ -0,0 +1,94 @@
+'''
+File:        crawl_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     fixture_site.py
+             crawler.py
+             recipe_sources.py
+             fetcher.py
+             Pandas
+             TempFile
+             ArgParse
+             Time
+             OS
+
+Imported By: N/A
+
+This file runs the crawler against a local fixture site serving thousands of
+recipe pages, with a sitemap index, sitemaps, category pages and a robots.txt.
+Each source is crawled twice into fresh frontiers: once from its sitemap, which
+is stopped halfway and then resumed from its checkpoint, and once from its
+category pages. Both crawls must find every recipe page exactly once, and the
+exported CSV must hold every recipe. It reports the pages crawled per second
+and checks that no host was sent requests faster than the rate allows.
+
+Usage: python crawl_benchmark.py [--copies 100] [--rate 0] [--latency 0.0]
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import crawler
+import fetcher
+import fixture_site
+import recipe_sources
+
+SAVED_FILES = {"allrecipes": "allrecipes_default.csv", "eatingwell": "eatingwell_default.csv"}
+
+# Function to crawl a source into a new frontier, stopping partway and resuming if asked
+def crawl(frontier, source, seeds, args, stop_at=None):
+    start = time.perf_counter()
+    with fetcher.Fetcher(per_host_rate=args.rate or None) as engine:
+        with crawler.Crawler(frontier, engine) as first:
+            first.add_seeds(source, seeds)
+            first.run(limit=stop_at)
+        # A fresh crawler on the same frontier carries on from the last checkpoint
+        with crawler.Crawler(frontier, engine) as second:
+            fetched = second.run()
+            stats = second.stats()
+    return time.perf_counter() - start, fetched, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a local fixture site and check that every recipe is found once.")
+    parser.add_argument("--copies", type=int, default=100, help="times to repeat the saved recipes on the fixture site")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second to each host, 0 for no limit")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    pages = {}
+    for site, file in SAVED_FILES.items():
+        pages.update(fixture_site.build_pages(file, site, args.copies))
+
+    with fixture_site.FixtureSite(pages, latency=args.latency, indexes=True) as site, \
+         tempfile.TemporaryDirectory() as directory:
+        for name in SAVED_FILES:
+            source = recipe_sources.SOURCES[name]
+            expected = {x for x in site.urls() if "/" + name + "/" in x}
+            for how, seeds, stop_at in [("sitemap", [site.base_url + "/" + name + "/sitemap.xml"], len(expected) // 2),
+                                        ("categories", [site.base_url + "/" + name + "/recipes/"], None)]:
+                frontier = os.path.join(directory, name + "-" + how + ".db")
+                elapsed, fetched, stats = crawl(frontier, source, seeds, args, stop_at)
+
+                with crawler.Crawler(frontier) as done:
+                    found = {x[0] for x in done.connection.execute("SELECT url FROM recipes WHERE source = ?", (name,))}
+                    out = os.path.join(directory, name + ".csv")
+                    exported = done.export(source, out)
+                assert found == expected, how + " crawl of " + name + " missed or added recipes"
+                assert exported == len(pd.read_csv(out, index_col=0)) == len(expected)
+                total = sum(v for k, v in stats.items() if k != "recipes")
+                resumed = f', {fetched} of them after resuming' if stop_at else ''
+                print(f'{name:<11} from {how:<10}: {stats["recipes"]} recipes, {total} pages in {elapsed:.2f} s '
+                      f'({total / elapsed:.0f} pages/s){resumed}')
+                if args.rate:
+                    assert elapsed >= (total - 1) / args.rate, "requests were sent faster than the rate allows"
+
+if __name__ == "__main__":
+    main()
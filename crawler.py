@@ -0,0 +1,318 @@
+'''
+File:        crawler.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_sources.py
+             recipe_scraper.py
+             recipe_store.py
+             fetcher.py
+             instrumentation.py
+             LXML
+             SQLite3
+             ArgParse
+             URLLib
+             HashLib
+             GZip
+             JSON
+             Time
+
+Imported By: crawl_benchmark.py
+
+This file crawls recipe websites to find far more recipes than the hand-picked
+lists in recipe_sources.py. A crawl starts from each source's sitemaps and
+category pages, follows nested sitemaps and category links on the same site,
+and downloads and parses every page that looks like a recipe.
+
+Everything the crawl knows is kept in one SQLite file, the frontier: every URL
+found so far, what kind of page it is and whether it has been fetched, and the
+row parsed from every recipe. Pages are fetched in batches, and each batch's
+results, newly found links and recipes are written in one transaction, which
+is the crawl's checkpoint. A crawl that is stopped, crashes or loses its
+connection starts again where the last checkpoint left it, so a catalogue of
+100,000 recipes can be gathered by one long-running job that is safe to
+restart. URLs are the frontier's primary key, so a page linked from many
+places is only fetched once, and recipes with the same content under two URLs
+are only kept once. Requests to each host are paced by the fetcher's per-host
+rate, and pages the site's robots.txt disallows are skipped.
+
+When the crawl is done, --export writes each source's recipes to its own CSV
+file, named after the source, and --snapshot builds a catalogue snapshot from
+them in the file it is given. The app's own catalogue is only replaced when its
+snapshot file is named.
+
+Usage: python crawler.py [--frontier crawl.db] [--source allrecipes] [--seed URL] [--limit 100000] [--rate 2]
+                         [--export [--snapshot crawl.catalogue]]
+'''
+
+import argparse
+import gzip
+import hashlib
+import json
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from lxml import etree
+
+import fetcher
+import instrumentation
+import recipe_scraper
+import recipe_sources
+
+FRONTIER_FILE = "crawl.db"
+BATCH_SIZE = 64
+MAX_DEPTH = 3
+MAX_ATTEMPTS = 3
+DEFAULT_RATE = 2.0
+GONE_STATUS = {404, 410}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_by_state ON pages (state, kind);
+CREATE TABLE IF NOT EXISTS recipes (
+    url TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    hash TEXT NOT NULL UNIQUE,
+    row TEXT NOT NULL
+);
+"""
+
+# Function to turn a link into the one form a page is stored under
+def normalize(url, base=None):
+    url, _ = urldefrag(urljoin(base, url) if base else url)
+    parts = urlsplit(url)
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+# Function to read the page and nested sitemap URLs out of a sitemap, which may be gzipped
+def sitemap_links(content):
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    root = etree.fromstring(content, etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=True))
+    if root is None:
+        return [], []
+    locations = [x.text.strip() for x in root.iter("{*}loc") if x.text]
+    if etree.QName(root).localname == "sitemapindex":
+        return [], locations
+    return locations, []
+
+# Function to hash a recipe's content, so the same recipe under two URLs is only kept once
+def recipe_hash(row):
+    content = {k: v for k, v in row.items() if k != "URL"}
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+# Class to crawl recipe sources into a persistent, resumable frontier
+class Crawler:
+    def __init__(self, file=FRONTIER_FILE, engine=None, batch_size=BATCH_SIZE, max_depth=MAX_DEPTH, robots=True):
+        self.file = file
+        self.batch_size = batch_size
+        self.max_depth = max_depth
+        self.robots = {} if robots else None
+        self.own_engine = engine is None
+        self.engine = engine or fetcher.Fetcher(per_host_rate=DEFAULT_RATE)
+        self.connection = sqlite3.connect(file, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+        if self.own_engine:
+            self.engine.close()
+
+    # Function to add the pages a source's crawl starts from, its sitemaps and category pages by default
+    def add_seeds(self, source, urls=None):
+        if urls is None:
+            urls = source.sitemaps + source.listings
+        pages = []
+        for url in urls:
+            url = normalize(url)
+            kind = "sitemap" if urlsplit(url).path.endswith((".xml", ".xml.gz")) else \
+                   "recipe" if source.is_recipe(url) else "listing"
+            pages.append((url, source.name, kind, 0))
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany("INSERT OR IGNORE INTO pages (url, source, kind, depth) VALUES (?, ?, ?, ?)", pages)
+
+    # Function to count the frontier's pages by kind and state, and the recipes kept
+    def stats(self):
+        stats = {kind + "_" + state: count for kind, state, count in
+                 self.connection.execute("SELECT kind, state, COUNT(*) FROM pages GROUP BY kind, state")}
+        stats["recipes"] = self.recipe_count()
+        return stats
+
+    def recipe_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    # Function to check a site's robots.txt, downloaded once per host, for whether a page may be fetched
+    def _allowed(self, url):
+        if self.robots is None:
+            return True
+        parts = urlsplit(url)
+        rules = self.robots.get(parts.netloc)
+        if rules is None:
+            rules = RobotFileParser()
+            result = self.engine.fetch(parts.scheme + "://" + parts.netloc + "/robots.txt")
+            # A site without a robots.txt allows everything
+            rules.parse(result.content.decode("utf-8", "replace").splitlines() if result.ok else [])
+            self.robots[parts.netloc] = rules
+        return rules.can_fetch(fetcher.USER_AGENT, url)
+
+    # Function to sort the links found on a page into the pages worth adding to the frontier
+    def _discover(self, source, page_url, depth, links, follow_listings, sitemaps=()):
+        host = urlsplit(page_url).netloc
+        found = [(normalize(x, page_url), source.name, "sitemap", depth + 1) for x in sitemaps]
+        for url in links:
+            url = normalize(url, page_url)
+            # Only pages on the same site are followed
+            if urlsplit(url).netloc != host:
+                continue
+            if source.is_recipe(url):
+                found.append((url, source.name, "recipe", depth + 1))
+            elif follow_listings and source.is_listing(url) and depth < self.max_depth:
+                found.append((url, source.name, "listing", depth + 1))
+        return found
+
+    # Function to process one downloaded page, returning its new state and what it contained
+    def _process(self, page, result):
+        url, name, kind, depth, attempts = page
+        source = recipe_sources.SOURCES[name]
+        if not result.ok:
+            attempts += 1
+            gone = result.status in GONE_STATUS or attempts >= MAX_ATTEMPTS
+            return ("failed" if gone else "pending", attempts, result.error or "HTTP " + str(result.status)), [], None
+        try:
+            if kind == "sitemap":
+                pages, nested = sitemap_links(result.content)
+                return ("done", attempts, None), self._discover(source, url, depth, pages, False, nested), None
+            if kind == "listing":
+                links = source.links(result.content)
+                return ("done", attempts, None), self._discover(source, url, depth, links, True), None
+            with instrumentation.timer("parse_recipe"):
+                row = source.parse(result.content)
+            row["URL"] = url
+            return ("done", attempts, None), [], row
+        except Exception as e:
+            return ("failed", attempts + 1, "could not parse: " + str(e)), [], None
+
+    # Function to fetch one batch of pending pages and write everything learned from it in one transaction
+    def _crawl_batch(self):
+        batch = self.connection.execute("SELECT url, source, kind, depth, attempts FROM pages WHERE state = 'pending' "
+                                        "ORDER BY kind = 'recipe', rowid LIMIT ?", (self.batch_size,)).fetchall()
+        if not batch:
+            return 0
+        pages = {}
+        updates = []
+        for page in batch:
+            if self._allowed(page[0]):
+                pages[page[0]] = page
+            else:
+                updates.append(("skipped", page[4], "disallowed by robots.txt", page[0]))
+
+        found, recipes = [], []
+        for result in self.engine.fetch_all(list(pages)):
+            (state, attempts, error), links, row = self._process(pages[result.url], result)
+            updates.append((state, attempts, error, result.url))
+            found.extend(links)
+            if row is not None:
+                recipes.append((result.url, pages[result.url][1], recipe_hash(row), json.dumps(row, ensure_ascii=False)))
+
+        # The whole batch is one checkpoint, so a stopped crawl redoes at most one batch
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany("UPDATE pages SET state = ?, attempts = ?, error = ? WHERE url = ?", updates)
+            self.connection.executemany("INSERT OR IGNORE INTO pages (url, source, kind, depth) VALUES (?, ?, ?, ?)", found)
+            for recipe in recipes:
+                if self.connection.execute("INSERT OR IGNORE INTO recipes (url, source, hash, row) VALUES (?, ?, ?, ?)",
+                                           recipe).rowcount == 0:
+                    self.connection.execute("UPDATE pages SET state = 'duplicate' WHERE url = ?", (recipe[0],))
+        return len(batch)
+
+    # Function to crawl until the frontier is empty or enough recipes have been kept
+    def run(self, limit=None, report=None):
+        start = time.perf_counter()
+        fetched = 0
+        while limit is None or self.recipe_count() < limit:
+            count = self._crawl_batch()
+            if count == 0:
+                break
+            fetched += count
+            if report is not None:
+                stats = self.stats()
+                pending = sum(v for k, v in stats.items() if k.endswith("_pending"))
+                report(f'{fetched} pages in {time.perf_counter() - start:.0f} s: '
+                       f'{stats["recipes"]} recipes kept, {pending} pages waiting')
+        return fetched
+
+    # Function to write a source's crawled recipes to a CSV in the order they were found
+    def export(self, source, file):
+        urls = [x[0] for x in self.connection.execute("SELECT url FROM recipes WHERE source = ? ORDER BY rowid", (source.name,))]
+        out = recipe_scraper.RowWriter(file, urls)
+        try:
+            for url, row in self.connection.execute("SELECT url, row FROM recipes WHERE source = ? ORDER BY rowid", (source.name,)):
+                out.put(url, json.loads(row))
+        except BaseException:
+            out.discard()
+            raise
+        out.commit()
+        return len(urls)
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl recipe websites into a resumable frontier.")
+    parser.add_argument("--frontier", default=FRONTIER_FILE, help="SQLite file holding the crawl's progress")
+    parser.add_argument("--source", nargs="+", default=list(recipe_sources.SOURCES), choices=list(recipe_sources.SOURCES))
+    parser.add_argument("--seed", nargs="+", help="sitemaps or category pages to start from instead of the source's own")
+    parser.add_argument("--limit", type=int, help="stop once this many recipes have been kept")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="requests per second to each host")
+    parser.add_argument("--workers", type=int, default=fetcher.DEFAULT_WORKERS)
+    parser.add_argument("--no-robots", action="store_true", help="ignore robots.txt, for local fixture sites")
+    parser.add_argument("--export", action="store_true", help="write each source's recipes to a CSV")
+    parser.add_argument("--snapshot", help="also build a catalogue snapshot from the exported CSVs in this file")
+    args = parser.parse_args()
+    if args.seed and len(args.source) != 1:
+        parser.error("--seed needs exactly one --source")
+    if args.snapshot and not args.export:
+        parser.error("--snapshot needs --export")
+
+    with fetcher.Fetcher(max_workers=args.workers, per_host_rate=args.rate) as engine, \
+         Crawler(args.frontier, engine, robots=not args.no_robots) as crawler:
+        for name in args.source:
+            crawler.add_seeds(recipe_sources.SOURCES[name], args.seed)
+        try:
+            crawler.run(args.limit, report=print)
+        except KeyboardInterrupt:
+            print("Stopped; run again to carry on from the last checkpoint")
+            return
+        print(crawler.stats())
+
+        if args.export:
+            files = []
+            for name in args.source:
+                file = name + "_crawl.csv"
+                print(crawler.export(recipe_sources.SOURCES[name], file), "recipes written to", file)
+                files.append(file)
+            if args.snapshot:
+                import recipe_store
+                print(len(recipe_store.build_snapshot(files, args.snapshot)), "recipes in", args.snapshot)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+'''
+File:        feedme_cli.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     feedme_core.py
+             ArgParse
+             Traceback
+             JSON
+             Sys
+
+Imported By: N/A
+
+This file answers FeedMe requests without the interactive menu. Each line read
+from standard input is one JSON request, such as
+{"op": "search", "name": "chicken", "max_calories": 500, "limit": 10}, and
+each answer is written as one JSON line in the same order, in the form
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}. A request's "id",
+if it has one, is copied into its answer. The catalogue and indexes are loaded
+once, so one process can answer any number of requests.
+
+Operations: search, search_name, search_ingredients, search_pantry, complete,
+recipe, add_calories, toggle_favorite, favorites, meals, plan_meals, plan_days,
+similar, recommend, grocery_list, nearest_stores, store_route, set_profile,
+status (see FeedMe.handle in feedme_core.py for their arguments).
+
+A request that fails inside the application is answered with an error, its
+traceback is written to standard error, and the requests after it are still
+answered.
+
+Usage: python feedme_cli.py [--buffered] < requests.jsonl > answers.jsonl
+'''
+
+import argparse
+import json
+import sys
+import traceback
+
+import feedme_core
+
+# Function to answer one JSON request line with one JSON answer line
+def answer(app, line):
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a JSON object")
+    except ValueError as e:
+        return json.dumps({"ok": False, "error": "invalid request: " + str(e)})
+    try:
+        response = {"ok": True, "result": app.handle(request)}
+    except KeyError as e:
+        response = {"ok": False, "error": "missing argument " + str(e)}
+    except (ValueError, TypeError) as e:
+        response = {"ok": False, "error": str(e)}
+    except Exception:
+        # A fault in the application answers only its own request, and the batch carries on
+        traceback.print_exc()
+        response = {"ok": False, "error": "internal error"}
+    if "id" in request:
+        response["id"] = request["id"]
+    return json.dumps(response)
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer FeedMe requests given as JSON lines on standard input.")
+    parser.add_argument("--buffered", action="store_true",
+                        help="only flush answers at the end, for batch files rather than a live pipe")
+    args = parser.parse_args()
+
+    app = feedme_core.FeedMe()
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            sys.stdout.write(answer(app, line) + "\n")
+            if not args.buffered:
+                sys.stdout.flush()
+        sys.stdout.flush()
+    finally:
+        app.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+'''
+File:        feedme_core.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     catalogue.py
+             instrumentation.py
+             user_store.py
+             meal_planner.py
+             fetcher.py
+             http_cache.py
+             recipe_scraper.py
+             well_scraper.py
+             store_scraper.py
+             store_map.py
+
+Imported By: FeedMe.py
+             feedme_cli.py
+             feedme_server.py
+             startup_check.py
+
+This file holds the FeedMe application itself: the recipe catalogue, recipe
+searches, the daily calorie count, favorite recipes, similar recipes and
+recommendations, shopping lists, the supermarket lookup and the stores to buy a
+recipe at.
+It does no input or printing of its own, so the interactive menu in FeedMe.py
+and the batch interface in feedme_cli.py are both thin layers over one FeedMe
+object. Each FeedMe object acts for one user, whose calorie limit, meals and
+favorites are kept in the user database (see user_store.py), and several of
+them can share one database connection and one loaded catalogue. Recipes are
+referred to by their row position in the current catalogue, and are stored by
+their stable ID. The handle method answers one request given as a dictionary,
+which is the form used by the batch interface.
+'''
+
+import catalogue
+import instrumentation
+import user_store
+
+DEFAULT_USER = "default"
+SETTINGS_FILE = "user_settings.txt"
+FAVORITES_FILE = "favorites.txt"
+NEAREST_STORES = 5
+MAX_MEALS = 8
+MAX_DAYS = 14
+MAX_SERVINGS = 100
+SIMILAR_RECIPES = 10
+MAX_LIMIT = 100
+GENDERS = ("male", "female")
+# Arguments of a request that must be given as text when they are given at all
+TEXT_ARGUMENTS = ("name", "ingredient", "ingredients", "pantry", "prefix", "category", "gender")
+
+# Function to calculate the daily calorie limit from weight, height, age and gender
+def calculate_calorie_limit(weight, height, age, gender):
+    if gender.lower() == "male":
+        return 9.99 * weight + 6.25 * height - 4.92 * age + 5
+    elif gender.lower() == "female":
+        return 9.99 * weight + 6.25 * height - 4.92 * age - 161
+    return 0
+
+# Function to check a number of results asked for, given as the argument of that name
+def _check_limit(value, name="limit"):
+    if not (isinstance(value, int) and 1 <= value <= MAX_LIMIT):
+        raise ValueError(name + " must be a whole number from 1 to " + str(MAX_LIMIT))
+
+# Function to check that a location is a latitude and longitude on the globe
+def _check_location(lat, lon):
+    if not (isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat must be from -90 to 90 and lon from -180 to 180")
+
+# Class to hold the application state and answer every FeedMe action
+class FeedMe:
+    def __init__(self, user=DEFAULT_USER, users=None, data=None, store_file=catalogue.DEFAULT_STORE_FILE,
+                 legacy_files=(SETTINGS_FILE, FAVORITES_FILE)):
+        self.user = user
+        self.data = data or catalogue.Catalogue(store_file)
+        self.owns_users = users is None and user is not None
+        self.users = user_store.UserStore() if self.owns_users else users
+        if self.users is not None and self.users.needs_recipe_ids():
+            self._remap_recipe_ids()
+        if user is not None and legacy_files is not None and not self.users.has_user(user):
+            self.users.import_files(user, legacy_files[0], legacy_files[1], self._recipe_ids)
+
+    # Function to move favorites and meals stored by the older, name-based recipe IDs to the current ones
+    def _remap_recipe_ids(self):
+        import recipe_store
+        frame = self.data.recipes.frame
+        pairs = {}
+        # As before, an old ID shared by several recipes of one name meant the first of them
+        for name, id in zip(frame["Name"].tolist(), frame["ID"].tolist()):
+            pairs.setdefault(recipe_store.recipe_id(name), id)
+        self.users.remap_recipe_ids(pairs.items())
+
+    # Function to turn row positions into stable recipe IDs, skipping positions past the end
+    def _recipe_ids(self, indexes):
+        ids = self.data.recipes.frame["ID"]
+        return [int(ids.iat[x]) for x in indexes if 0 <= x < len(ids)]
+
+    # Daily calorie limit, or 0 if it has not been set
+    @property
+    def calorie_limit(self):
+        return self.users.calorie_limit(self.user) or 0.0
+
+    # Calories eaten today, including meals not yet written to the database
+    @property
+    def total_calories(self):
+        return float(self.users.calories_since(self.user, user_store.start_of_today()))
+
+    # Row positions of the favorite recipes that are still in the catalogue, in the order they were added
+    @property
+    def favorites(self):
+        positions = [self.data.recipes.position(x) for x in self.users.favorites(self.user)]
+        return [x for x in positions if x is not None]
+
+    # Whether the user has set a calorie limit
+    @property
+    def has_settings(self):
+        return self.users.calorie_limit(self.user) is not None
+
+    # Function to set the calorie limit from the user's measurements
+    def set_profile(self, weight, height, age, gender):
+        if not (isinstance(gender, str) and gender.lower() in GENDERS):
+            raise ValueError("gender must be one of " + ", ".join(GENDERS))
+        calorie_limit = calculate_calorie_limit(weight, height, age, gender)
+        self.users.set_calorie_limit(self.user, calorie_limit)
+        return calorie_limit
+
+    # Function to get the calorie limit and today's total
+    def status(self):
+        self.users.flush_if_due()
+        return {"calorie_limit": round(self.calorie_limit, 2), "total_calories": round(self.total_calories, 2),
+                "favorites": len(self.favorites)}
+
+    # Function to get today's meals as recipe position, name, calories and time eaten
+    def meals(self):
+        meals = []
+        for id, calories, eaten_at in self.users.meals(self.user, user_store.start_of_today()):
+            index = self.data.recipes.position(id) if id is not None else None
+            meals.append({"index": index, "name": self.recipe_name(index) if index is not None else None,
+                          "calories": calories, "eaten_at": eaten_at})
+        return meals
+
+    # Function to write any queued meals and close the user database if this object opened it
+    def close(self):
+        if self.owns_users:
+            self.users.close()
+        elif self.users is not None:
+            self.users.flush()
+
+    # Function to download the newest recipes and stores and reload the catalogue
+    def refresh(self):
+        import fetcher
+        import http_cache
+        import recipe_scraper
+        import well_scraper
+        import store_scraper
+        with fetcher.Fetcher() as engine, http_cache.HttpCache() as cache:
+            recipe_scraper.download_allrecipes("allrecipes.csv", engine=engine, cache=cache)
+            well_scraper.download_eatingwell("eatingwell.csv", engine=engine, cache=cache)
+            store_scraper.download_stores("stores.csv", cache=cache)
+        self.data.reload(["allrecipes.csv", "eatingwell.csv"], "stores.csv")
+
+    # Function to check that a row position refers to a recipe
+    def is_recipe(self, index):
+        return isinstance(index, int) and 0 <= index < len(self.data.recipes)
+
+    # Function to get the name of a recipe
+    def recipe_name(self, index):
+        return self.data.recipes.frame.at[index, "Name"]
+
+    # Function to get every field of a recipe
+    def recipe(self, index):
+        return self.data.recipes.recipe(index)
+
+    # Function to search by any combination of name, prep time, calories and ingredient keyword
+    def search(self, name=None, max_minutes=None, max_calories=None, ingredient=None):
+        # Each kind of search is timed on its own, and searches on several filters together
+        filters = [x for x, value in [("name", name), ("time", max_minutes), ("calories", max_calories),
+                                      ("ingredient", ingredient)] if value is not None]
+        with instrumentation.timer("search_" + (filters[0] if len(filters) == 1 else "combined")):
+            return self.data.searcher.search(name=name, max_minutes=max_minutes, max_calories=max_calories, ingredient=ingredient)
+
+    # Function to search by name, following exact matches with close spellings
+    def search_name(self, name):
+        selected_recipes = self.search(name=name)
+        with instrumentation.timer("search_close_names"):
+            found = set(selected_recipes)
+            for x, similarity in self.data.names.fuzzy(name):
+                if x not in found:
+                    selected_recipes.append(x)
+        return selected_recipes
+
+    # Function to get the recipes that use every listed ingredient, leaving out any the catalogue no longer holds
+    def search_ingredients(self, ingredients):
+        with instrumentation.timer("search_ingredients"):
+            positions = [self.data.recipes.position(x) for x in self.data.ingredients.search(ingredients)]
+            return sorted(x for x in positions if x is not None)
+
+    # Function to rank recipes by the share of their ingredients found in a pantry, leaving out any the catalogue no longer holds
+    def search_pantry(self, pantry, limit=20):
+        with instrumentation.timer("search_pantry"):
+            positions = [self.data.recipes.position(x) for x, coverage in self.data.ingredients.rank_by_coverage(pantry, limit)]
+            return [x for x in positions if x is not None]
+
+    # Function to complete a partially typed recipe name
+    def complete(self, prefix, limit=10):
+        with instrumentation.timer("complete"):
+            return self.data.names.complete(prefix, limit)
+
+    # Function to get the calories left in today's limit
+    def remaining_calories(self):
+        return max(self.calorie_limit - self.total_calories, 0.0)
+
+    # Function to get the macronutrient targets for a calorie budget, scaling any daily targets given in grams to it
+    def _targets(self, budget, fat=None, carbs=None, protein=None):
+        import meal_planner
+        targets = meal_planner.macro_targets(budget)
+        for name, grams in [("fat", fat), ("carbs", carbs), ("protein", protein)]:
+            if grams is not None:
+                targets[name] = grams * budget / self.calorie_limit if self.calorie_limit else grams
+        return targets
+
+    # Function to check that a plan asks for a sensible number of meals and days
+    def _check_plan(self, meals, days=1):
+        if not (isinstance(meals, int) and 1 <= meals <= MAX_MEALS):
+            raise ValueError("meals must be a whole number from 1 to " + str(MAX_MEALS))
+        if not (isinstance(days, int) and 1 <= days <= MAX_DAYS):
+            raise ValueError("days must be a whole number from 1 to " + str(MAX_DAYS))
+
+    # Function to list a plan's recipes with their names and calories
+    def _plan_summary(self, plan):
+        recipes = [{"index": x, "name": self.recipe_name(x), "calories": int(self.data.planner.calories[x])} for x in plan["recipes"]]
+        return dict(plan, recipes=recipes)
+
+    # Function to find the best plans of a number of meals for the calories left today
+    def plan_meals(self, meals=3, plans=5, fat=None, carbs=None, protein=None):
+        self._check_plan(meals)
+        _check_limit(plans, "plans")
+        budget = self.remaining_calories()
+        found = self.data.planner.plan(budget, meals, self._targets(budget, fat, carbs, protein), plans)
+        return [self._plan_summary(x) for x in found]
+
+    # Function to plan meals for several days, the rest of today first, without repeating a recipe
+    def plan_days(self, days=7, meals=3, fat=None, carbs=None, protein=None):
+        self._check_plan(meals, days)
+        budgets = [self.remaining_calories()] + [self.calorie_limit] * (days - 1)
+        found = self.data.planner.plan_days(budgets, meals, lambda x: self._targets(x, fat, carbs, protein))
+        return [self._plan_summary(x) if x else None for x in found]
+
+    # Function to add a recipe's calories to today's total unless it would exceed the limit
+    def add_calories(self, index):
+        calories = int(self.data.recipes.frame.at[index, "calories"])
+        if self.total_calories + calories > self.calorie_limit:
+            return False
+        self.users.log_meal(self.user, int(self.data.recipes.frame.at[index, "ID"]), calories)
+        return True
+
+    # Function to add a recipe to the favorites, or remove it if it is already there
+    def toggle_favorite(self, index):
+        id = int(self.data.recipes.frame.at[index, "ID"])
+        if id in self.users.favorites(self.user):
+            self.users.remove_favorite(self.user, id)
+            return False
+        self.users.add_favorite(self.user, id)
+        return True
+
+    # Function to add up the ingredients of recipes, the favorites if none are given, scaled to a number of servings each
+    def grocery_list(self, indexes=None, servings=None):
+        indexes = self.favorites if indexes is None else indexes
+        for index in indexes:
+            if not self.is_recipe(index):
+                raise ValueError("no recipe at index " + str(index))
+        if servings is not None and not (isinstance(servings, int) and 1 <= servings <= MAX_SERVINGS):
+            raise ValueError("servings must be a whole number from 1 to " + str(MAX_SERVINGS))
+        return self.data.groceries.build(indexes, servings)
+
+    # Function to find the recipes most like a recipe, best first
+    def similar_recipes(self, index, limit=SIMILAR_RECIPES):
+        if not self.is_recipe(index):
+            raise ValueError("no recipe at index " + str(index))
+        _check_limit(limit)
+        with instrumentation.timer("similar"):
+            return self.data.similarity.similar(index, limit)
+
+    # Function to recommend recipes like the favorites as a whole, leaving the favorites out
+    def recommendations(self, limit=SIMILAR_RECIPES):
+        _check_limit(limit)
+        with instrumentation.timer("recommend"):
+            return self.data.similarity.recommend(self.favorites, limit)
+
+    # Function to find the supermarkets nearest to a location
+    def nearest_stores(self, lat, lon, k=NEAREST_STORES, category="Supermarket"):
+        _check_limit(k, "k")
+        _check_location(lat, lon)
+        return self.data.store_index.nearest(lat, lon, k=k, category=category)
+
+    # Function to plan which nearby stores to buy a recipe's ingredients at, in the order to visit them
+    def store_route(self, index, lat, lon):
+        if not self.is_recipe(index):
+            raise ValueError("no recipe at index " + str(index))
+        _check_location(lat, lon)
+        with instrumentation.timer("store_route"):
+            return self.data.supply.route(index, lat, lon)
+
+    # Function to draw the store map, limited to the stores near a location if one is given
+    def store_map(self, location=None):
+        import store_map
+        if location is not None:
+            return store_map.render_clustered(self.data.stores, location, store_map.NEARBY_RADIUS_KM, self.data.store_index)
+        return store_map.render_clustered(self.data.stores)
+
+    # Function to list recipes as row position and name
+    def _summaries(self, indexes, limit=None):
+        names = self.data.recipes.frame["Name"]
+        return [{"index": int(x), "name": names.iat[x]} for x in indexes[:limit]]
+
+    # Function to answer one request, given as a dictionary with an "op" key and its arguments
+    def handle(self, request):
+        op = request.get("op")
+        limit = request.get("limit")
+        if limit is not None:
+            _check_limit(limit)
+        for name in TEXT_ARGUMENTS:
+            if request.get(name) is not None and not isinstance(request[name], str):
+                raise ValueError(name + " must be a string")
+        if op == "search":
+            return self._summaries(self.search(request.get("name"), request.get("max_minutes"),
+                                               request.get("max_calories"), request.get("ingredient")), limit)
+        elif op == "search_name":
+            return self._summaries(self.search_name(request["name"]), limit)
+        elif op == "search_ingredients":
+            return self._summaries(self.search_ingredients(request["ingredients"]), limit)
+        elif op == "search_pantry":
+            return self._summaries(self.search_pantry(request["pantry"], limit or 20))
+        elif op == "complete":
+            return self._summaries(self.complete(request["prefix"], limit or 10))
+        elif op == "recipe":
+            index = request["index"]
+            if not self.is_recipe(index):
+                raise ValueError("no recipe at index " + str(index))
+            return self.recipe(index)
+        elif op == "add_calories":
+            index = request["index"]
+            if not self.is_recipe(index):
+                raise ValueError("no recipe at index " + str(index))
+            added = self.add_calories(index)
+            return dict(self.status(), added=added)
+        elif op == "toggle_favorite":
+            index = request["index"]
+            if not self.is_recipe(index):
+                raise ValueError("no recipe at index " + str(index))
+            return {"favorite": self.toggle_favorite(index)}
+        elif op == "favorites":
+            return self._summaries(self.favorites, limit)
+        elif op == "meals":
+            return self.meals()
+        elif op == "plan_meals":
+            return self.plan_meals(request.get("meals", 3), request.get("plans", 5),
+                                   request.get("fat"), request.get("carbs"), request.get("protein"))
+        elif op == "plan_days":
+            return self.plan_days(request.get("days", 7), request.get("meals", 3),
+                                  request.get("fat"), request.get("carbs"), request.get("protein"))
+        elif op == "similar":
+            return self._summaries(self.similar_recipes(request["index"], limit or SIMILAR_RECIPES))
+        elif op == "recommend":
+            return self._summaries(self.recommendations(limit or SIMILAR_RECIPES))
+        elif op == "grocery_list":
+            return self.grocery_list(request.get("indexes"), request.get("servings"))
+        elif op == "nearest_stores":
+            stores = self.nearest_stores(request["lat"], request["lon"], request.get("k", NEAREST_STORES),
+                                         request.get("category", "Supermarket"))
+            return [{"name": name, "category": category, "lat": float(lat), "lon": float(lon), "distance_km": round(float(distance), 3)}
+                    for name, category, lat, lon, distance in zip(stores["Name"], stores["Category"], stores["Lat"],
+                                                                  stores["Lon"], stores["Distance"])]
+        elif op == "store_route":
+            return self.store_route(request["index"], request["lat"], request["lon"])
+        elif op == "set_profile":
+            self.set_profile(float(request["weight"]), float(request["height"]), int(request["age"]), request["gender"])
+            return self.status()
+        elif op == "status":
+            return self.status()
+        raise ValueError("unknown op " + repr(op))
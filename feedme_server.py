@@ -0,0 +1,361 @@
+'''
+File:        feedme_server.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     feedme_core.py
+             catalogue.py
+             user_store.py
+             instrumentation.py
+             AsyncIO
+             Collections
+             ArgParse
+             URLLib
+             HTTP
+             JSON
+             Regex
+             TraceBack
+             OS
+
+Imported By: N/A
+
+This file serves FeedMe over HTTP with JSON answers, so several users can
+search the catalogue without each running the interactive program. The recipe
+catalogue, the store table and every index are loaded once before the server
+starts listening, and are only read while it runs. Requests are answered on a
+single asyncio event loop: every catalogue query takes well under a
+millisecond, so answering it directly is faster than handing it to a thread,
+and many idle keep-alive connections cost almost nothing. Answers to catalogue
+queries are kept in a least-recently-used cache keyed by the request, so a
+popular query is only computed once. Every user's calorie limit, meals and
+favorites are kept in one user database shared by all requests, and logged
+meals are written to it in batches, once a second at most. A request that
+fails inside the application is answered with a 500 error, counted in /stats,
+and the connection stays open for the next one.
+
+Endpoints:
+    GET  /search?name=&max_minutes=&max_calories=&ingredient=&limit=
+    GET  /search/name?name=            exact matches, then close spellings
+    GET  /search/ingredients?ingredients=garlic,butter
+    GET  /search/pantry?pantry=eggs,flour,milk
+    GET  /complete?prefix=
+    GET  /recipes/<index>
+    GET  /recipes/<index>/similar?limit=10   recipes most like this one
+    GET  /recipes/<index>/stores?lat=&lon=   nearby stores to buy it at, in route order
+    GET  /groceries?indexes=1,2,3&servings=4   shopping list for the recipes
+    GET  /stores/nearest?lat=&lon=&k=&category=
+    GET  /users/<user>
+    GET  /users/<user>/meals           today's meals
+    GET  /users/<user>/plan?meals=3&plans=5   best plans for the calories left today
+    GET  /users/<user>/plan?days=7&meals=3    one plan a day, no recipe repeated
+    GET  /users/<user>/groceries?servings=4   shopping list for the favorites
+    GET  /users/<user>/recommendations?limit=10   recipes like the favorites
+    POST /users/<user>/profile         {"weight": 70, "height": 175, "age": 30, "gender": "male"}
+    POST /users/<user>/meals           {"index": 8}
+    GET  /stats
+    GET  /metrics                      latency histograms in the Prometheus text format, with --metrics
+
+Usage: python feedme_server.py [--host 127.0.0.1] [--port 8080] [--database feedme.db] [--metrics]
+'''
+
+import argparse
+import asyncio
+import collections
+import json
+import re
+import traceback
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import catalogue
+import feedme_core
+import instrumentation
+import user_store
+
+CACHE_SIZE = 4096
+DEFAULT_LIMIT = 50
+MAX_BODY = 64 * 1024
+IDLE_TIMEOUT = 30
+USER_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+JSON_TYPE = "application/json"
+METRICS_PATH = "/metrics"
+METRICS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Catalogue queries, by path, and the request operation each one answers
+QUERY_ROUTES = {
+    "/search": "search",
+    "/search/name": "search_name",
+    "/search/ingredients": "search_ingredients",
+    "/search/pantry": "search_pantry",
+    "/complete": "complete",
+    "/groceries": "grocery_list",
+    "/stores/nearest": "nearest_stores",
+}
+INT_PARAMETERS = {"max_minutes", "max_calories", "limit", "k", "meals", "plans", "days", "servings"}
+INT_LIST_PARAMETERS = {"indexes"}
+FLOAT_PARAMETERS = {"lat", "lon", "fat", "carbs", "protein"}
+
+# Exception to answer a request with an HTTP error status
+class HttpError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+# Class to keep the most recently used answers up to a fixed number of entries
+class ResponseCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+# Function to turn query string parameters into request arguments of the right type
+def _arguments(query):
+    arguments = {}
+    for name, value in parse_qsl(query):
+        try:
+            if name in INT_PARAMETERS:
+                arguments[name] = int(value)
+            elif name in INT_LIST_PARAMETERS:
+                arguments[name] = [int(x) for x in value.split(",") if x.strip()]
+            elif name in FLOAT_PARAMETERS:
+                arguments[name] = float(value)
+            else:
+                arguments[name] = value
+        except ValueError:
+            kind = "a comma-separated list of numbers" if name in INT_LIST_PARAMETERS else "a number"
+            raise HttpError(HTTPStatus.BAD_REQUEST, "parameter " + name + " must be " + kind)
+    return arguments
+
+# Function to build a full HTTP response from a status and a JSON body
+def _response(status, body, keep_alive=True, content_type=JSON_TYPE):
+    head = (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    return head.encode("latin-1") + body
+
+# Class to answer FeedMe requests over HTTP from one shared, read-only catalogue
+class FeedMeServer:
+    def __init__(self, data, users, cache_size=CACHE_SIZE):
+        self.data = data
+        self.store = users
+        self.reader = feedme_core.FeedMe(None, data=data)
+        self.users = {}
+        self.cache = ResponseCache(cache_size)
+        self.requests = 0
+        self.errors = 0
+
+    # Function to get the FeedMe object acting for one user
+    def user(self, name):
+        if not USER_NAME.match(name):
+            raise HttpError(HTTPStatus.NOT_FOUND, "user names may only use letters, digits, - and _")
+        app = self.users.get(name)
+        if app is None:
+            app = feedme_core.FeedMe(name, self.store, self.data, legacy_files=None)
+            self.users[name] = app
+        return app
+
+    # Function to check that a request names a recipe in the catalogue
+    def _recipe_index(self, index):
+        if not self.reader.is_recipe(index):
+            raise HttpError(HTTPStatus.NOT_FOUND, "no recipe at index " + str(index))
+        return index
+
+    # Function to answer one request with its status and JSON body
+    def route(self, method, target, body=b""):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        parts = path.strip("/").split("/")
+
+        if method == "GET" and (path in QUERY_ROUTES or parts[0] == "recipes"):
+            key = path + "?" + "&".join(sorted(url.query.split("&")))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return HTTPStatus.OK, cached
+            if path in QUERY_ROUTES:
+                request = dict(_arguments(url.query), op=QUERY_ROUTES[path])
+                if request["op"] in {"search", "search_name", "search_ingredients"}:
+                    request.setdefault("limit", DEFAULT_LIMIT)
+                # Without a user there are no favorites to fall back on
+                if request["op"] == "grocery_list" and "indexes" not in request:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "missing argument 'indexes'")
+            elif len(parts) == 2 and parts[1].isdigit():
+                request = {"op": "recipe", "index": self._recipe_index(int(parts[1]))}
+            elif len(parts) == 3 and parts[1].isdigit() and parts[2] == "similar":
+                request = dict(_arguments(url.query), op="similar", index=self._recipe_index(int(parts[1])))
+            elif len(parts) == 3 and parts[1].isdigit() and parts[2] == "stores":
+                request = dict(_arguments(url.query), op="store_route", index=self._recipe_index(int(parts[1])))
+            else:
+                raise HttpError(HTTPStatus.NOT_FOUND)
+            result = json.dumps(self._handle(self.reader, request)).encode("utf-8")
+            self.cache.put(key, result)
+            return HTTPStatus.OK, result
+
+        if parts[0] == "users" and len(parts) in (2, 3):
+            app = self.user(parts[1])
+            action = parts[2] if len(parts) == 3 else None
+            if method == "GET" and action is None:
+                request = {"op": "status"}
+            elif method == "GET" and action == "meals":
+                request = {"op": "meals"}
+            elif method == "GET" and action == "plan":
+                arguments = _arguments(url.query)
+                request = dict(arguments, op="plan_days" if "days" in arguments else "plan_meals")
+            elif method == "GET" and action == "groceries":
+                request = dict(_arguments(url.query), op="grocery_list")
+            elif method == "GET" and action == "recommendations":
+                request = dict(_arguments(url.query), op="recommend")
+            elif method == "POST" and action in ("profile", "meals"):
+                try:
+                    request = json.loads(body or b"{}")
+                except ValueError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "the body must be JSON")
+                if not isinstance(request, dict):
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "the body must be a JSON object")
+                if action == "profile":
+                    request["op"] = "set_profile"
+                else:
+                    request = {"op": "add_calories", "index": self._recipe_index(request.get("index"))}
+            elif action in (None, "profile", "meals", "plan", "groceries", "recommendations"):
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED)
+            else:
+                raise HttpError(HTTPStatus.NOT_FOUND)
+            return HTTPStatus.OK, json.dumps(self._handle(app, request)).encode("utf-8")
+
+        if method == "GET" and path == "/stats":
+            stats = {"requests": self.requests, "errors": self.errors, "recipes": len(self.data.recipes),
+                     "stores": len(self.data.store_index), "users": len(self.users), "cache_entries": len(self.cache.entries),
+                     "cache_hits": self.cache.hits, "cache_misses": self.cache.misses}
+            return HTTPStatus.OK, json.dumps(stats).encode("utf-8")
+        if method == "GET" and path == METRICS_PATH and instrumentation.enabled:
+            return HTTPStatus.OK, instrumentation.render().encode("utf-8")
+        raise HttpError(HTTPStatus.NOT_FOUND)
+
+    # Function to pass a request to a FeedMe object, turning bad arguments into HTTP errors
+    def _handle(self, app, request):
+        try:
+            with instrumentation.timer("request_" + str(request.get("op"))):
+                return app.handle(request)
+        except KeyError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "missing argument " + str(e))
+        except (ValueError, TypeError) as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+
+    # Function to read one request from a connection, or None once the client has closed it
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0") or 0)
+        if length > MAX_BODY:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, target, body, keep_alive
+
+    # Function to answer every request sent over one connection
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = None
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                    if request is None:
+                        break
+                    method, target, body, keep_alive = request
+                    self.requests += 1
+                    status, payload = self.route(method, target, body)
+                    content_type = METRICS_TYPE if urlsplit(target).path == METRICS_PATH else JSON_TYPE
+                except HttpError as e:
+                    status, payload, content_type = e.status, json.dumps({"error": str(e)}).encode("utf-8"), JSON_TYPE
+                    # A request that could not be read leaves the connection in an unknown state
+                    if request is None:
+                        keep_alive = False
+                except Exception:
+                    if request is None:
+                        raise
+                    # A fault in the application answers only its own request, with the connection kept open
+                    self.errors += 1
+                    traceback.print_exc()
+                    status, payload, content_type = (HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                     json.dumps({"error": "internal server error"}).encode("utf-8"), JSON_TYPE)
+                writer.write(_response(status, payload, keep_alive, content_type))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # Function to write queued meals to the user database at a steady pace
+    async def flush_meals(self):
+        while True:
+            await asyncio.sleep(self.store.flush_interval)
+            self.store.flush_if_due()
+
+    # Function to listen for connections until the server is stopped
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print("Serving FeedMe on http://" + host + ":" + str(server.sockets[0].getsockname()[1]), flush=True)
+        flusher = asyncio.create_task(self.flush_meals())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            flusher.cancel()
+            self.store.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve FeedMe searches and calorie logging over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--database", default=user_store.DATABASE_FILE, help="user database file")
+    parser.add_argument("--stores", default=catalogue.DEFAULT_STORE_FILE, help="store CSV file to search")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="number of answers to keep cached")
+    parser.add_argument("--metrics", action="store_true", help="time every operation and serve the times at " + METRICS_PATH)
+    args = parser.parse_args()
+    if args.metrics:
+        instrumentation.configure()
+
+    data = catalogue.Catalogue(args.stores).load_all()
+    with user_store.UserStore(args.database) as users:
+        server = FeedMeServer(data, users, args.cache_size)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+'''
+File:        fetch_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     fixture_site.py
+             fetcher.py
+             recipe_scraper.py
+             well_scraper.py
+             ArgParse
+             Time
+
+Imported By: N/A
+
+This file measures how long a recipe refresh takes with the serial download
+loop compared to the concurrent fetch engine. Both paths download and parse the
+same pages from a local fixture site that adds a fixed delay to every response
+to stand in for the round trip to the real websites.
+
+Usage: python fetch_benchmark.py [--latency 0.2] [--copies 1] [--workers 8]
+'''
+
+import argparse
+import time
+
+import fetcher
+import fixture_site
+import recipe_scraper
+import well_scraper
+
+PARSERS = {"allrecipes": recipe_scraper.parse_allrecipes, "eatingwell": well_scraper.parse_eatingwell}
+
+# Function to download and parse every page one after another
+def run_serial(urls):
+    rows = []
+    for result in fetcher.fetch_serial(urls):
+        rows.append(PARSERS[result.url.split("/")[3]](result.content))
+    return rows
+
+# Function to download and parse pages through the concurrent engine
+def run_concurrent(urls, workers, per_host):
+    rows = []
+    with fetcher.Fetcher(max_workers=workers, per_host=per_host) as engine:
+        for result in engine.fetch_all(urls):
+            rows.append(PARSERS[result.url.split("/")[3]](result.content))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and concurrent recipe downloads.")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every response")
+    parser.add_argument("--copies", type=int, default=1, help="times to repeat the saved recipes")
+    parser.add_argument("--workers", type=int, default=fetcher.DEFAULT_WORKERS)
+    parser.add_argument("--per-host", type=int, default=fetcher.DEFAULT_PER_HOST)
+    args = parser.parse_args()
+
+    pages = fixture_site.build_pages("allrecipes_default.csv", "allrecipes", args.copies)
+    pages.update(fixture_site.build_pages("eatingwell_default.csv", "eatingwell", args.copies))
+
+    with fixture_site.FixtureSite(pages, latency=args.latency) as site:
+        urls = site.urls()
+
+        start = time.perf_counter()
+        serial_rows = run_serial(urls)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent_rows = run_concurrent(urls, args.workers, args.per_host)
+        concurrent = time.perf_counter() - start
+
+    assert sorted(x["Name"] for x in serial_rows) == sorted(x["Name"] for x in concurrent_rows)
+    print("Pages:      ", len(urls))
+    print("Serial:     ", round(serial, 3), "s")
+    print("Concurrent: ", round(concurrent, 3), "s")
+    print("Speedup:    ", round(serial / concurrent, 2), "x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+'''
+File:        fetcher.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     instrumentation.py
+             Requests
+             Threading
+             Concurrent.Futures
+             UrlLib
+             Time
+             Random
+
+Imported By: feedme_core.py
+             recipe_scraper.py
+             well_scraper.py
+             crawler.py
+             fetch_benchmark.py
+
+This file provides the shared download engine for the scrapers. Pages are
+fetched on a bounded thread pool over a pooled HTTP session, so connections to
+each host are kept alive and reused, the number of requests in flight against
+a single host is capped, and failed requests are retried with exponential
+backoff. A crawl can also cap the number of requests per second sent to each
+host. Results are handed back as soon as each download finishes, which lets
+the scrapers parse one page while the others are still downloading.
+'''
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+
+# Default engine settings
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+RETRY_STATUS = {429, 500, 502, 503, 504}
+USER_AGENT = "FeedMe/1.0 (+recipe catalogue)"
+
+# Result of fetching a single URL
+@dataclass
+class FetchResult:
+    url: str
+    status: int = 0
+    content: bytes = b""
+    headers: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    attempts: int = 0
+    error: str = ""
+
+    @property
+    def ok(self):
+        return self.status == 200 and not self.error
+
+# Class to download many pages concurrently with per-host limits
+class Fetcher:
+    def __init__(self, max_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, per_host_rate=None):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.per_host_rate = per_host_rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # One session shares a keep-alive connection pool per host across all workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+        self._host_limits = {}
+        self._host_turns = {}
+        self._host_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    # Function to get the semaphore limiting requests in flight for a host
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    # Function to wait until a host may be sent another request under the per-host rate
+    def _wait_turn(self, url):
+        if not self.per_host_rate:
+            return
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            turn = max(now, self._host_turns.get(host, 0.0))
+            self._host_turns[host] = turn + 1.0 / self.per_host_rate
+        if turn > now:
+            time.sleep(turn - now)
+
+    # Function to download a single URL, retrying transient failures with backoff
+    def fetch(self, url, headers=None):
+        result = FetchResult(url)
+        start = time.perf_counter()
+        with instrumentation.timer("fetch"):
+            for attempt in range(self.retries + 1):
+                result.attempts = attempt + 1
+                try:
+                    self._wait_turn(url)
+                    with self._host_limit(url):
+                        response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    result.status = response.status_code
+                    result.content = response.content
+                    result.headers = dict(response.headers)
+                    result.error = ""
+                    if response.status_code not in RETRY_STATUS:
+                        break
+                    result.error = "HTTP " + str(response.status_code)
+                except requests.RequestException as e:
+                    result.error = str(e)
+                if attempt < self.retries:
+                    # Exponential backoff with jitter so retries do not arrive in lockstep
+                    time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+        result.elapsed = time.perf_counter() - start
+        instrumentation.count("fetch_retries", result.attempts - 1)
+        if result.error:
+            instrumentation.count("fetch_failures")
+        return result
+
+    # Function to download many URLs, yielding each result as soon as it finishes
+    def fetch_all(self, urls, headers_for=None):
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as pool:
+            futures = [pool.submit(self.fetch, url, headers_for(url) if headers_for else None) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+# Function to download URLs one after another, as the scrapers originally did
+def fetch_serial(urls):
+    for url in urls:
+        start = time.perf_counter()
+        with urlopen(url) as html:
+            content = html.read()
+            status = html.status
+        yield FetchResult(url, status, content, elapsed=time.perf_counter() - start, attempts=1)
@@ -0,0 +1,186 @@
+'''
+File:        fixture_site.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     Pandas
+             HTTP.Server
+             Threading
+             HTML
+             Regex
+             AST
+             HashLib
+             Time
+
+Imported By: fetch_benchmark.py
+             parse_benchmark.py
+             crawl_benchmark.py
+
+This file serves a local stand-in for the recipe websites. Recipes from the
+saved CSV files are rendered back into pages using the same markup as
+AllRecipes and EatingWell, and served over HTTP on localhost with ETags and an
+optional artificial delay, so the scrapers can be exercised and timed without
+touching the real sites. The site can also serve a sitemap index, sitemaps,
+category pages and a robots.txt over its recipe pages, so a crawl can be run
+against it from the same starting points as on the real sites.
+'''
+
+import ast
+import hashlib
+import html
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+SITEMAP_SIZE = 500
+CONTENT_TYPES = {"xml": "application/xml", "txt": "text/plain"}
+
+# Function to render the time, nutrition and ingredient sections shared by both sites
+def _render_common(recipe):
+    time_items = []
+    for x in recipe["Time"]:
+        label, _, value = x.partition(":")
+        time_items.append('<div class="mm-recipes-details__item"><div class="mm-recipes-details__label">'
+                          + html.escape(label) + ':</div>\n<div class="mm-recipes-details__value">'
+                          + html.escape(value.strip()) + '</div></div>')
+    nutrition_rows = []
+    for x in recipe["Nutrition"]:
+        amount, _, label = x.partition(" ")
+        nutrition_rows.append("<tr><td>" + html.escape(amount) + "\n</td><td>" + html.escape(label) + "\n\n</td></tr>")
+    ingredient_items = ["<li>" + html.escape(x) + "</li>" for x in recipe["Ingredients"]]
+    return ('<h1 class="article-heading">' + html.escape(recipe["Name"]) + '</h1>\n'
+            + '<div class="mm-recipes-details__content">\n' + "\n".join(time_items) + '\n</div>\n'
+            + '<table class="mm-recipes-nutrition-facts-summary__table"><tbody>\n'
+            + "\n".join(nutrition_rows) + '\n</tbody></table>\n'
+            + '<ul class="mm-recipes-structured-ingredients__list">\n' + "\n".join(ingredient_items) + '\n</ul>\n')
+
+# Function to render a recipe as an AllRecipes page
+def render_allrecipes(recipe):
+    steps = ['<p class="comp mntl-sc-block mntl-sc-block-html">' + html.escape(x) + '</p>' for x in recipe["Directions"]]
+    return ("<html><head><title>" + html.escape(recipe["Name"]) + "</title></head><body>\n"
+            + _render_common(recipe)
+            + '<div id="mm-recipes-steps__content_1-0">\n' + "\n".join(steps) + '\n</div>\n'
+            + "</body></html>").encode("utf-8")
+
+# Function to render a recipe as an EatingWell page
+def render_eatingwell(recipe):
+    steps = ["<li><p>" + html.escape(x) + "</p></li>" for x in recipe["Directions"]]
+    return ("<html><head><title>" + html.escape(recipe["Name"]) + "</title></head><body>\n"
+            + _render_common(recipe)
+            + '<div id="mm-recipes-steps_1-0"><ol>\n' + "\n".join(steps) + '\n</ol></div>\n'
+            + "</body></html>").encode("utf-8")
+
+RENDERERS = {"allrecipes": render_allrecipes, "eatingwell": render_eatingwell}
+
+# Function to read saved recipes back into rows of Python lists
+def load_recipes(file):
+    recipes = pd.read_csv(file, index_col=0)
+    for column in ["Time", "Nutrition", "Ingredients", "Directions"]:
+        recipes[column] = recipes[column].map(ast.literal_eval)
+    return recipes.to_dict("records")
+
+# Function to build a mapping of URL paths to rendered pages, shaped like the real sites' recipe URLs
+def build_pages(file, site, copies=1):
+    render = RENDERERS[site]
+    recipes = load_recipes(file)
+    pages = {}
+    for copy in range(copies):
+        for i, recipe in enumerate(recipes):
+            # Every copy is a different recipe, so copies are not dropped as duplicates
+            if copy > 0:
+                recipe = dict(recipe, Name=recipe["Name"] + " " + str(copy + 1))
+            slug = re.sub(r"[^a-z0-9]+", "-", recipe["Name"].lower()).strip("-")
+            pages["/" + site + "/recipe/" + str(copy * len(recipes) + i + 1) + "/" + slug + "/"] = render(recipe)
+    return pages
+
+# Function to render a sitemap listing URLs, or an index of further sitemaps
+def _render_sitemap(urls, index=False):
+    tag, entry = ("sitemapindex", "sitemap") if index else ("urlset", "url")
+    entries = ["<" + entry + "><loc>" + html.escape(x) + "</loc></" + entry + ">" for x in urls]
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<' + tag + ' xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + "\n".join(entries) + "\n</" + tag + ">").encode("utf-8")
+
+# Function to build each site's sitemaps and category pages over its recipe pages
+def build_indexes(base_url, pages, size=SITEMAP_SIZE):
+    indexes = {"/robots.txt": b"User-agent: *\nDisallow: /search\n"}
+    sites = {}
+    for path in pages:
+        sites.setdefault(path.split("/")[1], []).append(path)
+    for site, paths in sites.items():
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        sitemaps, listings = [], []
+        for k, chunk in enumerate(chunks, 1):
+            sitemaps.append("/" + site + "/sitemap_" + str(k) + ".xml")
+            indexes[sitemaps[-1]] = _render_sitemap([base_url + x for x in chunk])
+            listings.append("/" + site + "/recipes/" + str(k) + "/page-" + str(k) + "/")
+            links = ['<a href="' + x + '">Recipe</a>' for x in chunk] + ['<a href="/about/">About us</a>', '<a href="https://example.com/">Ads</a>']
+            indexes[listings[-1]] = ("<html><body>\n" + "\n".join(links) + "\n</body></html>").encode("utf-8")
+        indexes["/" + site + "/sitemap.xml"] = _render_sitemap([base_url + x for x in sitemaps], index=True)
+        links = ['<a href="' + x + '">Category</a>' for x in listings]
+        indexes["/" + site + "/recipes/"] = ("<html><body>\n" + "\n".join(links) + "\n</body></html>").encode("utf-8")
+    return indexes
+
+# Class to serve the rendered pages, optionally delaying each response
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        page = self.pages.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"' + hashlib.sha1(page).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", CONTENT_TYPES.get(self.path.rpartition(".")[2], "text/html") + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+# Class to run a fixture server on a background thread
+class FixtureSite:
+    def __init__(self, pages, latency=0.0, port=0, indexes=False):
+        self.pages = pages
+        handler = type("Handler", (FixtureHandler,), {"pages": dict(pages), "latency": latency})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        if indexes:
+            handler.pages.update(build_indexes(self.base_url, pages))
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:" + str(self.server.server_address[1])
+
+    # Function to get the URLs of the recipe pages, leaving out any sitemaps and category pages
+    def urls(self):
+        return [self.base_url + path for path in self.pages]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,90 @@
+'''
+File:        grocery_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     search_benchmark.py
+             grocery_list.py
+             ingredient_parser.py
+             NumPy
+             ArgParse
+             Time
+
+Imported By: N/A
+
+This file measures how long shopping lists take to build for meal plans of
+growing size on a synthetic catalogue. It times parsing every ingredient line
+when the catalogue is built, with and without the cache of lines already seen,
+then builds each list with the array sums in grocery_list.py and with a loop
+that parses and adds up every ingredient line of the plan, and checks that both
+give the same amounts.
+
+Usage: python grocery_benchmark.py [--rows 100000] [--plans 21,210,2100,21000] [--repeat 5]
+'''
+
+import argparse
+import time
+
+import numpy as np
+
+import grocery_list
+import ingredient_parser
+from search_benchmark import best_of, synthetic_store
+
+# Function to add up a plan's ingredients by parsing every line, as a list would be built without the parsed arrays
+def loop_list(store, indexes, servings):
+    totals = {}
+    for index in indexes:
+        scale = 1.0
+        if servings and store.frame.at[index, "servings"] > 0:
+            scale = servings / store.frame.at[index, "servings"]
+        for line in store.lists["Ingredients"][index]:
+            parsed = ingredient_parser.parse_ingredient.__wrapped__(line)
+            key = (parsed.name, parsed.measure)
+            if parsed.amount is not None:
+                totals[key] = totals.get(key, 0.0) + parsed.amount * scale
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Time shopping lists for meal plans on a synthetic catalogue.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--plans", default="21,210,2100,21000", help="comma-separated numbers of recipes in a plan")
+    parser.add_argument("--servings", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    store = synthetic_store(args.rows)
+    print("Catalogue:", args.rows, "recipes,", int(store.lists["Ingredients"].offsets[-1]), "ingredient lines")
+
+    start = time.perf_counter()
+    lines = [x for y in store.lists["Ingredients"] for x in y]
+    for line in lines:
+        ingredient_parser.parse_ingredient.__wrapped__(line)
+    print("Parse every line, no cache:", round(time.perf_counter() - start, 2), "s")
+    ingredient_parser.parse_ingredient.cache_clear()
+    start = time.perf_counter()
+    store.parsed_ingredients()
+    print("Parse every line, cached:  ", round(time.perf_counter() - start, 2), "s")
+
+    start = time.perf_counter()
+    groceries = grocery_list.GroceryList(store)
+    print("Products numbered in", round((time.perf_counter() - start) * 1000, 1), "ms")
+
+    rng = np.random.default_rng(0)
+    for size in [int(x) for x in args.plans.split(",")]:
+        indexes = rng.integers(0, args.rows, size=size)
+        items = groceries.build(indexes, args.servings)
+        totals = loop_list(store, indexes, args.servings)
+        built = {(x["item"], x["measure"]): x["amount"] for x in items if x["amount"] is not None}
+        assert built.keys() == totals.keys() and all(np.isclose(built[x], totals[x]) for x in totals), \
+            "the two approaches added up different amounts"
+
+        vectorized = best_of(args.repeat, lambda: groceries.build(indexes, args.servings))
+        loop = best_of(1, lambda: loop_list(store, indexes, args.servings))
+        print(f'Plan of {size:>6} recipes: {len(items):>3} products, arrays {vectorized:8.2f} ms, loop {loop:9.2f} ms')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+'''
+File:        grocery_list.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     ingredient_parser.py
+             Pandas
+             NumPy
+
+Imported By: catalogue.py
+             grocery_benchmark.py
+
+This file adds up the ingredients of a set of recipes into one shopping list.
+It works on the amounts, measures and product names read from every ingredient
+line when the catalogue was built, so no text is parsed here. Each product is
+numbered once by its name and the measure it is added up in, so the same
+product from different recipes lands on the same line. A list is then built
+with array operations: the ingredient lines of the chosen recipes are gathered,
+each recipe's amounts are scaled from its own servings to the servings wanted,
+and the amounts are summed per product. A recipe chosen twice, as in a week of
+meals, counts twice.
+'''
+
+import numpy as np
+import pandas as pd
+
+import ingredient_parser
+
+# Class to add up the ingredients of chosen recipes into a shopping list
+class GroceryList:
+    def __init__(self, store):
+        self.store = store
+        parsed = store.parsed_ingredients()
+        self.amounts = parsed["amount"]
+        # Number each (product, measure) pair once, so lines are added up by their numbers
+        measures = len(parsed["measures"])
+        keys = parsed["item"].astype(np.int64) * measures + parsed["measure"]
+        self.codes, keys = pd.factorize(keys)
+        self.products = [(parsed["items"][x // measures], parsed["measures"][x % measures]) for x in keys.tolist()]
+        self.offsets = store.lists["Ingredients"].offsets
+        self.servings = store.frame["servings"].to_numpy()
+
+    # Function to add up the ingredients of recipes given by position, scaled to a number of servings each
+    def build(self, indexes, servings=None):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        if len(indexes) == 0:
+            return []
+        starts = self.offsets[indexes]
+        counts = self.offsets[indexes + 1] - starts
+        first = np.cumsum(counts) - counts
+        lines = np.repeat(starts - first, counts) + np.arange(counts.sum())
+
+        # Recipes without a known number of servings are used as written
+        scale = np.ones(len(indexes))
+        if servings:
+            known = self.servings[indexes] > 0
+            scale[known] = servings / self.servings[indexes][known]
+        amounts = self.amounts[lines] * np.repeat(scale, counts)
+
+        size = len(self.products)
+        codes = self.codes[lines]
+        totals = np.bincount(codes, weights=np.nan_to_num(amounts), minlength=size)
+        measured = np.bincount(codes, weights=~np.isnan(amounts), minlength=size) > 0
+        recipe = np.repeat(np.arange(len(indexes)), counts)
+        recipes = np.bincount(np.unique(recipe * size + codes) % size, minlength=size)
+
+        items = []
+        for code in np.flatnonzero(recipes):
+            item, measure = self.products[code]
+            amount = float(totals[code]) if measured[code] else None
+            text = item
+            # A total of nothing, as from an amount such as "1/0 cup", is left out of the line
+            if amount:
+                # Counted products are named in the plural once there is more than one, as in "2 onions"
+                if not measure and amount > 1 + 1 / 16:
+                    item_text = ingredient_parser.plural(item)
+                else:
+                    item_text = item
+                text = ingredient_parser.format_amount(amount, measure) + " " + item_text
+            items.append({"item": item, "amount": amount, "measure": measure, "text": text, "recipes": int(recipes[code])})
+        items.sort(key=lambda x: (x["item"], x["measure"]))
+        return items
@@ -0,0 +1,91 @@
+'''
+File:        http_cache.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     JSON
+             HashLib
+             OS
+
+Imported By: feedme_core.py
+             recipe_scraper.py
+             well_scraper.py
+             store_scraper.py
+
+This file keeps a persistent record of every page the scrapers have
+downloaded. For each URL it remembers the ETag and Last-Modified validators the
+server sent, a hash of the page bytes and the row that was parsed from it, so a
+refresh can ask the server whether anything changed and skip pages that did
+not.
+'''
+
+import hashlib
+import json
+import os
+
+DEFAULT_CACHE_FILE = "http_cache.json"
+
+# Function to hash downloaded bytes
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+# Class to store validators, content hashes and parsed rows keyed by URL
+class HttpCache:
+    def __init__(self, file=DEFAULT_CACHE_FILE):
+        self.file = file
+        self.entries = {}
+        if os.path.isfile(file):
+            with open(file, "rt", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    # Function to build the conditional request headers for a URL
+    def conditional_headers(self, url):
+        entry = self.entries.get(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # Function to check whether a fetch result matches what is already cached, given its hash if it was streamed
+    def is_unchanged(self, result, hash=None):
+        entry = self.entries.get(result.url)
+        if entry is None:
+            return False
+        if result.status == 304:
+            return True
+        return result.status == 200 and entry.get("hash") == (hash or content_hash(result.content))
+
+    # Function to record a fresh download and the row parsed from it
+    def update(self, result, row=None, hash=None):
+        headers = {k.lower(): v for k, v in result.headers.items()}
+        entry = self.entries.setdefault(result.url, {})
+        if "etag" in headers:
+            entry["etag"] = headers["etag"]
+        if "last-modified" in headers:
+            entry["last_modified"] = headers["last-modified"]
+        if result.status == 200:
+            entry["hash"] = hash or content_hash(result.content)
+        if row is not None:
+            entry["row"] = row
+
+    # Function to write the cache to disk, replacing the old file atomically
+    def save(self):
+        temp = self.file + ".tmp"
+        with open(temp, "wt", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp, self.file)
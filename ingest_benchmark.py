@@ -0,0 +1,161 @@
+'''
+File:        ingest_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     store_scraper.py
+             Pandas
+             NumPy
+             Requests
+             SubProcess
+             Resource
+             TempFile
+             ArgParse
+             Socket
+             Time
+             Sys
+             IO
+             OS
+
+Imported By: N/A
+
+This file measures the peak memory and time of downloading a store dataset far
+larger than the WPRDC one, with the streaming ingest in store_scraper.py and
+with the old approach of holding the whole response and table in memory. The
+dataset is generated with the WPRDC columns plus the address columns a
+national dataset would carry, and a share of rows that are duplicates or have
+missing or impossible coordinates, then served from a local HTTP server. Each
+approach runs in its own process so their peak memory can be told apart, and
+both must keep the same stores. Before the run, the duplicate check is given
+chunks in which every store was seen before, or which are empty, and the
+script exits with status 1 if it tells any store apart wrongly.
+
+Usage: python ingest_benchmark.py [--rows 1000000]
+'''
+
+import argparse
+import io
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+import store_scraper
+
+CATEGORIES = ["Supermarket", "Convenience Store", "Grocery Store", "Farmers Market"]
+
+# Function to write a synthetic store dataset with some duplicate and broken rows
+def generate(file, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(file, "wt", encoding="utf-8", newline="") as out:
+        for start in range(0, rows, 100000):
+            count = min(100000, rows - start)
+            ids = np.arange(start, start + count)
+            chunk = pd.DataFrame({
+                "ID": ids,
+                "Name": ["Store " + str(x) for x in ids],
+                "Address": [str(x % 9000 + 100) + " Main St" for x in ids],
+                "City": "Pittsburgh",
+                "State": "PA",
+                "Zip": rng.integers(10000, 99999, count),
+                "Lat": rng.uniform(25, 49, count).round(6).astype(str),
+                "Lon": rng.uniform(-124, -67, count).round(6).astype(str),
+                "Category": rng.choice(CATEGORIES, count),
+                "Notes": "Open daily",
+            })
+            # About 2% of rows repeat the previous store and 1% have no usable coordinates
+            repeat = rng.random(count) < 0.02
+            repeat[0] = False
+            chunk.loc[repeat, ["Name", "Lat", "Lon", "Category"]] = chunk[["Name", "Lat", "Lon", "Category"]].shift(1)[repeat]
+            broken = rng.random(count) < 0.01
+            chunk.loc[broken, "Lat"] = rng.choice(["", "unknown", "123.4"], int(broken.sum()))
+            chunk.to_csv(out, index=False, header=start == 0)
+
+# Function to download a dataset the old way, holding the response and the whole table in memory
+def download_buffered(file, url):
+    response = requests.get(url)
+    stores = pd.read_csv(io.BytesIO(response.content), dtype=store_scraper.STORE_DTYPES)
+    stores = stores[store_scraper.STORE_COLUMNS]
+    stores = stores.dropna()
+    stores = store_scraper.clean_stores(stores).drop_duplicates()
+    stores.reset_index(drop=True).to_csv(file)
+
+# Function to check that chunks of only duplicate stores, or of none, are skipped without losing earlier stores,
+# returning the chunks that were told apart wrongly
+def check_seen_stores():
+    seen = store_scraper.SeenStores()
+    wrong = []
+    for keys, fresh in [([1, 2, 3], [1, 1, 1]), ([1, 2], [0, 0]), ([], []), ([5, 2], [1, 0]), ([3, 5, 6], [0, 0, 1])]:
+        found = seen.first_seen(np.array(keys, dtype=np.uint64))
+        if found.tolist() != [bool(x) for x in fresh]:
+            wrong.append(keys)
+    return wrong
+
+# Function to run one approach in this process and report its time and peak memory
+def child(method, url, file):
+    start = time.perf_counter()
+    if method == "streaming":
+        store_scraper.download_stores(file, url)
+    else:
+        download_buffered(file, url)
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of streaming and buffered store downloads.")
+    parser.add_argument("--rows", type=int, default=1000000, help="stores in the generated dataset")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+    # The duplicate check runs before every benchmark, and a failure is the script's exit status
+    wrong = check_seen_stores()
+    if wrong:
+        print("Stores seen before were not told apart from new ones in chunks:", wrong)
+        sys.exit(1)
+    print("Duplicate check: chunks of only seen stores, or of none, are skipped")
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(os.path.join(directory, "stores.csv"), args.rows)
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        server = subprocess.Popen([sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1", "--directory", directory],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = "http://127.0.0.1:" + str(port) + "/stores.csv"
+            for _ in range(50):
+                try:
+                    requests.head(url)
+                    break
+                except requests.ConnectionError:
+                    time.sleep(0.1)
+            print("Dataset:", args.rows, "rows,", round(os.path.getsize(os.path.join(directory, "stores.csv")) / 1e6, 1), "MB")
+            outputs = {}
+            for method in ["buffered", "streaming"]:
+                outputs[method] = os.path.join(directory, method + ".csv")
+                answer = subprocess.run([sys.executable, os.path.realpath(__file__), "--child", method, url, outputs[method]],
+                                        capture_output=True, text=True, check=True).stdout.split("\n")
+                elapsed, peak = answer[-2].split()
+                print(f'{method + ":":<11} {float(elapsed):6.2f} s  peak {float(peak):7.1f} MB')
+        finally:
+            server.terminate()
+            server.wait()
+
+        buffered, streaming = (pd.read_csv(outputs[x], index_col=0) for x in ["buffered", "streaming"])
+        assert buffered.equals(streaming), "the two approaches kept different stores"
+        print("Stores kept:", len(streaming))
+
+if __name__ == "__main__":
+    main()
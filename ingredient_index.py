@@ -0,0 +1,177 @@
+'''
+File:        ingredient_index.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             ingredient_parser.py
+             Regex
+             JSON
+             HashLib
+             OS
+
+Imported By: catalogue.py
+
+This file keeps an inverted index from ingredient words to the recipes that
+use them. Ingredient strings are normalized before indexing: quantities,
+units, preparation notes and descriptive words are removed, and the remaining
+words are lowercased and made singular, so "3/4 cup Peanut Butter" and "peanut
+butters" both index as "peanut butter". A line whose words before the first
+comma are all descriptive, such as "6 skinless, boneless chicken breast
+halves", is read past the comma. The index answers multi-ingredient searches
+by intersecting posting lists and ranks recipes by how many of their
+ingredients a pantry covers. It is saved next to the recipe snapshot and
+updated only for recipes that are new or changed, and built again when the
+normalization changes. The normalization itself is shared with
+ingredient_parser.py, which also reads quantities and units.
+'''
+
+import hashlib
+import json
+import os
+import re
+
+import recipe_store
+from ingredient_parser import normalize_ingredient
+
+INDEX_FILE = "ingredient_index.json"
+# Raised whenever ingredients are normalized differently, so indexes saved before are built again
+INDEX_VERSION = 2
+
+# Function to reduce a comma-separated query to normalized ingredients
+def parse_query(text):
+    return [x for x in (normalize_ingredient(y) for y in re.split(r"[,;]", text)) if x]
+
+# Function to normalize one ingredient line, reading past its first comma when the words before it are all descriptive
+def normalize_line(text):
+    return normalize_ingredient(text) or normalize_ingredient(text.replace(",", " "))
+
+# Function to fingerprint a recipe's ingredient list
+def _fingerprint(ingredients):
+    return hashlib.sha1("\n".join(ingredients).encode("utf-8")).hexdigest()[:16]
+
+# Class to map normalized ingredient words to recipe IDs
+class IngredientIndex:
+    def __init__(self):
+        self.postings = {}
+        self.recipes = {}
+        self.stamp = None
+        self.version = INDEX_VERSION
+
+    # Function to index a recipe, replacing any earlier entry for the same ID
+    def add_recipe(self, id, ingredients):
+        fingerprint = _fingerprint(ingredients)
+        entry = self.recipes.get(id)
+        if entry is not None:
+            if entry["hash"] == fingerprint:
+                return False
+            self.remove_recipe(id)
+        normalized = [x for x in (normalize_line(y) for y in ingredients) if x]
+        self.recipes[id] = {"hash": fingerprint, "ingredients": normalized}
+        for token in {x for y in normalized for x in y}:
+            self.postings.setdefault(token, set()).add(id)
+        return True
+
+    # Function to drop a recipe from the index
+    def remove_recipe(self, id):
+        entry = self.recipes.pop(id, None)
+        if entry is None:
+            return
+        for token in {x for y in entry["ingredients"] for x in y}:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.discard(id)
+                if not posting:
+                    del self.postings[token]
+
+    # Function to bring the index in line with a recipe catalogue
+    def sync(self, store):
+        ids = store.frame["ID"].tolist()
+        changed = 0
+        for id in set(self.recipes) - set(ids):
+            self.remove_recipe(id)
+            changed += 1
+        for id, ingredients in zip(ids, store.lists["Ingredients"]):
+            changed += self.add_recipe(id, ingredients)
+        return changed
+
+    # Function to get the IDs of recipes using every word of one normalized ingredient
+    def _matches(self, ingredient):
+        postings = sorted((self.postings.get(x, set()) for x in ingredient), key=len)
+        if not postings:
+            return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+        return result
+
+    # Function to get the IDs of recipes that use all of the queried ingredients
+    def search(self, query):
+        ingredients = parse_query(query) if isinstance(query, str) else query
+        if not ingredients:
+            return set()
+        matches = sorted((self._matches(x) for x in ingredients), key=len)
+        result = matches[0]
+        for match in matches[1:]:
+            result &= match
+        return result
+
+    # Function to rank recipes by the share of their ingredients covered by a pantry
+    def rank_by_coverage(self, pantry, limit=None):
+        pantry = parse_query(pantry) if isinstance(pantry, str) else pantry
+        pantry_sets = [set(x) for x in pantry]
+        candidates = set()
+        for ingredient in pantry:
+            candidates |= self._matches(ingredient)
+        ranked = []
+        for id in candidates:
+            ingredients = self.recipes[id]["ingredients"]
+            covered = sum(1 for x in ingredients if any(y <= set(x) for y in pantry_sets))
+            ranked.append((covered / len(ingredients), covered - len(ingredients), id))
+        ranked.sort(key=lambda x: (-x[0], -x[1], x[2]))
+        ranked = [(id, coverage) for coverage, _, id in ranked]
+        return ranked[:limit] if limit is not None else ranked
+
+    # Function to save the index as JSON, replacing the old file atomically
+    def save(self, file=INDEX_FILE):
+        data = {
+            "version": self.version,
+            "stamp": self.stamp,
+            "recipes": {str(id): entry for id, entry in self.recipes.items()},
+            "postings": {token: sorted(ids) for token, ids in self.postings.items()}
+        }
+        temp = file + ".tmp"
+        with open(temp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp, file)
+
+    # Function to load an index saved by save
+    @classmethod
+    def load(cls, file=INDEX_FILE):
+        index = cls()
+        with open(file, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        index.version = data.get("version", 1)
+        index.stamp = data["stamp"]
+        for id, entry in data["recipes"].items():
+            entry["ingredients"] = [tuple(x) for x in entry["ingredients"]]
+            index.recipes[int(id)] = entry
+        index.postings = {token: set(ids) for token, ids in data["postings"].items()}
+        return index
+
+# Function to load the saved index, updating it only if the recipe snapshot has changed or it was built differently
+def load_index(store, file=INDEX_FILE, snapshot=recipe_store.SNAPSHOT_FILE):
+    stamp = None
+    if os.path.isfile(snapshot):
+        stamp = [os.path.getmtime(snapshot), os.path.getsize(snapshot)]
+    index = IngredientIndex.load(file) if os.path.isfile(file) else IngredientIndex()
+    if index.version != INDEX_VERSION:
+        index = IngredientIndex()
+    if stamp is None or index.stamp != stamp:
+        index.sync(store)
+        index.stamp = stamp
+        index.save(file)
+    return index
@@ -0,0 +1,215 @@
+'''
+File:        ingredient_parser.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     DataClasses
+             FuncTools
+             Regex
+
+Imported By: recipe_store.py
+             ingredient_index.py
+             grocery_list.py
+             grocery_benchmark.py
+
+This file reads the free-text ingredient lines of the recipes, such as
+"3/4 cup peanut butter", "2 ½ cups whole wheat flour" or
+"1 (8 ounce) package silken tofu, diced", into a quantity, a unit and the name
+of the product. Quantities may be whole numbers, decimals, ASCII or Unicode
+fractions, mixed numbers and ranges, of which the upper end is taken. A size in
+brackets after the quantity is multiplied in, so the tofu above is 8 ounces.
+Units are matched by their usual spellings and abbreviations, and volumes and
+weights are converted to millilitres and grams so the same product measured in
+teaspoons and cups can be added up. The product name is reduced to the words
+that name the ingredient, the same way the ingredient index reduces them.
+
+The same lines repeat across many recipes (salt, eggs, olive oil), so parsed
+lines are cached by their text. Recipes are parsed once, when the catalogue is
+built, and the results are kept in its snapshot.
+'''
+
+import functools
+import re
+from dataclasses import dataclass
+
+PARSE_CACHE_SIZE = 1 << 16
+
+UNITS = {"cup", "c", "tablespoon", "tbsp", "tbs", "teaspoon", "tsp", "pound", "lb", "ounce", "oz",
+         "fluid", "gram", "g", "kilogram", "kg", "milliliter", "ml", "liter", "l", "quart", "qt",
+         "pint", "pt", "gallon", "pinch", "dash", "clove", "can", "package", "pkg", "packet",
+         "slice", "stick", "bunch", "sprig", "head", "jar", "bottle", "container", "piece",
+         "inch", "envelope", "handful", "drop", "bag", "box", "stalk", "fillet"}
+DESCRIPTORS = {"fresh", "freshly", "large", "small", "medium", "chopped", "diced", "sliced", "minced",
+               "grated", "shredded", "packed", "peeled", "frozen", "whole", "ground", "to", "taste",
+               "of", "and", "or", "for", "such", "as", "about", "plus", "more", "optional", "finely",
+               "thinly", "roughly", "coarsely", "cut", "into", "divided", "softened", "melted", "room",
+               "temperature", "pure", "extra", "virgin", "unsweetened", "cooked", "uncooked", "dried",
+               "raw", "ripe", "lightly", "beaten", "a", "an", "the", "in", "with", "each", "few",
+               "cold", "warm", "hot", "boneless", "skinless", "halved", "quartered", "trimmed",
+               "rinsed", "drained", "cubed", "crushed", "toasted", "firmly", "well", "at", "least"}
+SINGULAR_EXCEPTIONS = {"molasses", "swiss", "grits", "oats", "brussels"}
+
+# Volumes in millilitres and weights in grams of one of each unit, keyed by canonical name
+VOLUMES = {"teaspoon": 4.92892, "tablespoon": 14.7868, "fluid ounce": 29.5735, "cup": 236.588, "pint": 473.176,
+           "quart": 946.353, "gallon": 3785.41, "milliliter": 1.0, "liter": 1000.0, "pinch": 0.308, "dash": 0.616}
+WEIGHTS = {"ounce": 28.3495, "pound": 453.592, "gram": 1.0, "kilogram": 1000.0}
+# Units that are counted rather than measured
+COUNTS = {"clove", "can", "package", "packet", "pouch", "slice", "stick", "bunch", "sprig", "head", "jar", "bottle",
+          "container", "piece", "envelope", "handful", "stalk", "fillet", "ear", "bag", "box", "inch", "drop"}
+UNIT_ALIASES = {"c": "cup", "tbsp": "tablespoon", "tbs": "tablespoon", "tsp": "teaspoon", "lb": "pound", "lbs": "pound",
+                "oz": "ounce", "g": "gram", "kg": "kilogram", "ml": "milliliter", "l": "liter", "litre": "liter",
+                "qt": "quart", "pt": "pint", "gal": "gallon", "pkg": "package", "fl oz": "fluid ounce"}
+
+FRACTIONS = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅕": "1/5", "⅖": "2/5", "⅗": "3/5",
+             "⅘": "4/5", "⅙": "1/6", "⅚": "5/6", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8"}
+NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+"
+QUANTITY = re.compile(r"(" + NUMBER + r")(?:\s*(?:-|–|to|or)\s*(" + NUMBER + r"))?\s*")
+SIZE = re.compile(r"\(\s*(" + NUMBER + r")[\s-]*((?:fl\.?\s+)?[a-zA-Z]+)\.?\s*\)\s*")
+# Fractions amounts are rounded to for display, and the units volumes and weights are shown in from largest to smallest
+DISPLAY_FRACTIONS = {0: "", 1 / 8: "⅛", 1 / 4: "¼", 1 / 3: "⅓", 3 / 8: "⅜", 1 / 2: "½", 5 / 8: "⅝", 2 / 3: "⅔", 3 / 4: "¾",
+                     7 / 8: "⅞", 1: ""}
+DISPLAY_VOLUMES = [("cup", 1 / 4), ("tablespoon", 1), ("teaspoon", 1 / 8), ("pinch", 0)]
+DISPLAY_WEIGHTS = [("pound", 1), ("ounce", 0)]
+DISPLAY_NAMES = {"tablespoon": "tbsp", "teaspoon": "tsp", "pound": "lb", "ounce": "oz"}
+WORD = re.compile(r"((?:fl\.?\s+|fluid\s+)?[a-zA-Z]+)\.?(?:\s+of)?\b\s*")
+
+# Function to make a word singular with simple English suffix rules
+def singular(word):
+    if len(word) <= 3 or word in SINGULAR_EXCEPTIONS:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+# Function to reduce an ingredient string to the words that name the ingredient
+def normalize_ingredient(text):
+    text = text.lower()
+    text = re.sub(r"\([^)]*\)", " ", text)
+    text = text.split(",")[0]
+    words = re.findall(r"[a-z]+(?:-[a-z]+)*", text)
+    words = [singular(x) for x in words]
+    return tuple(x for x in words if x not in UNITS and x not in DESCRIPTORS)
+
+# Function to get the value of a number written as "2", "1.5", "3/4" or "2 1/2"
+def _number(text):
+    value = 0.0
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            value += int(numerator) / int(denominator) if int(denominator) else 0.0
+        else:
+            value += float(part)
+    return value
+
+# Function to get the canonical name of a unit word, or None if it is not a unit
+def canonical_unit(word):
+    word = " ".join(word.lower().replace(".", "").replace("fluid", "fl").split())
+    word = UNIT_ALIASES.get(word, word)
+    if word in VOLUMES or word in WEIGHTS or word in COUNTS:
+        return word
+    word = singular(word)
+    word = UNIT_ALIASES.get(word, word)
+    if word in VOLUMES or word in WEIGHTS or word in COUNTS:
+        return word
+    return None
+
+# One ingredient line read into its parts
+@dataclass(frozen=True)
+class Ingredient:
+    text: str
+    name: str
+    quantity: float = None
+    unit: str = None
+
+    # What amounts of this ingredient are added up in: millilitres, grams, a counted unit, or "" for plain counts
+    @property
+    def measure(self):
+        if self.unit in VOLUMES:
+            return "ml"
+        if self.unit in WEIGHTS:
+            return "g"
+        return self.unit or ""
+
+    # Quantity in the measure's unit, or None if the line gives no quantity
+    @property
+    def amount(self):
+        if self.quantity is None:
+            return None
+        return self.quantity * VOLUMES.get(self.unit, WEIGHTS.get(self.unit, 1.0))
+
+# Function to read one ingredient line into its quantity, unit and product name, caching lines already seen
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_ingredient(text):
+    rest = text.strip()
+    for char, fraction in FRACTIONS.items():
+        rest = rest.replace(char, " " + fraction + " ")
+    rest = " ".join(rest.split())
+
+    quantity = unit = None
+    match = QUANTITY.match(rest)
+    if match:
+        quantity = _number(match.group(2) or match.group(1))
+        rest = rest[match.end():]
+        # A size in brackets, as in "1 (8 ounce) package", is what the quantity counts
+        size = SIZE.match(rest)
+        if size and canonical_unit(size.group(2)) in VOLUMES.keys() | WEIGHTS.keys():
+            quantity *= _number(size.group(1))
+            unit = canonical_unit(size.group(2))
+            rest = rest[size.end():]
+            container = WORD.match(rest)
+            if container and canonical_unit(container.group(1)) in COUNTS:
+                rest = rest[container.end():]
+    if unit is None:
+        word = WORD.match(rest)
+        if word and canonical_unit(word.group(1)) is not None:
+            unit = canonical_unit(word.group(1))
+            rest = rest[word.end():]
+            # A unit without a number, as in "Pinch of salt", means one of it
+            if quantity is None:
+                quantity = 1.0
+
+    # Descriptions before the first comma, as in "6 skinless, boneless chicken breasts", are read past
+    name = normalize_ingredient(rest) or normalize_ingredient(rest.replace(",", " "))
+    name = " ".join(name) or " ".join(rest.lower().split(",")[0].split())
+    return Ingredient(text, name, quantity, unit)
+
+# Function to add the plural ending to a unit or product name
+def plural(word):
+    if word.endswith(("s", "x", "ch", "sh", "to")):
+        return word + "es"
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return word[:-1] + "ies"
+    return word + "s"
+
+# Function to write a number as a whole number and the nearest eighth or third, such as "1 ½"
+def format_number(value):
+    whole = int(value)
+    fraction = min(DISPLAY_FRACTIONS, key=lambda x: abs(value - whole - x))
+    if fraction == 1:
+        whole += 1
+    # Only an amount of nothing is written as 0; any other amount too small to show is written as the smallest fraction
+    if value <= 0:
+        return "0"
+    if whole == 0 and fraction == 0:
+        return DISPLAY_FRACTIONS[1 / 8]
+    return " ".join(x for x in [str(whole) if whole else "", DISPLAY_FRACTIONS[fraction]] if x)
+
+# Function to write an amount added up in a measure (millilitres, grams or a counted unit) in a unit a cook would use
+def format_amount(amount, measure):
+    if measure in ("ml", "g"):
+        sizes, table = (DISPLAY_VOLUMES, VOLUMES) if measure == "ml" else (DISPLAY_WEIGHTS, WEIGHTS)
+        unit, value = next((x, amount / table[x]) for x, least in sizes if amount / table[x] >= least)
+        name = DISPLAY_NAMES.get(unit, unit)
+        if name == unit and value > 1:
+            name = plural(unit)
+        return format_number(value) + " " + name
+    if measure:
+        return format_number(amount) + " " + (plural(measure) if amount > 1 else measure)
+    return format_number(amount)
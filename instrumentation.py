@@ -0,0 +1,270 @@
+'''
+File:        instrumentation.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     Threading
+             FuncTools
+             AtExit
+             Bisect
+             Time
+             OS
+
+Imported By: catalogue.py
+             recipe_store.py
+             feedme_core.py
+             feedme_server.py
+             fetcher.py
+             recipe_scraper.py
+             crawler.py
+             store_scraper.py
+             store_map.py
+             FeedMe.py
+
+This file times the operations a FeedMe session waits on: loading each part of
+the catalogue, each kind of search, downloading and parsing pages, and drawing
+and saving the store map. Each operation is wrapped in a named timer, and its
+durations are counted into a latency histogram with fixed buckets, next to
+counters for events such as retried downloads. The histograms and counters are
+written in the Prometheus text format, either to a file when the program exits
+(for a node exporter's textfile collector, or to read by hand) or from the
+server's /metrics endpoint.
+
+Instrumentation is off unless it is asked for, and a timer that is off costs
+one dictionary lookup. It is switched on with environment variables, so the
+interactive program, the batch interface and the scrapers need no changes to
+be measured:
+
+    FEEDME_METRICS=metrics.prom         write the histograms to this file on exit
+    FEEDME_PROFILE=map_render,search_name
+                                        profile every run of these operations
+    FEEDME_PROFILE_MODE=cpu             cpu (cProfile) or memory (tracemalloc)
+    FEEDME_PROFILE_DIR=profiles         where profiles are written
+
+A CPU profile is saved in the pstats format, to be read with
+"python -m pstats" or a viewer such as snakeviz, and a memory profile is saved
+as text listing the lines that allocated the most memory and the peak.
+Operations profiled for memory in several threads at once share one trace,
+which stays on until the last of them ends.
+'''
+
+import atexit
+import bisect
+import functools
+import os
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets in seconds, as Prometheus client libraries use by default
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILE_MODES = ("cpu", "memory")
+DEFAULT_PROFILE_DIR = "profiles"
+MEMORY_PROFILE_LINES = 25
+
+enabled = False
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+_profiled = {}
+_profile_dir = DEFAULT_PROFILE_DIR
+_profile_runs = {}
+_profiling = threading.local()
+# Memory profiles running at once, across threads, and whether tracing was started for them rather than already on
+_tracing_runs = 0
+_started_tracing = False
+
+# Class to do nothing in place of a timer that is switched off
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+# Class to time one run of an operation into its histogram
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            count(self.name + "_errors")
+        return False
+
+# Class to profile one run of an operation, and time it too if metrics are on
+class _Profile:
+    def __init__(self, name, mode):
+        self.name = name
+        self.mode = mode
+        self.timer = _Timer(name) if enabled else _NULL_TIMER
+
+    def __enter__(self):
+        # Profilers do not nest, so an operation run inside a profiled one is only timed
+        self.active = not getattr(_profiling, "active", False)
+        if self.active:
+            _profiling.active = True
+            if self.mode == "cpu":
+                import cProfile
+                self.profiler = cProfile.Profile()
+                self.profiler.enable()
+            else:
+                import tracemalloc
+                _start_tracing()
+                tracemalloc.reset_peak()
+                self.before = tracemalloc.take_snapshot()
+        self.timer.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.__exit__(*exc)
+        if self.active:
+            if self.mode == "cpu":
+                self.profiler.disable()
+                self.profiler.dump_stats(self._file(".prof"))
+            else:
+                self._dump_memory()
+            _profiling.active = False
+        return False
+
+    # Function to pick a new file name for this run's profile
+    def _file(self, extension):
+        with _lock:
+            run = _profile_runs[self.name] = _profile_runs.get(self.name, 0) + 1
+        os.makedirs(_profile_dir, exist_ok=True)
+        return os.path.join(_profile_dir, self.name + "-" + str(os.getpid()) + "-" + str(run) + extension)
+
+    # Function to write the lines that allocated the most memory during the run, and its peak
+    def _dump_memory(self):
+        import tracemalloc
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        _stop_tracing()
+        lines = ["Operation: " + self.name, "Peak traced memory: " + str(round(peak / 1024, 1)) + " KiB", ""]
+        lines += [str(x) for x in after.compare_to(self.before, "lineno")[:MEMORY_PROFILE_LINES]]
+        with open(self._file(".txt"), "wt", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+# Function to start tracing memory for one more profile, unless it is already on
+def _start_tracing():
+    global _tracing_runs, _started_tracing
+    import tracemalloc
+    with _lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_runs += 1
+
+# Function to end tracing memory for one profile, stopping it once the last profile that needed it is done
+def _stop_tracing():
+    global _tracing_runs, _started_tracing
+    import tracemalloc
+    with _lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+# Function to get a timer for one run of an operation, to be used as "with timer(name):"
+def timer(name):
+    mode = _profiled.get(name)
+    if mode is not None:
+        return _Profile(name, mode)
+    return _Timer(name) if enabled else _NULL_TIMER
+
+# Function to time every call of a function as one operation, to be used as "@timed(name)"
+def timed(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# Function to record one run of an operation that was timed elsewhere
+def observe(name, seconds):
+    if not enabled:
+        return
+    slot = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][slot] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+# Function to add to an event counter
+def count(name, amount=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+# Function to switch metrics on or off, and choose the operations to profile unless profile is None
+def configure(metrics=True, profile=None, profile_mode="cpu", profile_dir=None):
+    global enabled, _profile_dir
+    if profile_mode not in PROFILE_MODES:
+        raise ValueError("profile mode must be one of " + ", ".join(PROFILE_MODES))
+    enabled = metrics
+    if profile is not None:
+        _profiled.clear()
+        _profiled.update({x: profile_mode for x in profile})
+    if profile_dir is not None:
+        _profile_dir = profile_dir
+
+# Function to forget every recorded timing and count
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+# Function to write the histograms and counters in the Prometheus text format
+def render():
+    with _lock:
+        histograms = {name: (list(x[0]), x[1], x[2]) for name, x in _histograms.items()}
+        counters = dict(_counters)
+    lines = ["# HELP feedme_operation_seconds Time taken by each FeedMe operation.",
+             "# TYPE feedme_operation_seconds histogram"]
+    for name in sorted(histograms):
+        buckets, total, runs = histograms[name]
+        cumulative = 0
+        for bound, hits in zip(BUCKETS + (float("inf"),), buckets):
+            cumulative += hits
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'feedme_operation_seconds_bucket{{operation="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'feedme_operation_seconds_sum{{operation="{name}"}} {total!r}')
+        lines.append(f'feedme_operation_seconds_count{{operation="{name}"}} {runs}')
+    lines += ["# HELP feedme_events_total Number of times each FeedMe event happened.",
+              "# TYPE feedme_events_total counter"]
+    for name in sorted(counters):
+        lines.append(f'feedme_events_total{{event="{name}"}} {counters[name]}')
+    return "\n".join(lines) + "\n"
+
+# Function to write the metrics to a file, replacing the old file atomically
+def write(file):
+    temp = file + ".tmp"
+    with open(temp, "wt", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(temp, file)
+
+# Instrumentation asked for through the environment is switched on when this module is first imported
+if os.environ.get("FEEDME_METRICS") or os.environ.get("FEEDME_PROFILE"):
+    configure(metrics=bool(os.environ.get("FEEDME_METRICS")),
+              profile=[x.strip() for x in os.environ.get("FEEDME_PROFILE", "").split(",") if x.strip()],
+              profile_mode=os.environ.get("FEEDME_PROFILE_MODE", "cpu"),
+              profile_dir=os.environ.get("FEEDME_PROFILE_DIR", DEFAULT_PROFILE_DIR))
+    if os.environ.get("FEEDME_METRICS"):
+        atexit.register(write, os.environ["FEEDME_METRICS"])
@@ -0,0 +1,163 @@
+'''
+File:        load_test.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     AsyncIO
+             SubProcess
+             Signal
+             Socket
+             URLLib
+             ArgParse
+             Random
+             JSON
+             Time
+             Sys
+             OS
+
+Imported By: N/A
+
+This file measures how a running FeedMe server holds up under many users at
+once. It opens a number of keep-alive connections to the server, and each one
+sends requests back to back: a mix of searches, recipe details, nearest-store
+lookups and meal logging drawn at random. When all requests are answered it
+reports the throughput, the latency percentiles, any failed requests and the
+server's cache statistics. With --start it launches its own server on a free
+port first and stops it afterwards.
+
+Usage: python load_test.py [--start] [--port 8080] [--connections 32] [--requests 20000]
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+WORDS = ["chicken", "salad", "soup", "cake", "bread", "pasta", "beef", "rice", "cookies", "pie", "curry", "tacos"]
+INGREDIENTS = ["garlic", "butter", "eggs", "flour", "onion", "milk", "sugar", "olive oil", "chicken", "lemon"]
+
+# Function to draw one random request as a method, target and body
+def random_request(rng, recipes, users):
+    roll = rng.random()
+    if roll < 0.35:
+        query = {"name": rng.choice(WORDS)}
+        if rng.random() < 0.5:
+            query["max_calories"] = rng.choice([300, 500, 800])
+        return "GET", "/search?" + urlencode(query), None
+    elif roll < 0.45:
+        return "GET", "/search/name?" + urlencode({"name": rng.choice(WORDS)[:-1]}), None
+    elif roll < 0.55:
+        return "GET", "/search/ingredients?" + urlencode({"ingredients": ", ".join(rng.sample(INGREDIENTS, 2))}), None
+    elif roll < 0.75:
+        return "GET", "/recipes/" + str(rng.randrange(recipes)), None
+    elif roll < 0.95:
+        lat, lon = round(rng.uniform(40.35, 40.55), 3), round(rng.uniform(-80.10, -79.85), 3)
+        return "GET", "/stores/nearest?" + urlencode({"lat": lat, "lon": lon}), None
+    return "POST", "/users/" + rng.choice(users) + "/meals", json.dumps({"index": rng.randrange(recipes)}).encode("utf-8")
+
+# Function to send one request over an open connection and read the whole answer
+async def send(reader, writer, host, method, target, body=None):
+    body = body or b""
+    writer.write(f'{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n'.encode("latin-1") + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+# Function to run one connection's share of the requests, recording each latency
+async def client(host, port, count, rng, recipes, users, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            method, target, body = random_request(rng, recipes, users)
+            start = time.perf_counter()
+            status, _ = await send(reader, writer, host, method, target, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append((status, method, target))
+    finally:
+        writer.close()
+
+# Function to get the value below which a share of the sorted samples fall
+def percentile(samples, share):
+    return samples[min(len(samples) - 1, int(share * len(samples)))]
+
+async def run(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, stats = await send(reader, writer, args.host, "GET", "/stats")
+    recipes = json.loads(stats)["recipes"]
+    users = ["loadtest" + str(i) for i in range(args.users)]
+    for user in users:
+        body = json.dumps({"weight": 70, "height": 175, "age": 30, "gender": "male"}).encode("utf-8")
+        await send(reader, writer, args.host, "POST", "/users/" + user + "/profile", body)
+
+    latencies, failures = [], []
+    per_client = [args.requests // args.connections + (i < args.requests % args.connections) for i in range(args.connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*[client(args.host, args.port, count, random.Random(args.seed + i), recipes, users, latencies, failures)
+                           for i, count in enumerate(per_client)])
+    elapsed = time.perf_counter() - start
+
+    _, stats = await send(reader, writer, args.host, "GET", "/stats")
+    writer.close()
+    latencies.sort()
+    print(f'{len(latencies)} requests over {args.connections} connections in {elapsed:.2f} s '
+          f'({len(latencies) / elapsed:.0f} requests/s)')
+    for name, share in [("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p99.9", 0.999)]:
+        print(f'{name:>6}: {percentile(latencies, share) * 1000:7.2f} ms')
+    print(f'{"max":>6}: {latencies[-1] * 1000:7.2f} ms')
+    print("Failed requests:", len(failures))
+    for failure in failures[:5]:
+        print("   ", *failure)
+    print("Server:", stats.decode("utf-8"))
+
+# Function to launch a server on a free port and wait until it is listening
+def start_server(args):
+    with socket.socket() as s:
+        s.bind((args.host, 0))
+        args.port = s.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.realpath(__file__)), "feedme_server.py")
+    server = subprocess.Popen([sys.executable, script, "--host", args.host, "--port", str(args.port), "--database", args.database],
+                              stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a FeedMe server on this machine.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--start", action="store_true", help="start a server on a free port for the test")
+    parser.add_argument("--database", default="feedme.db", help="user database for a server started with --start")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=8, help="number of users logging meals")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args) if args.start else None
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            # An interrupt lets the server write its queued meals before it stops
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+if __name__ == "__main__":
+    main()
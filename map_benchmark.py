@@ -0,0 +1,72 @@
+'''
+File:        map_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     store_map.py
+             NumPy
+             Pandas
+             ArgParse
+             Time
+             OS
+             TempFile
+
+Imported By: N/A
+
+This file compares the time to build and save the supermarket map, and the
+size of the saved page, for the per-marker renderer and the clustered
+renderer on synthetic store tables of increasing size.
+
+Usage: python map_benchmark.py [--sizes 670 5000 50000] [--marker-limit 20000]
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import store_map
+
+# Function to build a synthetic store table around Pittsburgh
+def synthetic_stores(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Name": ["Store #" + str(i) for i in range(rows)],
+        "Lat": rng.normal(40.44, 0.3, rows),
+        "Lon": rng.normal(-79.99, 0.4, rows),
+        "Category": rng.choice(["Supermarket", "Convenience Store"], rows, p=[0.25, 0.75])
+    })
+
+# Function to render and save a map, returning the seconds taken and the file size
+def measure(render, directory):
+    file = os.path.join(directory, "map.html")
+    start = time.perf_counter()
+    render().save(file)
+    return time.perf_counter() - start, os.path.getsize(file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-marker and clustered map rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[670, 5000, 50000])
+    parser.add_argument("--marker-limit", type=int, default=20000, help="largest table to draw one marker per store")
+    args = parser.parse_args()
+
+    print(f'{"stores":>8} {"renderer":>10} {"seconds":>9} {"KB":>10}')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            stores = synthetic_stores(size)
+            runs = [("clustered", lambda: store_map.render_clustered(stores)),
+                    ("nearby", lambda: store_map.render_clustered(stores, [40.44, -79.99], store_map.NEARBY_RADIUS_KM))]
+            if size <= args.marker_limit:
+                runs.insert(0, ("markers", lambda: store_map.render_markers(stores)))
+            for label, render in runs:
+                seconds, size_bytes = measure(render, directory)
+                print(f'{size:>8} {label:>10} {seconds:>9.3f} {size_bytes / 1024:>10.1f}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+'''
+File:        meal_planner.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     NumPy
+
+Imported By: catalogue.py
+             planner_benchmark.py
+
+This file plans a day of meals that fills a calorie budget while keeping fat,
+carbohydrate and protein close to their targets. A plan is a set of recipes,
+one per meal, whose calories add up to at most the budget, and it is scored by
+the calories left unused plus each macronutrient's distance from its target,
+each as a share of its target.
+
+The search is a knapsack over calorie buckets: the budget is split into a fixed
+number of buckets, and the table holds, for every number of meals and every
+bucket, the few best partial plans found so far, updated one recipe at a time
+with whole-table NumPy operations. The table minimises each meal's distance
+from an even share of the targets, which adds up meal by meal and is never
+below the distance of the plan as a whole, and the finished plans are then
+ranked by their true score. Only the best few recipes of each calorie bucket
+can be part of a best plan, so the rest are dropped before the search, which
+keeps the table's work the same however large the catalogue is. The best plans
+from the table are then improved by swapping one recipe at a time for the
+replacement, out of a wider selection of each bucket's best recipes, that most
+improves the true score. A week is planned one day at a time, without repeating
+a recipe.
+'''
+
+import numpy as np
+
+MACROS = ["fat", "carbs", "protein"]
+# Share of calories from each macronutrient and the calories in one gram of it
+MACRO_SPLIT = {"fat": 0.30, "carbs": 0.50, "protein": 0.20}
+CALORIES_PER_GRAM = {"fat": 9, "carbs": 4, "protein": 4}
+RESOLUTION = 100
+BEAM = 4
+SWAP_POOL = 16
+
+# Function to get the grams of fat, carbs and protein that make up a calorie budget
+def macro_targets(budget):
+    return {x: budget * MACRO_SPLIT[x] / CALORIES_PER_GRAM[x] for x in MACROS}
+
+# Class to find the meal plans that best fill a calorie budget
+class MealPlanner:
+    def __init__(self, store, resolution=RESOLUTION, beam=BEAM):
+        self.store = store
+        self.resolution = resolution
+        self.beam = beam
+        self.calories = store.frame["calories"].to_numpy(dtype=np.float64)
+        self.macros = store.frame[MACROS].to_numpy(dtype=np.float64)
+
+    # Function to score whole plans, given their total calories and macros, lower being better
+    def _score(self, budget, targets, calories, macros):
+        return (budget - calories) / budget + (np.abs(macros - targets) / targets).sum(axis=-1)
+
+    # Function to find the best plans of a number of meals within a calorie budget
+    def plan(self, budget, meals=3, targets=None, plans=5, exclude=()):
+        if budget <= 0 or meals <= 0:
+            return []
+        targets = targets or macro_targets(budget)
+        targets = np.maximum(np.array([targets[x] for x in MACROS], dtype=np.float64), 1.0)
+
+        # Each meal is scored against an even share of the day; the shares add up to a bound on the day's score
+        width = budget / self.resolution
+        weights = np.ceil(self.calories / width).astype(np.int64)
+        costs = (budget / meals - self.calories) / budget + (np.abs(self.macros - targets / meals) / targets).sum(axis=1)
+        usable = (self.calories > 0) & (weights <= self.resolution)
+        usable[list(exclude)] = False
+
+        # Only the best few recipes of each calorie bucket can be part of a best plan
+        items = np.flatnonzero(usable)
+        items = items[np.lexsort((costs[items], weights[items]))]
+        rank = np.arange(len(items)) - np.searchsorted(weights[items], weights[items])
+        # Swaps are looked for among at least the recipes the search uses, so every plan it finds is in the pool
+        pool = np.sort(items[rank < meals * max(SWAP_POOL, self.beam)])
+        items = items[rank < meals * self.beam]
+
+        # best[j, c] holds the lowest costs of j meals filling c buckets, and chosen the recipes behind them
+        size, beam = self.resolution + 1, self.beam
+        best = np.full((meals + 1, size, beam), np.inf)
+        best[0, 0, 0] = 0.0
+        chosen = np.full((meals + 1, size, beam, meals), -1, dtype=np.int64)
+        layers = np.arange(meals)
+        for item in items.tolist():
+            w = weights[item]
+            if w >= size:
+                continue
+            added = best[:meals, :size - w] + costs[item]
+            added_chosen = chosen[:meals, :size - w].copy()
+            added_chosen[layers, :, :, layers] = item
+            merged = np.concatenate([best[1:, w:], added], axis=2)
+            merged_chosen = np.concatenate([chosen[1:, w:], added_chosen], axis=2)
+            keep = np.argsort(merged, axis=2, kind="stable")[:, :, :beam]
+            best[1:, w:] = np.take_along_axis(merged, keep, axis=2)
+            chosen[1:, w:] = np.take_along_axis(merged_chosen, keep[..., None], axis=2)
+
+        # Finished plans are ranked by their true score, and the best of them improved by swapping recipes
+        found = np.isfinite(best[meals]).ravel()
+        candidates = chosen[meals].reshape(-1, meals)[found]
+        if len(candidates) == 0:
+            return []
+        scores = self._score(budget, targets, self.calories[candidates].sum(axis=1), self.macros[candidates].sum(axis=1))
+        improved = {}
+        for i in np.argsort(scores, kind="stable")[:plans * 2]:
+            recipes = candidates[i].tolist()
+            # Plans kept as found still fill the list when several improve to the same plan
+            improved.setdefault(tuple(sorted(recipes)), recipes)
+            recipes = self._improve(budget, targets, recipes, pool)
+            improved[tuple(sorted(recipes))] = recipes
+
+        found = []
+        for recipes in improved.values():
+            recipes = sorted(recipes, key=lambda x: -self.calories[x])
+            calories, macros = self.calories[recipes].sum(), self.macros[recipes].sum(axis=0)
+            found.append({"recipes": recipes, "calories": int(calories),
+                          "fat": int(macros[0]), "carbs": int(macros[1]), "protein": int(macros[2]),
+                          "score": round(float(self._score(budget, targets, calories, macros)), 4)})
+        found.sort(key=lambda x: x["score"])
+        return found[:plans]
+
+    # Function to keep replacing the one recipe of a plan whose replacement most improves it
+    def _improve(self, budget, targets, recipes, pool):
+        calories, shares = self.calories[pool], self.macros[pool] / targets
+        score = self._score(budget, targets, self.calories[recipes].sum(), self.macros[recipes].sum(axis=0))
+        while True:
+            best = (score, None, None)
+            taken = np.zeros(len(pool), dtype=bool)
+            taken[np.searchsorted(pool, recipes)] = True
+            for slot in range(len(recipes)):
+                rest = recipes[:slot] + recipes[slot + 1:]
+                total = self.calories[rest].sum() + calories
+                scores = (budget - total) / budget + np.abs(shares + (self.macros[rest].sum(axis=0) / targets - 1)).sum(axis=1)
+                scores[(total > budget) | taken] = np.inf
+                j = int(np.argmin(scores))
+                if scores[j] < best[0] - 1e-9:
+                    best = (scores[j], slot, int(pool[j]))
+            if best[1] is None:
+                return recipes
+            score, recipes = best[0], recipes[:best[1]] + [best[2]] + recipes[best[1] + 1:]
+
+    # Function to plan several days in turn, using each recipe at most once, with targets found from each day's budget
+    def plan_days(self, budgets, meals=3, targets=macro_targets, exclude=()):
+        used = set(exclude)
+        days = []
+        for budget in budgets:
+            found = self.plan(budget, meals, targets(budget), plans=1, exclude=used)
+            days.append(found[0] if found else None)
+            if found:
+                used.update(found[0]["recipes"])
+        return days
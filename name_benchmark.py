@@ -0,0 +1,83 @@
+'''
+File:        name_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     name_index.py
+             search_benchmark.py
+             NumPy
+             ArgParse
+             Time
+
+Imported By: N/A
+
+This file measures fuzzy and prefix name lookups on a synthetic list of recipe
+names, including the time to save and reload the index.
+
+Usage: python name_benchmark.py [--rows 100000] [--queries 1000]
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import name_index
+from search_benchmark import WORDS
+
+# Function to time a list of queries, returning the mean latency in milliseconds
+def mean_latency(call, queries):
+    start = time.perf_counter()
+    for query in queries:
+        call(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Time fuzzy and prefix name lookups.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Names draw on made-up words with English letter frequencies and a long-tailed (Zipf)
+    # word frequency, like real titles
+    rng = np.random.default_rng(0)
+    letters = np.array(list("etaoinshrdlcumwfgypbvkjxqz"))
+    frequency = np.array([12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4,
+                          2.2, 2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1])
+    made_up = ["".join(rng.choice(letters, size=rng.integers(4, 10), p=frequency / frequency.sum())) for _ in range(30000)]
+    vocabulary = list(dict.fromkeys(WORDS + made_up))
+    weights = 1 / np.arange(1, len(vocabulary) + 1)
+    picks = rng.choice(len(vocabulary), size=(args.rows, 4), p=weights / weights.sum())
+    names = [" ".join(vocabulary[j] for j in x).title() for x in picks]
+
+    start = time.perf_counter()
+    index = name_index.NameIndex.build(names)
+    print("Build:", args.rows, "names in", round(time.perf_counter() - start, 2), "s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "names.npz")
+        index.save(file)
+        start = time.perf_counter()
+        index = name_index.NameIndex.load(file)
+        print("Load:", round((time.perf_counter() - start) * 1000, 2), "ms")
+
+    # Misspell a word by dropping one letter, and type the first few letters of another
+    typos = []
+    prefixes = []
+    for x in rng.integers(0, args.rows, size=args.queries):
+        words = names[x].lower().split()[:2]
+        cut = int(rng.integers(1, len(words[0])))
+        typos.append(" ".join([words[0][:cut] + words[0][cut + 1:]] + words[1:]))
+        prefixes.append(" ".join(words[:-1] + [words[-1][:3]]))
+
+    print("Fuzzy:", round(mean_latency(lambda x: index.fuzzy(x), typos), 3), "ms per query")
+    print("Prefix:", round(mean_latency(lambda x: index.complete(x), prefixes), 3), "ms per query")
+    print("Example:", typos[0], "->", [index.names[i] for i, _ in index.fuzzy(typos[0], limit=3)])
+
+if __name__ == "__main__":
+    main()
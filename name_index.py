@@ -0,0 +1,229 @@
+'''
+File:        name_index.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             NumPy
+             Bisect
+             Regex
+             OS
+
+Imported By: catalogue.py
+             name_benchmark.py
+
+This file indexes recipe names for typo-tolerant and type-ahead search. Every
+distinct word used in a name is broken into padded three-letter pieces
+(trigrams), and the index maps each trigram to the words containing it, so a
+misspelled query word still shares most of its trigrams with the word it was
+meant to be. Matched words are then mapped to the names that use them. A sorted
+word list answers prefix completion. The index is stored as flat NumPy arrays
+and saved next to the recipe snapshot so it is not rebuilt on every launch.
+'''
+
+import bisect
+import os
+import re
+
+import numpy as np
+
+import recipe_store
+
+INDEX_FILE = "name_index.npz"
+MIN_SIMILARITY = 0.5
+
+# Function to split a name into lowercase words
+def _words(text):
+    return re.findall(r"[^\W_]+", text.lower())
+
+# Function to get the form of a name used for prefix matching
+def _key(text):
+    return " ".join(_words(text))
+
+# Function to get the set of padded trigrams of every word in a text
+def trigrams(text):
+    grams = set()
+    for word in _words(text):
+        padded = "  " + word + " "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+# Function to store a list of lists of integers as flat values and offsets
+def _csr(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(x) for x in lists])
+    values = np.fromiter((y for x in lists for y in x), dtype=np.int32, count=int(offsets[-1]))
+    return values, offsets
+
+# Class to answer fuzzy and prefix searches over recipe names
+class NameIndex:
+    def __init__(self, names, order, words, word_values, word_offsets, grams, gram_values, gram_offsets, gram_counts, stamp=None):
+        self.names = list(names)
+        self.order = order
+        self.words = list(words)
+        self.word_values = word_values
+        self.word_offsets = word_offsets
+        self.grams = {x: i for i, x in enumerate(grams)}
+        self.gram_values = gram_values
+        self.gram_offsets = gram_offsets
+        self.gram_counts = gram_counts
+        self.stamp = stamp
+        self.lengths = np.fromiter((len(x) for x in self.names), dtype=np.int32, count=len(self.names))
+
+    # Function to build the index from a list of names
+    @classmethod
+    def build(cls, names, stamp=None):
+        word_postings = {}
+        for i, name in enumerate(names):
+            for word in set(_words(name)):
+                word_postings.setdefault(word, []).append(i)
+        words = sorted(word_postings)
+        keys = [_key(x) for x in names]
+        order = np.array(sorted(range(len(names)), key=keys.__getitem__), dtype=np.int32)
+
+        # Trigrams are taken over the distinct words, which are far fewer than the names
+        gram_postings = {}
+        gram_counts = np.zeros(len(words), dtype=np.int32)
+        for i, word in enumerate(words):
+            grams = trigrams(word)
+            gram_counts[i] = len(grams)
+            for gram in grams:
+                gram_postings.setdefault(gram, []).append(i)
+        grams = sorted(gram_postings)
+
+        word_values, word_offsets = _csr([word_postings[x] for x in words])
+        gram_values, gram_offsets = _csr([gram_postings[x] for x in grams])
+        return cls(names, order, words, word_values, word_offsets, grams, gram_values, gram_offsets, gram_counts, stamp)
+
+    # Function to find the indexed words most similar to a possibly misspelled word
+    def similar_words(self, word, limit=50, min_similarity=MIN_SIMILARITY):
+        query_grams = trigrams(word)
+        ids = [self.grams[x] for x in query_grams if x in self.grams]
+        if not ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        hits = np.concatenate([self.gram_values[self.gram_offsets[x]:self.gram_offsets[x + 1]] for x in ids])
+        shared = np.bincount(hits, minlength=len(self.words))
+        candidates = np.flatnonzero(shared >= min_similarity * len(query_grams))
+        common = shared[candidates]
+        # Rank by the share of the query found in the word, then by overall overlap
+        coverage = common / len(query_grams)
+        jaccard = common / (len(query_grams) + self.gram_counts[candidates] - common)
+        score = coverage + jaccard / 1000
+        if len(score) > limit:
+            top = np.argpartition(-score, limit)[:limit]
+            candidates, coverage, score = candidates[top], coverage[top], score[top]
+        return candidates, coverage
+
+    # Function to find names similar to a possibly misspelled query, best matches first
+    def fuzzy(self, query, limit=20, min_similarity=MIN_SIMILARITY):
+        query_words = _words(query)
+        if not query_words or not self.names:
+            return []
+
+        # Each name scores the best match it contains for every query word
+        total = np.zeros(len(self.names))
+        best = np.zeros(len(self.names))
+        for word in query_words:
+            candidates, coverage = self.similar_words(word, min_similarity=min_similarity)
+            best[:] = 0
+            for i in np.argsort(coverage, kind="stable"):
+                best[self.word_values[self.word_offsets[candidates[i]]:self.word_offsets[candidates[i] + 1]]] = coverage[i]
+            total += best
+        total /= len(query_words)
+
+        matches = np.flatnonzero(total >= min_similarity)
+        if len(matches) == 0:
+            return []
+        # Shorter names win ties, since more of them is covered by the query
+        score = total[matches] - self.lengths[matches] / 1e6
+        if len(score) > limit:
+            top = np.argpartition(-score, limit)[:limit]
+            matches, score = matches[top], score[top]
+        order = np.argsort(-score, kind="stable")
+        return [(int(matches[i]), float(total[matches[i]])) for i in order]
+
+    # Function to get the recipes whose words start with a prefix
+    def _word_matches(self, prefix, whole=False):
+        start = bisect.bisect_left(self.words, prefix)
+        end = start + 1 if whole else bisect.bisect_left(self.words, prefix + "\uffff")
+        if start >= end or (whole and self.words[start] != prefix):
+            return np.zeros(0, dtype=np.int32)
+        return self.word_values[self.word_offsets[start]:self.word_offsets[end]]
+
+    # Function to complete a partially typed name, names starting with it first
+    def complete(self, prefix, limit=10):
+        lowered = _key(prefix)
+        if not lowered:
+            return []
+
+        # Names that start with the typed text come first, shortest first
+        key = lambda x: _key(self.names[x])
+        start = bisect.bisect_left(self.order, lowered, key=key)
+        end = bisect.bisect_left(self.order, lowered + "\uffff", lo=start, key=key)
+        leading = self.order[start:end]
+        leading = leading[np.argsort(self.lengths[leading], kind="stable")][:limit]
+        if len(leading) >= limit:
+            return leading.tolist()
+
+        # Then names containing every typed word, the last of which may be partial
+        words = lowered.split(" ")
+        partial = np.zeros(len(self.names), dtype=bool)
+        partial[self._word_matches(words[-1])] = True
+        partial[leading] = False
+        if len(words) == 1:
+            matches = np.flatnonzero(partial)
+        else:
+            matches = self._word_matches(words[0], whole=True)
+            for word in words[1:-1]:
+                matches = np.intersect1d(matches, self._word_matches(word, whole=True), assume_unique=True)
+            matches = matches[partial[matches]]
+        if len(matches) > limit:
+            matches = matches[np.argpartition(self.lengths[matches], limit)[:limit]]
+        matches = matches[np.argsort(self.lengths[matches], kind="stable")]
+        return leading.tolist() + matches[:limit - len(leading)].tolist()
+
+    # Function to save the index as a NumPy archive
+    def save(self, file=INDEX_FILE):
+        separator = recipe_store.SEPARATOR
+        temp = file + ".tmp.npz"
+        np.savez(temp,
+                 names=np.array(separator.join(self.names)),
+                 name_count=np.array(len(self.names)),
+                 order=self.order,
+                 words=np.array(separator.join(self.words)),
+                 word_values=self.word_values,
+                 word_offsets=self.word_offsets,
+                 grams=np.array(separator.join(self.grams)),
+                 gram_values=self.gram_values,
+                 gram_offsets=self.gram_offsets,
+                 gram_counts=self.gram_counts,
+                 stamp=np.array(self.stamp if self.stamp is not None else [], dtype=np.float64))
+        os.replace(temp, file)
+
+    # Function to load an index saved by save
+    @classmethod
+    def load(cls, file=INDEX_FILE):
+        separator = recipe_store.SEPARATOR
+        with np.load(file, allow_pickle=False) as data:
+            names = str(data["names"]).split(separator) if int(data["name_count"]) else []
+            words = str(data["words"]).split(separator) if len(data["gram_counts"]) else []
+            grams = str(data["grams"]).split(separator) if len(data["gram_offsets"]) > 1 else []
+            return cls(names, data["order"], words, data["word_values"], data["word_offsets"], grams,
+                       data["gram_values"], data["gram_offsets"], data["gram_counts"],
+                       data["stamp"].tolist() or None)
+
+# Function to load the saved index, rebuilding it only if the recipe snapshot has changed
+def load_index(store, file=INDEX_FILE, snapshot=recipe_store.SNAPSHOT_FILE):
+    stamp = None
+    if os.path.isfile(snapshot):
+        stamp = [os.path.getmtime(snapshot), float(os.path.getsize(snapshot))]
+    if stamp is not None and os.path.isfile(file):
+        index = NameIndex.load(file)
+        if index.stamp == stamp and len(index.names) == len(store):
+            return index
+    index = NameIndex.build(store.frame["Name"].tolist(), stamp)
+    index.save(file)
+    return index
@@ -0,0 +1,116 @@
+'''
+File:        parse_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     fixture_site.py
+             recipe_scraper.py
+             well_scraper.py
+             ConcurrentFutures
+             ArgParse
+             Time
+             OS
+
+Imported By: N/A
+
+This file measures how long it takes to parse a corpus of saved recipe pages
+with the BeautifulSoup parsers, with the lxml parsers one page after another,
+and with the lxml parsers spread over a pool of worker processes, and checks
+that all three give exactly the same recipes. The corpus is a directory of
+pages named after the site they came from, such as allrecipes-12.html. Pages
+saved from the real websites can be put there; otherwise the directory is
+filled with fixture pages rendered from the saved CSV files, each padded with
+unrelated markup to about the size of a real recipe page.
+
+Usage: python parse_benchmark.py [--corpus parse_corpus] [--copies 5] [--padding 300] [--workers 4]
+'''
+
+import argparse
+import concurrent.futures
+import os
+import time
+
+import fixture_site
+import recipe_scraper
+import well_scraper
+
+SOUP_PARSERS = {"allrecipes": recipe_scraper.parse_allrecipes_soup, "eatingwell": well_scraper.parse_eatingwell_soup}
+LXML_PARSERS = {"allrecipes": recipe_scraper.parse_allrecipes, "eatingwell": well_scraper.parse_eatingwell}
+SAVED_FILES = {"allrecipes": "allrecipes_default.csv", "eatingwell": "eatingwell_default.csv"}
+
+# Function to build markup a recipe parser has to read past, standing in for a real page's menus and scripts
+def _padding(kilobytes):
+    block = ('<div class="mntl-nav"><ul>' + '<li><a href="/recipes/">Dinners</a></li>' * 10 + '</ul></div>\n'
+             '<script>window.dataLayer = window.dataLayer || []; dataLayer.push({"event": "pageview"});</script>\n')
+    return (block * (kilobytes * 1024 // len(block) + 1)).encode("utf-8")
+
+# Function to fill a corpus directory with padded fixture pages
+def build_corpus(directory, copies, padding):
+    os.makedirs(directory, exist_ok=True)
+    filler = _padding(padding)
+    for site, file in SAVED_FILES.items():
+        for i, page in enumerate(fixture_site.build_pages(file, site, copies).values()):
+            head, _, tail = page.partition(b"<body>")
+            with open(os.path.join(directory, site + "-" + str(i) + ".html"), "wb") as f:
+                f.write(head + b"<body>" + filler + tail + filler)
+
+# Function to read every page of a corpus as (site, content) pairs
+def load_corpus(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        site = name.split("-")[0]
+        if name.endswith(".html") and site in LXML_PARSERS:
+            with open(os.path.join(directory, name), "rb") as f:
+                pages.append((site, f.read()))
+    return pages
+
+# Function to parse a page with the parser for its site
+def parse_page(parsers, site, content):
+    return parsers[site](content)
+
+# Function to parse every page one after another
+def run_serial(parsers, pages):
+    return [parse_page(parsers, site, content) for site, content in pages]
+
+# Function to parse every page in a pool of worker processes
+def run_pool(parsers, pages, workers):
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(parse_page, [parsers] * len(pages), *zip(*pages), chunksize=8))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the BeautifulSoup and lxml recipe page parsers.")
+    parser.add_argument("--corpus", default="parse_corpus", help="directory of saved pages, filled with fixture pages if empty")
+    parser.add_argument("--copies", type=int, default=5, help="times to repeat the saved recipes when building the corpus")
+    parser.add_argument("--padding", type=int, default=300, help="kilobytes of unrelated markup around each fixture page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus) or not load_corpus(args.corpus):
+        build_corpus(args.corpus, args.copies, args.padding)
+    pages = load_corpus(args.corpus)
+
+    timings = {}
+    start = time.perf_counter()
+    soup_rows = run_serial(SOUP_PARSERS, pages)
+    timings["BeautifulSoup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lxml_rows = run_serial(LXML_PARSERS, pages)
+    timings["lxml"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool_rows = run_pool(LXML_PARSERS, pages, args.workers)
+    timings["lxml, " + str(args.workers) + " processes"] = time.perf_counter() - start
+
+    assert soup_rows == lxml_rows == pool_rows, "the parsers disagree on at least one page"
+    megabytes = sum(len(content) for _, content in pages) / 1e6
+    print("Pages:", len(pages), "(" + str(round(megabytes, 1)), "MB)")
+    for name, seconds in timings.items():
+        print(f'{name + ":":<22} {seconds:7.3f} s  {len(pages) / seconds:8.0f} pages/s  '
+              f'{timings["BeautifulSoup"] / seconds:5.1f}x')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+'''
+File:        planner_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     meal_planner.py
+             search_benchmark.py
+             NumPy
+             ArgParse
+             IterTools
+             Time
+
+Imported By: N/A
+
+This file measures the meal planner on synthetic catalogues. It times one-day
+plans of several sizes and a week of plans on a large catalogue, and on small
+catalogues it compares the planner's best score with the best score found by
+trying every combination of recipes.
+
+Usage: python planner_benchmark.py [--rows 50000] [--budget 2000] [--small-rows 40] [--trials 10]
+'''
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+import meal_planner
+import search_benchmark
+
+# Function to find the best score of any combination of recipes by trying them all
+def exhaustive_score(planner, budget, meals):
+    targets = meal_planner.macro_targets(budget)
+    targets = np.maximum(np.array([targets[x] for x in meal_planner.MACROS]), 1.0)
+    best = np.inf
+    for combination in itertools.combinations(range(len(planner.calories)), meals):
+        combination = list(combination)
+        calories = planner.calories[combination].sum()
+        if calories <= budget:
+            best = min(best, planner._score(budget, targets, calories, planner.macros[combination].sum(axis=0)))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the meal planner and check it against an exhaustive search.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--budget", type=float, default=2000)
+    parser.add_argument("--small-rows", type=int, default=40)
+    parser.add_argument("--trials", type=int, default=10)
+    args = parser.parse_args()
+
+    planner = meal_planner.MealPlanner(search_benchmark.synthetic_store(args.rows))
+    print(f'Catalogue of {args.rows} recipes, budget {args.budget:.0f} calories')
+    for meals in [2, 3, 4, 5]:
+        start = time.perf_counter()
+        plans = planner.plan(args.budget, meals)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f'{meals} meals: {elapsed:8.1f} ms, best score {plans[0]["score"]:.4f}, {plans[0]["calories"]} calories')
+    start = time.perf_counter()
+    week = planner.plan_days([args.budget] * 7, 3)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f'7 days of 3 meals: {elapsed:8.1f} ms, {sum(x is not None for x in week)} days planned')
+
+    gaps = []
+    for trial in range(args.trials):
+        small = meal_planner.MealPlanner(search_benchmark.synthetic_store(args.small_rows, seed=trial))
+        for meals in [3, 4]:
+            plans = small.plan(args.budget, meals, plans=1)
+            if plans:
+                gaps.append(plans[0]["score"] - exhaustive_score(small, args.budget, meals))
+    gaps = np.array(gaps)
+    print(f'\nAgainst an exhaustive search of {args.small_rows} recipes: best found in {np.mean(gaps < 1e-3):.0%} of '
+          f'{len(gaps)} plans, mean score gap {gaps.mean():.4f}, largest {gaps.max():.4f}')
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,225 @@
 '''
-File:        FeedMe.py
+File:        recipe_scraper.py
 
 Author(s):   Simon Corpuz (scorpuz)
              Bonnie Li (bonnieli)
              Suryaa Raman (ssuryaar)
              Yiyang Yao (yiyangya)
 
-Imports:     UrlLib
+Imports:     fetcher.py
+             recipe_sources.py
+             instrumentation.py
              BeautifulSoup
              Pandas
+             ConcurrentFutures
+             CSV
+             Math
+             Time
+             OS
 
-Imported By: FeedMe.py
+Imported By: feedme_core.py
+             well_scraper.py
+             crawler.py
+             parse_benchmark.py
 
 This file serves to download the recipe data from AllRecipes and convert it to
-a CSV format for the main application.
+a CSV format for the main application, and holds the download loop shared by
+every recipe source (see recipe_sources.py). When given an HTTP cache, only
+pages that changed since the last refresh are parsed and rewritten in the CSV.
+
+The BeautifulSoup parser is kept for comparison (see parse_benchmark.py). Long
+lists of pages are parsed in a pool of worker processes while the downloads
+continue. Rows are written to a temporary CSV as soon as they and every page
+listed before them are finished, so the whole table is never held in memory,
+and the temporary file replaces the old one once every page is done. A page
+that fails to parse keeps the row saved by the last refresh.
 '''
 
-from urllib.request import urlopen
 from bs4 import BeautifulSoup
 import pandas as pd
+import concurrent.futures
+import csv
+import math
+import os
+import time
+import fetcher
+import instrumentation
+import recipe_sources
+
+HTML_LIST = recipe_sources.ALLRECIPES.seed_urls
+
+RECIPE_COLUMNS = ["Name", "Time", "Nutrition", "Ingredients", "Directions", "URL"]
+PARALLEL_PAGES = 200
+
+# Function to parse a page in a worker process, returning the row and the seconds taken so they can be recorded here.
+# The worker's own timer only matters for profiling, which writes its profile from the worker; its histograms are dropped
+def _timed_parse(parse, page):
+    start = time.perf_counter()
+    with instrumentation.timer("parse_recipe"):
+        row = parse(page)
+    return row, time.perf_counter() - start
+
+# Function to extract a single recipe from an AllRecipes page
+parse_allrecipes = recipe_sources.ALLRECIPES.parse
+
+# Function to extract a single recipe from an AllRecipes page with BeautifulSoup, kept for comparison
+def parse_allrecipes_soup(page):
+    soup = BeautifulSoup(page, "lxml")
+    soup = soup.find("body")
+
+    # Recipe name
+    name = soup.find("h1").text
+
+    # Recipe time measurements
+    time = soup.find("div", {"class": "mm-recipes-details__content"}).text.strip().replace(":\n", ": ").split("\n")
+    time = [x for x in time if x != ""]
+
+    # Recipe nutrition facts
+    nutrition = soup.find("table", {"class": "mm-recipes-nutrition-facts-summary__table"}).text.strip().replace("\n\n", "|").replace("\n", " ").split("|")
+    nutrition = [" ".join(x.strip().split()) for x in nutrition if x != ""]
+
+    # Recipe ingredients
+    ingredients = soup.find("ul", {"class": "mm-recipes-structured-ingredients__list"}).text.strip().split("\n")
+    ingredients = [" ".join(x.strip().split()) for x in ingredients if x != ""]
+
+    # Recipe directions
+    directions = soup.find("div", {"id": "mm-recipes-steps__content_1-0"}).find_all("p", {"class": "comp mntl-sc-block mntl-sc-block-html"})
+    directions = [" ".join(x.text.strip().split()) for x in directions]
+
+    return {
+        "Name": name,
+        "Time": time,
+        "Nutrition": nutrition,
+        "Ingredients": ingredients,
+        "Directions": directions
+    }
+
+# Function to format one value as pandas' to_csv writes it
+def _cell(value):
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return str(value)
+
+# Class to write recipe rows to a temporary CSV in page order, replacing the real file on commit
+class RowWriter:
+    def __init__(self, file, html_list):
+        self.file = file
+        self.temp = file + ".tmp"
+        self.order = {url: i for i, url in enumerate(dict.fromkeys(html_list))}
+        # Rows that arrived before an earlier page was finished wait here
+        self.waiting = {}
+        self.next = 0
+        self.count = 0
+        self.out = open(self.temp, "wt", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.out, lineterminator="\n")
+        self.writer.writerow([""] + RECIPE_COLUMNS)
+
+    # Function to record a page's row, or None to leave it out, writing every row now in order
+    def put(self, url, row):
+        self.waiting[self.order[url]] = row
+        while self.next in self.waiting:
+            row = self.waiting.pop(self.next)
+            if row is not None:
+                self.writer.writerow([self.count] + [_cell(row.get(x, "")) for x in RECIPE_COLUMNS])
+                self.count += 1
+            self.next += 1
+
+    def commit(self):
+        self.out.close()
+        os.replace(self.temp, self.file)
+
+    def discard(self):
+        self.out.close()
+        os.remove(self.temp)
+
+# Function to download a list of recipe pages and merge the changed ones into a CSV
+def scrape_recipes(file, html_list, parse, engine=None, cache=None, workers=None):
+    # Rows saved by the previous refresh, keyed by the page they came from
+    saved = {}
+    if cache is not None and os.path.isfile(file):
+        existing = pd.read_csv(file, index_col=0)
+        if "URL" in existing.columns:
+            saved = {row["URL"]: row for row in existing.to_dict("records")}
+
+    kept = set()
+    changed = 0
+    headers_for = cache.conditional_headers if cache is not None else None
+    out = RowWriter(file, html_list)
+
+    # Function to keep the saved row of a page that could not be downloaded or parsed
+    def keep_saved(url):
+        if url in saved:
+            kept.add(url)
+        out.put(url, saved.get(url))
+
+    # Function to write a parsed page, given a finished parse job or the page to parse here
+    def accept(result, job=None):
+        nonlocal changed
+        try:
+            if job is not None:
+                row, seconds = job.result()
+                instrumentation.observe("parse_recipe", seconds)
+            else:
+                with instrumentation.timer("parse_recipe"):
+                    row = parse(result.content)
+        except Exception as e:
+            print("Failed to parse recipe:", result.url, e)
+            keep_saved(result.url)
+            return
+        row["URL"] = result.url
+        out.put(result.url, row)
+        kept.add(result.url)
+        changed += 1
+        if cache is not None:
+            cache.update(result, row)
+
+    # Long lists are parsed in other processes while this one keeps downloading
+    if workers is None:
+        workers = os.cpu_count() if len(html_list) >= PARALLEL_PAGES else 1
+    pool = concurrent.futures.ProcessPoolExecutor(workers) if workers > 1 else None
+    parsing = {}
+
+    # Pages are parsed as they arrive while the remaining downloads continue
+    own_engine = engine is None
+    engine = engine or fetcher.Fetcher()
+    try:
+        for result in engine.fetch_all(html_list, headers_for):
+            entry = cache.get(result.url) if cache is not None else None
+            if entry is not None and cache.is_unchanged(result) and (result.url in saved or "row" in entry):
+                out.put(result.url, saved.get(result.url) or entry["row"])
+                kept.add(result.url)
+                cache.update(result)
+            elif result.ok and pool is not None:
+                parsing[pool.submit(_timed_parse, parse, result.content)] = result
+            elif result.ok:
+                accept(result)
+            else:
+                print("Failed to download recipe:", result.url, result.error or result.status)
+                keep_saved(result.url)
+            for job in [x for x in parsing if x.done()]:
+                accept(parsing.pop(job), job)
+        for job in concurrent.futures.as_completed(parsing):
+            accept(parsing[job], job)
+    except BaseException:
+        out.discard()
+        raise
+    finally:
+        if own_engine:
+            engine.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    # Leave the file untouched when every page matched the saved copy
+    if changed == 0 and saved and kept == saved.keys():
+        out.discard()
+        return 0
+    out.commit()
+    return changed
+
+# Function to download a source's recipe pages, its hand-picked ones by default, into its CSV
+def download_source(source, file=None, html_list=None, engine=None, cache=None, workers=None):
+    return scrape_recipes(file or source.csv_file, html_list or source.seed_urls, source.parse, engine, cache, workers)
 
 # Function to download recipe data and convert to CSV
-def download_allrecipes(file="allrecipes_default.csv"):
-    html_list = ["https://www.allrecipes.com/chocolate-peanut-butter-protein-bars-recipe-8421618",      # Chocolate Peanut Butter Protein Bars
-                "https://www.allrecipes.com/recipe/214947/perfect-summer-fruit-salad/",                 # Perfect Summer Fruit Salad
-                "https://www.allrecipes.com/recipe/222352/jamies-sweet-and-easy-corn-on-the-cob/",      # Jamie's Sweet and Easy Corn on the Cob
-                "https://www.allrecipes.com/recipe/233531/quick-whole-wheat-chapati/",                  # Quick Whole Wheat Chapati
-                "https://www.allrecipes.com/recipe/13107/miso-soup/",                                   # Miso Soup
-                "https://www.allrecipes.com/recipe/57783/emilys-famous-hash-browns/",                   # Homemade Crispy Hash Browns
-                "https://www.allrecipes.com/recipe/13384/split-pea-soup/",                              # Split Pea Soup
-                "https://www.allrecipes.com/recipe/20963/oven-roasted-potatoes/",                       # Oven Roasted Potatoes
-                "https://www.allrecipes.com/recipe/8847/baked-honey-mustard-chicken/",                  # Baked Honey Mustard Chicken
-                "https://www.allrecipes.com/recipe/18465/gnocchi-i/"]                                   # Gnocchi
-
-    recipes = pd.DataFrame(columns = ["Name", "Time", "Nutrition", "Ingredients", "Directions"])
-
-    for html_x in html_list:
-        html = urlopen(html_x)
-        soup = BeautifulSoup(html.read(), "lxml")
-        soup = soup.find("body")
-
-        # Recipe name
-        name = soup.find("h1").text
-
-        # Recipe time measurements
-        time = soup.find("div", {"class": "mm-recipes-details__content"}).text.strip().replace(":\n", ": ").split("\n")
-        time = [x for x in time if x != ""]
-
-        # Recipe nutrition facts
-        nutrition = soup.find("table", {"class": "mm-recipes-nutrition-facts-summary__table"}).text.strip().replace("\n\n", "|").replace("\n", " ").split("|")
-        nutrition = [" ".join(x.strip().split()) for x in nutrition if x != ""]
-
-        # Recipe ingredients
-        ingredients = soup.find("ul", {"class": "mm-recipes-structured-ingredients__list"}).text.strip().split("\n")
-        ingredients = [" ".join(x.strip().split()) for x in ingredients if x != ""]
-
-        # Recipe directions
-        directions = soup.find("div", {"id": "mm-recipes-steps__content_1-0"}).find_all("p", {"class": "comp mntl-sc-block mntl-sc-block-html"})
-        directions = [" ".join(x.text.strip().split()) for x in directions]
-
-        new_recipe = pd.DataFrame({
-            "Name": [name],
-            "Time": [time],
-            "Nutrition": [nutrition],
-            "Ingredients": [ingredients],
-            "Directions": [directions]
-        })
-
-        recipes = recipes._append(new_recipe, ignore_index = True)
-
-    recipes.to_csv(file)
+def download_allrecipes(file="allrecipes_default.csv", html_list=HTML_LIST, engine=None, cache=None, workers=None):
+    return download_source(recipe_sources.ALLRECIPES, file, html_list, engine, cache, workers)
@@ -0,0 +1,292 @@
+'''
+File:        recipe_similarity.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             NumPy
+             Pandas
+             ZLib
+             OS
+
+Imported By: catalogue.py
+             similarity_benchmark.py
+
+This file finds recipes like a given recipe, and recipes to recommend from a
+set of favorites. Every recipe is described by a sparse TF-IDF vector over the
+products its ingredient lines were read as at import (see ingredient_parser.py)
+and a few nutrition bands, such as "under 200 calories" or "25 to 40 g of
+protein", which count for half as much as a product. A product used by few
+recipes says more about a recipe than salt does, so each term is weighted by
+its inverse document frequency, and the vectors are scaled to unit length so
+two recipes are compared by the cosine of their vectors.
+
+The vectors are kept as flat NumPy arrays in both row order (the terms of each
+recipe) and column order (the recipes using each term). A recipe's scores
+against the whole catalogue are found by gathering the columns of its terms
+and adding them up per recipe, and the scores of a batch of recipes are found
+in one pass the same way, which is a sparse matrix product done with array
+operations. The few terms found in many recipes, such as salt or the nutrition
+bands, would make up most of that work, so they are kept as a small dense
+block instead and scored for the whole batch with one matrix product.
+Recommendations score the catalogue against the sum of the favorites' vectors.
+
+The best few neighbours of each recipe are kept in a table that is saved next
+to the recipe snapshot and kept up to date incrementally. When the catalogue
+changes, only new and changed recipes are scored, in batches, their scores are
+merged into the neighbours of the recipes already in the table, and only the
+recipes whose neighbours were removed or changed are scored again. The weights
+of every term shift a little as recipes are added, so the whole table is
+rebuilt once the catalogue has grown or shrunk by a quarter since it was last
+built. Catalogues too large to score every recipe up front have the
+neighbours of their other recipes found when they are first asked for.
+'''
+
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import recipe_store
+
+INDEX_FILE = "recipe_neighbours.npz"
+NEIGHBOURS = 10
+# Nutrition bands: a recipe gets one term per nutrient, for the band its value falls in
+NUTRITION_BANDS = {
+    "calories": [200, 400, 600, 800],
+    "fat": [5, 15, 25, 40],
+    "carbs": [15, 30, 50, 75],
+    "protein": [5, 15, 25, 40]
+}
+NUTRITION_WEIGHT = 0.5
+# Terms in at least this share of recipes are scored as a dense block, up to a block of this many cells
+DENSE_SHARE = 0.01
+DENSE_CELLS = 1 << 25
+# Scores computed at once in a batch, as recipes times catalogue size, which bounds its memory
+BATCH_CELLS = 1 << 24
+# Catalogues up to this size have every recipe's neighbours found when the table is built
+PRECOMPUTE_LIMIT = 20000
+REBUILD_SHARE = 0.25
+
+# Function to gather the entries of chosen columns of a column-ordered matrix, returning their positions and column numbers
+def _gather(pointers, columns):
+    starts = pointers[columns]
+    counts = pointers[columns + 1] - starts
+    first = np.cumsum(counts) - counts
+    entries = np.repeat(starts - first, counts) + np.arange(counts.sum())
+    return entries, np.repeat(np.arange(len(columns)), counts)
+
+# Function to keep the k best scores of each row, best first, marking missing neighbours with -1
+def _top(scores, k):
+    k = min(k, scores.shape[1])
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k else np.zeros((len(scores), 0), dtype=np.int64)
+    values = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    best, values = np.take_along_axis(best, order, axis=1), np.take_along_axis(values, order, axis=1)
+    best[values <= 0] = -1
+    return best, np.maximum(values, 0)
+
+# Function to key recipes by ID and by their order among recipes with the same ID
+def _keys(ids):
+    return pd.MultiIndex.from_arrays([ids, pd.Series(ids).groupby(ids).cumcount().to_numpy()])
+
+# Class to score recipes against each other by the cosine of their TF-IDF vectors
+class RecipeSimilarity:
+    def __init__(self, store, neighbours=NEIGHBOURS):
+        self.store = store
+        self.k = neighbours
+        count = len(store)
+        parsed = store.parsed_ingredients()
+
+        # Terms are the products, numbered as at import, and then each band of each nutrient
+        names = list(parsed["items"])
+        lines = store.lists["Ingredients"].offsets
+        rows = [np.repeat(np.arange(count), np.diff(lines))]
+        terms = [parsed["item"].astype(np.int64)]
+        weights = [np.ones(len(terms[0]))]
+        if "" in names:
+            keep = terms[0] != names.index("")
+            rows[0], terms[0], weights[0] = rows[0][keep], terms[0][keep], weights[0][keep]
+        for nutrient, bounds in NUTRITION_BANDS.items():
+            values = store.frame[nutrient].to_numpy()
+            known = np.flatnonzero(values > 0)
+            rows.append(known)
+            terms.append(len(names) + np.searchsorted(bounds, values[known], side="right"))
+            weights.append(np.full(len(known), NUTRITION_WEIGHT))
+            names += [nutrient + ":" + str(x) for x in range(len(bounds) + 1)]
+
+        # A product listed twice in one recipe counts once
+        keys, first = np.unique(np.concatenate(rows) * len(names) + np.concatenate(terms), return_index=True)
+        rows, terms = keys // len(names), keys % len(names)
+        weights = np.concatenate(weights)[first]
+        frequency = np.bincount(terms, minlength=len(names))
+        weights = weights * (np.log((1 + count) / (1 + frequency[terms])) + 1)
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=count))
+        weights = weights / np.where(norms > 0, norms, 1)[rows]
+
+        self.names = names
+        self.row_pointers = np.zeros(count + 1, dtype=np.int64)
+        self.row_pointers[1:] = np.cumsum(np.bincount(rows, minlength=count))
+        self.row_terms, self.row_weights = terms.astype(np.int32), weights.astype(np.float32)
+
+        # The most common terms make up most of the work of a sparse product, so they are kept as a dense block
+        dense = np.flatnonzero(frequency >= max(1, DENSE_SHARE * count))
+        dense = dense[np.argsort(-frequency[dense], kind="stable")][:DENSE_CELLS // max(1, count)]
+        self.dense_slots = np.full(len(names), -1, dtype=np.int64)
+        self.dense_slots[dense] = np.arange(len(dense))
+        slots = self.dense_slots[terms]
+        self.dense = np.zeros((count, len(dense)), dtype=np.float32)
+        self.dense[rows[slots >= 0], slots[slots >= 0]] = weights[slots >= 0]
+        sparse = np.flatnonzero(slots < 0)
+        order = sparse[np.argsort(terms[sparse], kind="stable")]
+        self.column_pointers = np.zeros(len(names) + 1, dtype=np.int64)
+        self.column_pointers[1:] = np.cumsum(np.bincount(terms[sparse], minlength=len(names)))
+        self.column_rows, self.column_weights = rows[order].astype(np.int32), weights[order].astype(np.float32)
+
+        # A recipe's fingerprint changes when its terms do, so the saved table can tell which recipes changed
+        hashes = np.array([zlib.crc32(x.encode("utf-8")) for x in names], dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        sums = np.zeros(len(terms) + 1, dtype=np.uint64)
+        sums[1:] = np.cumsum(hashes[terms], dtype=np.uint64)
+        self.fingerprints = sums[self.row_pointers[1:]] - sums[self.row_pointers[:-1]]
+
+        self.neighbours = np.full((count, self.k), -1, dtype=np.int32)
+        self.scores = np.zeros((count, self.k), dtype=np.float32)
+        self.computed = np.zeros(count, dtype=bool)
+
+    def __len__(self):
+        return len(self.row_pointers) - 1
+
+    # Function to score a batch of query vectors, given as rows of terms and weights, against every recipe
+    def _score(self, query_pointers, query_terms, query_weights):
+        queries = len(query_pointers) - 1
+        query_rows = np.repeat(np.arange(queries), np.diff(query_pointers))
+        entries, term = _gather(self.column_pointers, query_terms)
+        keys = query_rows[term] * len(self) + self.column_rows[entries]
+        products = self.column_weights[entries] * query_weights[term]
+        scores = np.bincount(keys, weights=products, minlength=queries * len(self)).astype(np.float64, copy=False)
+        scores = scores.reshape(queries, len(self))
+        # The common terms are scored for the whole batch as one matrix product
+        slots = self.dense_slots[query_terms]
+        block = np.zeros((queries, self.dense.shape[1]), dtype=np.float32)
+        block[query_rows[slots >= 0], slots[slots >= 0]] = query_weights[slots >= 0]
+        scores += block @ self.dense.T
+        return scores
+
+    # Function to score recipes given by position against every recipe, as one batched product
+    def score(self, indexes):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        entries, query = _gather(self.row_pointers, indexes)
+        pointers = np.zeros(len(indexes) + 1, dtype=np.int64)
+        pointers[1:] = np.cumsum(np.bincount(query, minlength=len(indexes)))
+        return self._score(pointers, self.row_terms[entries], self.row_weights[entries])
+
+    # Function to find and keep the neighbours of recipes, and merge them into the neighbours kept for others
+    def update(self, indexes, merge=()):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        merge = np.isin(indexes, np.asarray(merge, dtype=np.int64))
+        previous = np.flatnonzero(self.computed & ~np.isin(np.arange(len(self)), indexes))
+        batch = max(1, BATCH_CELLS // max(1, len(self)))
+        for start in range(0, len(indexes), batch):
+            chosen = indexes[start:start + batch]
+            scores = self.score(chosen)
+            scores[np.arange(len(chosen)), chosen] = 0
+            self.neighbours[chosen], self.scores[chosen] = _top(scores, self.k)
+            self.computed[chosen] = True
+
+            # New recipes may be closer to a recipe already in the table than its kept neighbours
+            added = np.flatnonzero(merge[start:start + batch])
+            if len(added) and len(previous):
+                candidates = scores[added][:, previous].T
+                worst = np.where(self.neighbours[previous, -1] >= 0, self.scores[previous, -1], 0)
+                closer = candidates.max(axis=1) > worst
+                rows = previous[closer]
+                pool = np.concatenate([self.scores[rows], candidates[closer]], axis=1)
+                ids = np.concatenate([self.neighbours[rows], np.broadcast_to(chosen[added], (len(rows), len(added)))], axis=1)
+                best, values = _top(np.where(ids >= 0, pool, 0), self.k)
+                self.neighbours[rows] = np.where(best >= 0, np.take_along_axis(ids, np.maximum(best, 0), axis=1), -1)
+                self.scores[rows] = values
+
+    # Function to get the recipes most like a recipe, best first
+    def similar(self, index, k=NEIGHBOURS):
+        if k > self.k:
+            scores = self.score([index])
+            scores[0, index] = 0
+            best, _ = _top(scores, k)
+            return [int(x) for x in best[0] if x >= 0]
+        if not self.computed[index]:
+            self.update([index])
+        return [int(x) for x in self.neighbours[index, :k] if x >= 0]
+
+    # Function to get the recipes most like a set of recipes as a whole, leaving those recipes out
+    def recommend(self, indexes, k=NEIGHBOURS):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        if len(indexes) == 0:
+            return []
+        entries, _ = _gather(self.row_pointers, indexes)
+        profile = pd.Series(self.row_weights[entries]).groupby(self.row_terms[entries]).sum()
+        scores = self._score(np.array([0, len(profile)]), profile.index.to_numpy(), profile.to_numpy())
+        scores[0, indexes] = 0
+        best, _ = _top(scores, k)
+        return [int(x) for x in best[0] if x >= 0]
+
+    # Function to save the neighbour table, with the ID and fingerprint of every recipe it refers to by position
+    def save(self, file=INDEX_FILE, stamp=None, built=None):
+        rows = np.flatnonzero(self.computed)
+        temp = file + ".tmp.npz"
+        np.savez(temp,
+                 ids=self.store.frame["ID"].to_numpy(),
+                 fingerprints=self.fingerprints,
+                 rows=rows,
+                 neighbours=self.neighbours[rows],
+                 scores=self.scores[rows],
+                 built=np.array(len(self) if built is None else built),
+                 stamp=np.array(stamp if stamp is not None else [], dtype=np.float64))
+        os.replace(temp, file)
+
+    # Function to take in a saved neighbour table, returning the recipes to score again and the new or changed ones
+    def restore(self, data):
+        # Saved positions are matched to current ones by ID, and by order among recipes sharing an ID
+        current = _keys(self.store.frame["ID"].to_numpy()).get_indexer(_keys(data["ids"]))
+        unchanged = np.zeros(len(self), dtype=bool)
+        found = current >= 0
+        unchanged[current[found][data["fingerprints"][found] == self.fingerprints[current[found]]]] = True
+
+        rows = current[data["rows"]]
+        neighbours = data["neighbours"]
+        positions = np.where(neighbours >= 0, current[np.maximum(neighbours, 0)], -1)
+        kept = (rows >= 0) & unchanged[np.maximum(rows, 0)]
+        # A row is only still right if every neighbour it kept is still there unchanged
+        intact = kept & np.all((neighbours < 0) | ((positions >= 0) & unchanged[np.maximum(positions, 0)]), axis=1)
+        if neighbours.shape[1] != self.k:
+            intact[:] = False
+        self.neighbours[rows[intact]] = positions[intact]
+        self.scores[rows[intact]] = data["scores"][intact]
+        self.computed[rows[intact]] = True
+        fresh = np.flatnonzero(~unchanged)
+        return np.union1d(fresh, rows[kept & ~intact]), fresh
+
+# Function to load the saved neighbour table, updating it only for the recipes that changed
+def load_index(store, file=INDEX_FILE, snapshot=recipe_store.SNAPSHOT_FILE):
+    stamp = None
+    if os.path.isfile(snapshot):
+        stamp = [os.path.getmtime(snapshot), float(os.path.getsize(snapshot))]
+    similarity = RecipeSimilarity(store)
+    data = None
+    if os.path.isfile(file):
+        with np.load(file, allow_pickle=False) as saved:
+            data = {x: saved[x] for x in saved.files}
+    built = int(data["built"]) if data is not None else 0
+    if data is not None and abs(len(store) - built) <= REBUILD_SHARE * built:
+        changed, fresh = similarity.restore(data)
+        if not len(changed) and stamp is not None and data["stamp"].tolist() == stamp:
+            return similarity
+        similarity.update(changed, fresh)
+    else:
+        built = len(store)
+        similarity.update(np.arange(len(store)) if len(store) <= PRECOMPUTE_LIMIT else [])
+    similarity.save(file, stamp, built)
+    return similarity
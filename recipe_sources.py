@@ -0,0 +1,159 @@
+'''
+File:        recipe_sources.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     LXML
+             Regex
+
+Imported By: recipe_scraper.py
+             well_scraper.py
+             crawler.py
+
+This file describes each website recipes are taken from. A source knows how to
+read a recipe out of one of its pages and how to find its recipe pages: the
+sitemaps and category pages to start from, and which links lead to recipes and
+which to further category pages. Pages from both sites share the same markup
+for the name, times, nutrition facts and ingredients, so that part is read by
+the base class, and each site only names where its directions are. A new site
+is added by subclassing RecipeSource and listing it in SOURCES.
+
+Pages are parsed with lxml, and only the few elements a recipe needs are looked
+up, with XPath expressions compiled once.
+'''
+
+import re
+
+import lxml.html
+from lxml import etree
+
+# Function to build an XPath test for an element carrying a class
+def _has_class(name):
+    return "contains(concat(' ', normalize-space(@class), ' '), ' " + name + " ')"
+
+# Paths to the parts of a recipe page shared by every source, compiled once
+NAME_PATH = etree.XPath("(.//h1)[1]")
+TIME_PATH = etree.XPath("(.//div[" + _has_class("mm-recipes-details__content") + "])[1]")
+NUTRITION_PATH = etree.XPath("(.//table[" + _has_class("mm-recipes-nutrition-facts-summary__table") + "])[1]")
+INGREDIENTS_PATH = etree.XPath("(.//ul[" + _has_class("mm-recipes-structured-ingredients__list") + "])[1]")
+LINKS_PATH = etree.XPath("//a/@href")
+
+# Function to parse a page into its body element, reading undeclared bytes as UTF-8 as BeautifulSoup would guess
+def page_body(page):
+    if isinstance(page, bytes):
+        try:
+            page = page.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return lxml.html.fromstring(page).body
+
+# Function to get the text of the first element matching a path, as BeautifulSoup's .text would
+def _first_text(body, path):
+    return path(body)[0].text_content()
+
+# Function to extract the name, time, nutrition and ingredients shared by every source's pages
+def parse_common(body):
+    # Recipe name
+    name = _first_text(body, NAME_PATH)
+
+    # Recipe time measurements
+    time = _first_text(body, TIME_PATH).strip().replace(":\n", ": ").split("\n")
+    time = [x for x in time if x != ""]
+
+    # Recipe nutrition facts
+    nutrition = _first_text(body, NUTRITION_PATH).strip().replace("\n\n", "|").replace("\n", " ").split("|")
+    nutrition = [" ".join(x.strip().split()) for x in nutrition if x != ""]
+
+    # Recipe ingredients
+    ingredients = _first_text(body, INGREDIENTS_PATH).strip().split("\n")
+    ingredients = [" ".join(x.strip().split()) for x in ingredients if x != ""]
+
+    return {
+        "Name": name,
+        "Time": time,
+        "Nutrition": nutrition,
+        "Ingredients": ingredients
+    }
+
+# Class to describe one recipe website: where its recipes are and how to read them
+class RecipeSource:
+    name = None
+    # CSV file the catalogue reads this source's recipes from
+    csv_file = None
+    # Hand-picked recipe pages, scraped when no crawl has been run
+    seed_urls = []
+    # Sitemaps and category pages a crawl starts from
+    sitemaps = []
+    listings = []
+    # Patterns telling recipe pages and category pages apart among discovered links
+    recipe_pattern = None
+    listing_pattern = None
+    # Path to the paragraphs of the directions, compiled once
+    steps_path = None
+
+    def is_recipe(self, url):
+        return self.recipe_pattern.search(url) is not None
+
+    def is_listing(self, url):
+        return self.listing_pattern is not None and self.listing_pattern.search(url) is not None
+
+    # Function to extract a single recipe from one of this source's pages
+    def parse(self, page):
+        body = page_body(page)
+        recipe = parse_common(body)
+
+        # Recipe directions
+        directions = self.steps_path(body)
+        recipe["Directions"] = [" ".join(x.text_content().strip().split()) for x in directions]
+        return recipe
+
+    # Function to get every link on a category page
+    def links(self, page):
+        return [str(x) for x in LINKS_PATH(lxml.html.fromstring(page))]
+
+# Source for AllRecipes
+class AllRecipes(RecipeSource):
+    name = "allrecipes"
+    csv_file = "allrecipes.csv"
+    seed_urls = ["https://www.allrecipes.com/chocolate-peanut-butter-protein-bars-recipe-8421618",      # Chocolate Peanut Butter Protein Bars
+                "https://www.allrecipes.com/recipe/214947/perfect-summer-fruit-salad/",                 # Perfect Summer Fruit Salad
+                "https://www.allrecipes.com/recipe/222352/jamies-sweet-and-easy-corn-on-the-cob/",      # Jamie's Sweet and Easy Corn on the Cob
+                "https://www.allrecipes.com/recipe/233531/quick-whole-wheat-chapati/",                  # Quick Whole Wheat Chapati
+                "https://www.allrecipes.com/recipe/13107/miso-soup/",                                   # Miso Soup
+                "https://www.allrecipes.com/recipe/57783/emilys-famous-hash-browns/",                   # Homemade Crispy Hash Browns
+                "https://www.allrecipes.com/recipe/13384/split-pea-soup/",                              # Split Pea Soup
+                "https://www.allrecipes.com/recipe/20963/oven-roasted-potatoes/",                       # Oven Roasted Potatoes
+                "https://www.allrecipes.com/recipe/8847/baked-honey-mustard-chicken/",                  # Baked Honey Mustard Chicken
+                "https://www.allrecipes.com/recipe/18465/gnocchi-i/"]                                   # Gnocchi
+    sitemaps = ["https://www.allrecipes.com/sitemap.xml"]
+    listings = ["https://www.allrecipes.com/recipes/"]
+    recipe_pattern = re.compile(r"/recipe/\d+/[^/]+/?$|/[a-z0-9-]+-recipe-\d+/?$")
+    listing_pattern = re.compile(r"/recipes/(\d+/[^/]+/?)?$")
+    steps_path = etree.XPath("(.//div[@id='mm-recipes-steps__content_1-0'])[1]//p[@class='comp mntl-sc-block mntl-sc-block-html']")
+
+# Source for EatingWell
+class EatingWell(RecipeSource):
+    name = "eatingwell"
+    csv_file = "eatingwell.csv"
+    seed_urls = ["https://www.eatingwell.com/recipe/270291/mermaid-smoothie-bowl/",                     # Mermaid Smoothie Bowl
+                "https://www.eatingwell.com/recipe/272746/mascarpone-berries-toast/",                   # Mascarpone & Berries Toast
+                "https://www.eatingwell.com/recipe/8030933/egg-spinach-cheddar-breakfast-sandwich/",    # Egg, Spinach & Cheddar Breakfast Sandwich
+                "https://www.eatingwell.com/recipe/272745/apple-peanut-butter-toast/",                  # Apple & Peanut Butter Toast
+                "https://www.eatingwell.com/recipe/269844/vegan-superfood-grain-bowls/",                # Vegan Superfood Grain Bowls
+                "https://www.eatingwell.com/sauteed-corn-with-basil-shallots-8661227",                  # Sautéed Corn with Basil & Shallots
+                "https://www.eatingwell.com/cucumber-cream-cheese-roll-8660948",                        # Cucumber Cream Cheese Roll
+                "https://www.eatingwell.com/recipe/8052446/best-tomato-sandwich/",                      # The Best Tomato Sandwich to Make All Summer Long
+                "https://www.eatingwell.com/recipe/8069814/tomato-burrata-sandwich/",                   # Tomato & Burrata Sandwich
+                "https://www.eatingwell.com/recipe/262096/edamame-veggie-rice-bowl/"]                   # Edamame & Veggie Rice Bowl
+    sitemaps = ["https://www.eatingwell.com/sitemap.xml"]
+    listings = ["https://www.eatingwell.com/recipes/"]
+    recipe_pattern = re.compile(r"/recipe/\d+/[^/]+/?$|/[a-z0-9-]+-\d{7,}/?$")
+    listing_pattern = re.compile(r"/recipes/(\d+/[^/]+/?)?$")
+    steps_path = etree.XPath("(.//div[@id='mm-recipes-steps_1-0'])[1]/descendant::ol[1]//li")
+
+ALLRECIPES = AllRecipes()
+EATINGWELL = EatingWell()
+SOURCES = {x.name: x for x in [ALLRECIPES, EATINGWELL]}
@@ -0,0 +1,415 @@
+'''
+File:        recipe_store.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     ingredient_parser.py
+             instrumentation.py
+             Pandas
+             NumPy
+             Regex
+             AST
+             HashLib
+             JSON
+             MMap
+             OS
+
+Imported By: catalogue.py
+             ingredient_index.py
+             name_index.py
+             grocery_list.py
+             search_benchmark.py
+             catalogue_benchmark.py
+             recipe_similarity.py
+             similarity_benchmark.py
+             supply_benchmark.py
+
+This file holds the typed recipe catalogue. Recipes are parsed once, when the
+scraped CSV files are imported, into numeric columns (total minutes, calories,
+fat, carbs, protein and servings) and lists of strings for the time,
+nutrition, ingredient and direction entries. The catalogue can still be
+imported from and exported to the CSV format used by the scrapers. Each
+ingredient line is also read into an amount, the measure it is added up in and
+the product name at import, and these are kept in flat arrays lined up with the
+ingredient lists, so shopping lists can be added up without parsing any
+ingredient text. Product names and measures repeat across millions of lines, so
+they are kept as numbers into a list of the distinct ones. Every recipe has a
+stable ID, hashed from its URL, or from its name if it has no URL, so two
+recipes of the same name from different sites are told apart and a renamed
+recipe keeps its ID.
+
+The list entries and URLs are not kept as Python strings. Each field is packed
+into one block of UTF-8 text with arrays of where each recipe's entries start,
+and a recipe's entries are only decoded when they are asked for, such as when
+the recipe is shown. The catalogue is saved as a snapshot file of plain arrays
+that is memory-mapped when it is loaded, so opening it reads only the recipe
+names and the numeric columns, and the text of the other fields is paged in
+from disk by the operating system as it is used.
+'''
+
+import ast
+import hashlib
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import ingredient_parser
+import instrumentation
+
+LIST_FIELDS = ["Time", "Nutrition", "Ingredients", "Directions"]
+NUMERIC_FIELDS = ["total_minutes", "calories", "fat", "carbs", "protein", "servings"]
+DEFAULT_CSV_FILES = ["allrecipes_default.csv", "eatingwell_default.csv"]
+SNAPSHOT_FILE = "recipes.catalogue"
+# Recipes read from a CSV file at a time, so a large import never holds every raw row at once
+CSV_CHUNK_ROWS = 50000
+
+# Separator used to pack lists of strings into a single string in the snapshot
+SEPARATOR = "\x1f"
+
+# Snapshot files start with this, then the length of a JSON header and the header, then the arrays. The number is
+# raised whenever what is saved changes, as when recipe IDs moved from names to URLs, so older snapshots are rebuilt
+SNAPSHOT_MAGIC = b"FEEDME2\n"
+# Arrays in the snapshot start on this many bytes, so every memory-mapped view is aligned
+SNAPSHOT_ALIGNMENT = 64
+# Recipes decoded at a time when every list of a field is read in order
+DECODE_CHUNK = 10000
+
+# Function to parse strings from lists
+def parse_list_string(list_string):
+    if not isinstance(list_string, str):
+        return list(list_string)
+    try:
+        return [str(x) for x in ast.literal_eval(list_string)]
+    except (ValueError, SyntaxError):
+        return list_string.strip("['").strip("']").split("', '")
+
+# Function to get the total time of a recipe in minutes from its time entries
+def parse_total_minutes(time):
+    for x in time:
+        if "Total Time" in x:
+            minutes = 0
+            for amount, unit in re.findall(r"(\d+)\s*(day|hr|hour|min)", x):
+                minutes += int(amount) * {"day": 1440, "hr": 60, "hour": 60, "min": 1}[unit]
+            return minutes
+    return 0
+
+# Function to get the number of servings of a recipe from its time entries
+def parse_servings(time):
+    for x in time:
+        if "Servings" in x:
+            match = re.search(r"\d+", x)
+            return int(match.group()) if match else 0
+    return 0
+
+# Function to get calories and grams of fat, carbs and protein from nutrition entries
+def parse_nutrition(nutrition):
+    values = {"calories": 0, "fat": 0, "carbs": 0, "protein": 0}
+    for x in nutrition:
+        match = re.match(r"\D*(\d+)\s*g?\s*(Calories|Fat|Carbs|Protein)", x)
+        if match:
+            values[match.group(2).lower()] = int(match.group(1))
+    return values
+
+# Function to give a recipe an ID that stays the same when the catalogue is re-scraped, from its URL if it has one
+def recipe_id(name, url=""):
+    url = url.strip().rstrip("/")
+    key = ("url " + url if url else " ".join(name.lower().split())).encode("utf-8")
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], "big") >> 1
+
+# Class to hold lists of strings packed into one block of UTF-8 text, decoding a list only when it is read
+class PackedLists:
+    def __init__(self, text, bounds, offsets):
+        # Every entry is followed by the separator; bounds are the byte positions and offsets the entry counts where each list starts
+        self.text = text
+        self.bounds = bounds
+        self.offsets = offsets
+
+    # Function to pack lists of strings
+    @classmethod
+    def pack(cls, lists):
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(x) for x in lists])
+        blocks = [(SEPARATOR.join(x) + SEPARATOR).encode("utf-8") if x else b"" for x in lists]
+        text = np.frombuffer(b"".join(blocks), dtype=np.uint8)
+        # An entry holding the separator itself would split in two, so those entries have it replaced first
+        if np.count_nonzero(text == ord(SEPARATOR)) != offsets[-1]:
+            return cls.pack([[y.replace(SEPARATOR, " ") for y in x] for x in lists])
+        bounds = np.zeros(len(lists) + 1, dtype=np.int64)
+        bounds[1:] = np.cumsum([len(x) for x in blocks])
+        return cls(text, bounds, offsets)
+
+    # Function to pack single strings, each as a list of one
+    @classmethod
+    def of_strings(cls, strings):
+        return cls.pack([[x] for x in strings])
+
+    # Function to join packed lists end to end
+    @classmethod
+    def concat(cls, packs):
+        bounds, offsets = [np.zeros(1, dtype=np.int64)], [np.zeros(1, dtype=np.int64)]
+        for x in packs:
+            bounds.append(x.bounds[1:] - x.bounds[0] + bounds[-1][-1])
+            offsets.append(x.offsets[1:] - x.offsets[0] + offsets[-1][-1])
+        text = np.concatenate([x.text[x.bounds[0]:x.bounds[-1]] for x in packs] or [np.zeros(0, dtype=np.uint8)])
+        return cls(text, np.concatenate(bounds), np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        start, stop = self.bounds[index:index + 2].tolist()
+        block = self.text[start:stop].tobytes().decode("utf-8")
+        return block.split(SEPARATOR)[:-1]
+
+    # Lists are decoded a chunk at a time when every one is read, rather than one slice each
+    def __iter__(self):
+        for start in range(0, len(self), DECODE_CHUNK):
+            stop = min(start + DECODE_CHUNK, len(self))
+            entries = self.text[self.bounds[start]:self.bounds[stop]].tobytes().decode("utf-8").split(SEPARATOR)
+            offsets = (self.offsets[start:stop + 1] - self.offsets[start]).tolist()
+            for i in range(stop - start):
+                yield entries[offsets[i]:offsets[i + 1]]
+
+    # Function to decode every entry at once, for packs holding one string per list
+    def strings(self):
+        entries = self.text[self.bounds[0]:self.bounds[-1]].tobytes().decode("utf-8").split(SEPARATOR)
+        return entries[:-1]
+
+    # Function to get the arrays to save this pack under a field name
+    def arrays(self, name):
+        return {name: self.text, name + "_bounds": self.bounds, name + "_offsets": self.offsets}
+
+    # Function to rebuild a pack from the arrays saved under a field name
+    @classmethod
+    def from_arrays(cls, arrays, name):
+        return cls(arrays[name], arrays[name + "_bounds"], arrays[name + "_offsets"])
+
+# Function to round a size in bytes up to the alignment of snapshot arrays
+def _aligned(size):
+    return -(-size // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+# Function to write named arrays and a JSON header to a snapshot file, replacing the old file atomically
+def write_snapshot(file, arrays, header):
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += _aligned(array.nbytes)
+    data = json.dumps(dict(header, arrays=layout)).encode("utf-8")
+    start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(data))
+    temp = file + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + len(data).to_bytes(8, "little") + data)
+        f.write(bytes(start - f.tell()))
+        for array in arrays.values():
+            f.write(np.ascontiguousarray(array).data)
+            f.write(bytes(_aligned(array.nbytes) - array.nbytes))
+    os.replace(temp, file)
+
+# Function to open a snapshot file, returning its header and its arrays as read-only views of the memory-mapped file
+def read_snapshot(file):
+    with open(file, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(file + " is not a FeedMe snapshot")
+        size = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(size).decode("utf-8"))
+        # Plain arrays over the mapping are quicker to slice than numpy.memmap ones, and keep the mapping open
+        mapped = np.frombuffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+    start = _aligned(len(SNAPSHOT_MAGIC) + 8 + size)
+    arrays = {}
+    for name, x in header.pop("arrays").items():
+        dtype = np.dtype(x["dtype"])
+        offset = start + x["offset"]
+        count = int(np.prod(x["shape"], dtype=np.int64))
+        arrays[name] = mapped[offset:offset + count * dtype.itemsize].view(dtype).reshape(x["shape"])
+    return header, arrays
+
+# Function to read every ingredient line into flat arrays of amounts, and numbered measures and product names
+def parse_ingredient_lists(ingredients):
+    parsed = [ingredient_parser.parse_ingredient(x) for y in ingredients for x in y]
+    measures, measure_names = pd.factorize(pd.Series([x.measure for x in parsed], dtype=object))
+    items, item_names = pd.factorize(pd.Series([x.name for x in parsed], dtype=object))
+    return {
+        "amount": np.array([np.nan if x.amount is None else x.amount for x in parsed], dtype=np.float64),
+        "measure": measures.astype(np.int32),
+        "item": items.astype(np.int32),
+        "measures": list(measure_names),
+        "items": list(item_names)
+    }
+
+# Function to join the parsed ingredients of several catalogues, renumbering their measures and product names
+def _concat_parsed(parsed):
+    joined = {"amount": np.concatenate([x["amount"] for x in parsed] or [np.zeros(0)])}
+    for codes, names in [("measure", "measures"), ("item", "items")]:
+        numbers = {}
+        renumbered = []
+        for x in parsed:
+            lookup = np.array([numbers.setdefault(y, len(numbers)) for y in x[names]], dtype=np.int32)
+            renumbered.append(lookup[x[codes]] if len(lookup) else np.zeros(0, dtype=np.int32))
+        joined[codes] = np.concatenate(renumbered or [np.zeros(0, dtype=np.int32)])
+        joined[names] = list(numbers)
+    return joined
+
+# Class to hold the typed recipe catalogue
+class RecipeStore:
+    def __init__(self, frame, lists, sources=(), parsed=None, urls=None):
+        # URLs are only shown with a single recipe, so they are packed with the list fields rather than kept in the frame
+        if urls is None:
+            urls = frame["URL"].tolist() if "URL" in frame else [""] * len(frame)
+        self.frame = frame.drop(columns="URL", errors="ignore").reset_index(drop=True)
+        self.urls = urls if isinstance(urls, PackedLists) else PackedLists.of_strings(urls)
+        self.lists = {x: y if isinstance(y, PackedLists) else PackedLists.pack(y) for x, y in lists.items()}
+        self.sources = list(sources)
+        self._positions = None
+        self._parsed = parsed
+
+    def __len__(self):
+        return len(self.frame)
+
+    # Function to build a catalogue from scraped rows with list or list-string fields
+    @classmethod
+    def from_rows(cls, rows, sources=()):
+        names, urls, numeric = [], [], {x: [] for x in NUMERIC_FIELDS}
+        lists = {x: [] for x in LIST_FIELDS}
+        for row in rows:
+            parsed = {x: parse_list_string(row[x]) for x in LIST_FIELDS}
+            names.append(str(row["Name"]).strip())
+            url = row.get("URL", "")
+            urls.append(url if isinstance(url, str) else "")
+            nutrition = parse_nutrition(parsed["Nutrition"])
+            numeric["total_minutes"].append(parse_total_minutes(parsed["Time"]))
+            numeric["servings"].append(parse_servings(parsed["Time"]))
+            for x in ["calories", "fat", "carbs", "protein"]:
+                numeric[x].append(nutrition[x])
+            for x in LIST_FIELDS:
+                lists[x].append(parsed[x])
+
+        frame = pd.DataFrame({
+            "ID": np.array([recipe_id(x, y) for x, y in zip(names, urls)], dtype=np.int64),
+            "Name": names
+        })
+        for x in NUMERIC_FIELDS:
+            frame[x] = np.array(numeric[x], dtype=np.int32)
+        instrumentation.count("recipes_parsed", len(names))
+        return cls(frame, lists, sources, parse_ingredient_lists(lists["Ingredients"]), urls)
+
+    # Function to import one or more scraped CSV files, a chunk of rows at a time
+    @classmethod
+    def from_csv(cls, *files):
+        with instrumentation.timer("import_csv"):
+            stores = []
+            for file in files:
+                for chunk in pd.read_csv(file, index_col=0, chunksize=CSV_CHUNK_ROWS):
+                    stores.append(cls.from_rows(chunk.to_dict("records")))
+            store = cls.concat(stores) if len(stores) > 1 else stores[0] if stores else cls.from_rows([])
+            store.sources = list(files)
+            return store
+
+    # Function to export the catalogue in the scraper CSV format
+    def to_csv(self, file):
+        recipes = self.frame[["Name"]].copy()
+        for x in LIST_FIELDS:
+            recipes[x] = list(self.lists[x])
+        recipes["URL"] = self.urls.strings()
+        recipes.to_csv(file)
+
+    # Function to save the catalogue as a snapshot of plain arrays that can be memory-mapped
+    def save(self, file=SNAPSHOT_FILE):
+        arrays = {"ID": self.frame["ID"].to_numpy()}
+        for x in NUMERIC_FIELDS:
+            arrays[x] = self.frame[x].to_numpy()
+        arrays.update(PackedLists.of_strings(self.frame["Name"].tolist()).arrays("Name"))
+        arrays.update(self.urls.arrays("URL"))
+        for x in LIST_FIELDS:
+            arrays.update(self.lists[x].arrays(x))
+        parsed = self.parsed_ingredients()
+        arrays["ingredient_amount"] = parsed["amount"]
+        arrays["ingredient_measure"] = parsed["measure"]
+        arrays["ingredient_item"] = parsed["item"]
+        arrays.update(PackedLists.of_strings(parsed["measures"]).arrays("ingredient_measures"))
+        arrays.update(PackedLists.of_strings(parsed["items"]).arrays("ingredient_items"))
+        write_snapshot(file, arrays, {"recipes": len(self), "sources": self.sources})
+
+    # Function to load a catalogue saved by save, decoding only the recipe names
+    @classmethod
+    def load(cls, file=SNAPSHOT_FILE):
+        with instrumentation.timer("load_snapshot"):
+            header, arrays = read_snapshot(file)
+            frame = pd.DataFrame({
+                "ID": np.array(arrays["ID"]),
+                "Name": PackedLists.from_arrays(arrays, "Name").strings()
+            })
+            for x in NUMERIC_FIELDS:
+                frame[x] = np.array(arrays[x])
+            lists = {x: PackedLists.from_arrays(arrays, x) for x in LIST_FIELDS}
+            parsed = {
+                "amount": arrays["ingredient_amount"],
+                "measure": arrays["ingredient_measure"],
+                "item": arrays["ingredient_item"],
+                "measures": PackedLists.from_arrays(arrays, "ingredient_measures").strings(),
+                "items": PackedLists.from_arrays(arrays, "ingredient_items").strings()
+            }
+            return cls(frame, lists, header["sources"], parsed, PackedLists.from_arrays(arrays, "URL"))
+
+    # Function to combine several catalogues into one
+    @classmethod
+    def concat(cls, stores):
+        frame = pd.concat([x.frame for x in stores], ignore_index=True)
+        lists = {x: PackedLists.concat([store.lists[x] for store in stores]) for x in LIST_FIELDS}
+        urls = PackedLists.concat([x.urls for x in stores])
+        sources = [y for store in stores for y in store.sources]
+        parsed = _concat_parsed([x.parsed_ingredients() for x in stores])
+        return cls(frame, lists, sources, parsed, urls)
+
+    # Function to get the amounts, and numbered measures and product names, of every ingredient line in the order of the lists
+    def parsed_ingredients(self):
+        if self._parsed is None:
+            self._parsed = parse_ingredient_lists(self.lists["Ingredients"])
+        return self._parsed
+
+    # Function to get the row position of a recipe from its ID
+    def position(self, id):
+        if self._positions is None:
+            ids = self.frame["ID"].tolist()
+            self._positions = {x: i for i, x in reversed(list(enumerate(ids)))}
+        return self._positions.get(id)
+
+    # Function to get every field of a single recipe
+    def recipe(self, index):
+        recipe = {"ID": int(self.frame.at[index, "ID"]), "Name": self.frame.at[index, "Name"], "URL": self.urls[index][0]}
+        for x in NUMERIC_FIELDS:
+            recipe[x] = int(self.frame.at[index, x])
+        for x in LIST_FIELDS:
+            recipe[x] = self.lists[x][index]
+        return recipe
+
+# Function to build the catalogue from scraped CSV files and save its snapshot
+def build_snapshot(csv_files=DEFAULT_CSV_FILES, snapshot=SNAPSHOT_FILE):
+    store = RecipeStore.from_csv(*csv_files)
+    store.save(snapshot)
+    return store
+
+# Function to load the catalogue, rebuilding the snapshot if its CSV sources are newer or it cannot be read
+def load_catalogue(snapshot=SNAPSHOT_FILE, csv_files=DEFAULT_CSV_FILES):
+    if os.path.isfile(snapshot):
+        try:
+            store = RecipeStore.load(snapshot)
+        except (ValueError, KeyError):
+            store = None
+        if store is not None:
+            sources = [x for x in store.sources if os.path.isfile(x)]
+            if not sources or max(os.path.getmtime(x) for x in sources) <= os.path.getmtime(snapshot):
+                return store
+            if len(sources) == len(store.sources):
+                csv_files = sources
+    return build_snapshot(csv_files, snapshot)
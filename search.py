@@ -0,0 +1,72 @@
+'''
+File:        search.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             NumPy
+             Pandas
+             FuncTools
+
+Imported By: catalogue.py
+             search_benchmark.py
+
+This file evaluates recipe searches over the typed catalogue. Each filter
+(name keyword, maximum prep time, maximum calories, ingredient keyword) is
+computed as a boolean mask over a whole column at once, and any combination of
+filters is answered by combining their masks.
+'''
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+# Class to answer recipe searches with column masks
+class RecipeSearch:
+    def __init__(self, store):
+        self.store = store
+        frame = store.frame
+        self.names = frame["Name"].str.lower()
+        self.minutes = frame["total_minutes"].to_numpy()
+        self.calories = frame["calories"].to_numpy()
+
+    # The ingredient text of every recipe is only decoded for the first ingredient search
+    @functools.cached_property
+    def ingredients(self):
+        return pd.Series(["\n".join(x).lower() for x in self.store.lists["Ingredients"]], index=self.store.frame.index)
+
+    # Function to get the recipes whose name contains a keyword, out of every recipe or only the selected rows
+    def name_mask(self, keyword, rows=None):
+        names = self.names if rows is None else self.names[rows]
+        return names.str.contains(keyword.lower(), regex=False).to_numpy()
+
+    # Function to get the recipes that take at most a number of minutes
+    def time_mask(self, max_minutes):
+        return self.minutes <= max_minutes
+
+    # Function to get the recipes with at most a number of calories
+    def calorie_mask(self, max_calories):
+        return self.calories <= max_calories
+
+    # Function to get the recipes with an ingredient containing a keyword, out of every recipe or only the selected rows
+    def ingredient_mask(self, keyword, rows=None):
+        ingredients = self.ingredients if rows is None else self.ingredients[rows]
+        return ingredients.str.contains(keyword.lower(), regex=False).to_numpy()
+
+    # Function to combine any of the filters and return the matching row positions
+    def search(self, name=None, max_minutes=None, max_calories=None, ingredient=None):
+        mask = np.ones(len(self.store), dtype=bool)
+        if max_minutes is not None:
+            mask &= self.time_mask(max_minutes)
+        if max_calories is not None:
+            mask &= self.calorie_mask(max_calories)
+        # The string filters only need to run on the rows that are still selected
+        if name:
+            mask[mask] = self.name_mask(name, mask)
+        if ingredient:
+            mask[mask] = self.ingredient_mask(ingredient, mask)
+        return np.flatnonzero(mask).tolist()
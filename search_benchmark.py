@@ -0,0 +1,112 @@
+'''
+File:        search_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_store.py
+             search.py
+             NumPy
+             Pandas
+             ArgParse
+             Time
+
+Imported By: N/A
+
+This file measures search latency on a synthetic catalogue. It times each of
+the four search prompts and a combined query with the column masks in
+search.py, and times the same searches with the old row-by-row loop on a
+smaller slice for comparison.
+
+Usage: python search_benchmark.py [--rows 1000000] [--loop-rows 20000] [--repeat 5]
+'''
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import recipe_store
+import search
+
+WORDS = ["chicken", "beef", "tofu", "salmon", "pasta", "rice", "soup", "salad", "curry", "taco",
+         "gnocchi", "potato", "corn", "bean", "lentil", "noodle", "pie", "bread", "cake", "stew"]
+INGREDIENTS = ["cup flour", "teaspoon salt", "tablespoon olive oil", "pound chicken breast", "cup rice",
+               "clove garlic", "onion, chopped", "cup milk", "egg", "cup sugar", "teaspoon pepper",
+               "cup broth", "tomato, diced", "cup cheese", "tablespoon butter", "carrot, sliced"]
+
+# Function to build a synthetic catalogue with a given number of recipes
+def synthetic_store(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = rng.integers(0, len(WORDS), size=(rows, 3))
+    names = [" ".join(WORDS[j] for j in x).title() + " " + str(i) for i, x in enumerate(words)]
+    counts = rng.integers(4, 12, size=rows)
+    picks = rng.integers(0, len(INGREDIENTS), size=int(counts.sum()))
+    amounts = rng.integers(1, 4, size=len(picks))
+    items = [str(a) + " " + INGREDIENTS[p] for a, p in zip(amounts, picks)]
+    bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    ingredients = [items[bounds[i]:bounds[i + 1]] for i in range(rows)]
+
+    frame = pd.DataFrame({"ID": np.arange(rows, dtype=np.int64), "Name": names, "URL": [""] * rows})
+    frame["total_minutes"] = rng.integers(5, 240, size=rows).astype(np.int32)
+    frame["calories"] = rng.integers(50, 1200, size=rows).astype(np.int32)
+    for x in ["fat", "carbs", "protein"]:
+        frame[x] = rng.integers(0, 80, size=rows).astype(np.int32)
+    frame["servings"] = rng.integers(1, 12, size=rows).astype(np.int32)
+    lists = {"Time": [[] for _ in range(rows)], "Nutrition": [[] for _ in range(rows)],
+             "Ingredients": ingredients, "Directions": [[] for _ in range(rows)]}
+    return recipe_store.RecipeStore(frame, lists)
+
+# Function to run the old row-by-row searches over the first rows of a catalogue
+def loop_search(store, rows, query):
+    frame = store.frame.head(rows)
+    selected = []
+    for index, row in frame.iterrows():
+        if (query["name"].lower() in row["Name"].lower()
+                and row["total_minutes"] <= query["max_minutes"]
+                and row["calories"] <= query["max_calories"]
+                and any(query["ingredient"] in x.lower() for x in store.lists["Ingredients"][index])):
+            selected.append(index)
+    return selected
+
+# Function to time a call, returning the best of several runs in milliseconds
+def best_of(repeat, call):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Time recipe searches on a synthetic catalogue.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--loop-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = synthetic_store(args.rows)
+    searcher = search.RecipeSearch(store)
+    print("Catalogue:", args.rows, "recipes built in", round(time.perf_counter() - start, 2), "s")
+
+    query = {"name": "soup", "max_minutes": 30, "max_calories": 500, "ingredient": "chicken"}
+    timings = [
+        ("name", lambda: searcher.search(name=query["name"])),
+        ("prep time", lambda: searcher.search(max_minutes=query["max_minutes"])),
+        ("calories", lambda: searcher.search(max_calories=query["max_calories"])),
+        ("ingredient", lambda: searcher.search(ingredient=query["ingredient"])),
+        ("combined", lambda: searcher.search(**query))
+    ]
+    for label, call in timings:
+        print("Masked search,", label + ":", round(best_of(args.repeat, call), 2), "ms")
+
+    loop = best_of(1, lambda: loop_search(store, args.loop_rows, query))
+    print("Row loop, combined on", args.loop_rows, "rows:", round(loop, 2), "ms",
+          "(about", round(loop * args.rows / args.loop_rows / 1000, 1), "s projected for", args.rows, "rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+File:        similarity_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     recipe_similarity.py
+             recipe_store.py
+             NumPy
+             Pandas
+             ArgParse
+             TempFile
+             Time
+             OS
+
+Imported By: N/A
+
+This file measures "more like this" and recommendation lookups on a synthetic
+catalogue whose products are drawn with a long-tailed (Zipf) frequency, as in
+real recipes, where a few products such as salt are in most recipes and most
+products are in few. It times building the vectors, scoring recipes one at a
+time and in batches, recommending from a set of favorites, and finding the
+neighbours of every recipe. It then adds, changes and removes a few recipes and
+times bringing the saved neighbour table up to date against scoring the same
+recipes from scratch, and reports how many of the updated neighbours match.
+
+Usage: python similarity_benchmark.py [--rows 20000] [--products 5000] [--batch 256] [--changed 200]
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import recipe_similarity
+import recipe_store
+
+# Function to draw the products of synthetic recipes, a few of them common and most of them rare
+def draw_products(rows, products, rng):
+    counts = rng.integers(4, 14, size=rows)
+    weights = 1 / np.arange(1, products + 1)
+    items = rng.choice(products, size=int(counts.sum()), p=weights / weights.sum())
+    return np.split(items, np.cumsum(counts)[:-1])
+
+# Function to build a synthetic catalogue from the IDs and products of its recipes, with its ingredient lines already read
+def synthetic_store(ids, recipes, products):
+    rows = len(ids)
+    names = ["product " + str(x) for x in range(products)]
+    items = np.concatenate(recipes) if recipes else np.zeros(0, dtype=np.int64)
+    ids = np.asarray(ids, dtype=np.int64)
+    frame = pd.DataFrame({"ID": ids, "Name": ["Recipe " + str(x) for x in ids.tolist()]})
+    # Nutrition follows from the ID, so a recipe keeps its nutrition when the catalogue around it changes
+    frame["total_minutes"] = (5 + ids * 31 % 235).astype(np.int32)
+    frame["calories"] = (50 + ids * 7919 % 1150).astype(np.int32)
+    for x, step in [("fat", 13), ("carbs", 17), ("protein", 23)]:
+        frame[x] = (ids * step % 80).astype(np.int32)
+    frame["servings"] = (1 + ids % 11).astype(np.int32)
+    empty = [[] for _ in range(rows)]
+    ingredients = [["1 " + names[x] for x in y.tolist()] for y in recipes]
+    lists = {"Time": empty, "Nutrition": empty, "Ingredients": ingredients, "Directions": empty}
+    parsed = {"amount": np.ones(len(items)), "measure": np.zeros(len(items), dtype=np.int32),
+              "item": items.astype(np.int32), "measures": [""], "items": names}
+    return recipe_store.RecipeStore(frame, lists, parsed=parsed)
+
+# Function to time a call, returning the seconds it took and its result
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Time recipe similarity lookups and neighbour table updates.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=256, help="recipes scored one at a time and in one batch")
+    parser.add_argument("--changed", type=int, default=200, help="recipes added, and half as many changed and removed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ids, recipes = list(range(args.rows)), draw_products(args.rows, args.products, rng)
+    store = synthetic_store(ids, recipes, args.products)
+    seconds, similarity = timed(lambda: recipe_similarity.RecipeSimilarity(store))
+    print("Vectors:", args.rows, "recipes,", len(similarity.row_terms), "terms set, built in", round(seconds, 2), "s")
+
+    picks = np.random.default_rng(1).choice(args.rows, size=min(args.batch, args.rows), replace=False)
+    one, _ = timed(lambda: [similarity.score([x]) for x in picks])
+    batched, _ = timed(lambda: [similarity.score(picks[i:i + 64]) for i in range(0, len(picks), 64)])
+    print(f'Score {len(picks)} recipes: one at a time {one * 1000:8.1f} ms, in batches of 64 {batched * 1000:8.1f} ms')
+    seconds, _ = timed(lambda: [similarity.recommend(picks[i:i + 10]) for i in range(0, 100, 10)])
+    print(f'Recommend from 10 favorites: {seconds * 100:.2f} ms each')
+
+    with tempfile.TemporaryDirectory() as temp:
+        table = os.path.join(temp, "neighbours.npz")
+        seconds, similarity = timed(lambda: recipe_similarity.load_index(store, table, snapshot=""))
+        print(f'Neighbour table: {similarity.computed.sum()} recipes scored in {seconds:.2f} s')
+
+        # Add new recipes, change the products of some and remove others
+        removed = args.changed // 2
+        ids, recipes = ids[removed:], recipes[removed:]
+        change = rng.choice(len(ids), size=args.changed // 2, replace=False)
+        for position, products in zip(change.tolist(), draw_products(len(change), args.products, rng)):
+            recipes[position] = products
+        ids += list(range(args.rows, args.rows + args.changed))
+        recipes += draw_products(args.changed, args.products, rng)
+        updated = synthetic_store(ids, recipes, args.products)
+
+        incremental, similarity = timed(lambda: recipe_similarity.load_index(updated, table, snapshot=""))
+        # The rebuild scores the same recipes from scratch, as large catalogues score the rest when they are asked for
+        scored = np.flatnonzero(similarity.computed)
+        fresh = recipe_similarity.RecipeSimilarity(updated)
+        rebuilt, _ = timed(lambda: fresh.update(scored))
+        same = np.mean([len(set(x) & set(y)) / max(1, len(set(y) - {-1})) for x, y in
+                        zip(similarity.neighbours[scored].tolist(), fresh.neighbours[scored].tolist())]) if len(scored) else 1.0
+        print(f'Add {args.changed}, change {len(change)} and remove {removed} recipes: update {incremental:.2f} s '
+              f'({similarity.computed.sum()} scored), rebuild {rebuilt:.2f} s, {same:.1%} of neighbours the same')
+        seconds, _ = timed(lambda: [similarity.similar(x) for x in picks[:100]])
+        print(f'More like this, scored when asked for: {seconds * 10:.2f} ms each')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+'''
+File:        startup_check.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     catalogue.py
+             feedme_core.py
+             SubProcess
+             ArgParse
+             TempFile
+             Shutil
+             Time
+             Sys
+             OS
+
+Imported By: N/A
+
+This file measures how long FeedMe.py takes to reach its main menu and quit.
+It runs the application under "python -X importtime" in a scratch directory
+with saved user settings, answers "quit" at the main menu, and reports the
+total import time (apart from the interpreter's own site module), the slowest
+imports and the wall-clock time of the whole session. It exits with an error
+when either time is over its budget, so a change that pulls a heavy module back
+into startup is caught.
+
+It then checks that the shipped catalogue still answers a plain ingredient
+search: "chicken" must find Baked Honey Mustard Chicken, whose only chicken
+line is "6 skinless, boneless chicken breast halves".
+
+Usage: python startup_check.py [--import-budget-ms 30] [--wall-budget-ms 250] [--top 10]
+'''
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_BUDGET_MS = 30
+WALL_BUDGET_MS = 250
+# A plain ingredient search on the shipped catalogue and a recipe it must find
+SEARCH_CHECK = ("chicken", "Baked Honey Mustard Chicken")
+# Directory holding FeedMe.py and its data files, wherever the check is run from
+HERE = os.path.dirname(os.path.realpath(__file__))
+
+# Function to run FeedMe once and return its import timings and the wall-clock time
+def run_session(directory):
+    script = os.path.join(HERE, "FeedMe.py")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", script], cwd=directory,
+                            input="quit\n", capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((name.rstrip(), int(cumulative)))
+    return imports, wall
+
+# Function to check that an ingredient search on the shipped catalogue finds the recipe it should
+def check_search():
+    # The catalogue and its indexes are found relative to the directory the application runs in
+    previous = os.getcwd()
+    os.chdir(HERE)
+    try:
+        import catalogue
+        import feedme_core
+        app = feedme_core.FeedMe(None, data=catalogue.Catalogue())
+        ingredient, name = SEARCH_CHECK
+        return name in [app.recipe_name(x) for x in app.search_ingredients(ingredient)]
+    finally:
+        os.chdir(previous)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check FeedMe startup time against a budget.")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--wall-budget-ms", type=float, default=WALL_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "user_settings.txt"), "wt", encoding="utf-8") as f:
+            f.write("2000.0\n0.0\n" + time.strftime("%m/%d/%Y") + "\n")
+        shutil.copy(os.path.join(HERE, "favorites.txt"), directory)
+        imports, wall = run_session(directory)
+
+    # Top-level imports are the ones not nested under another import; site is the
+    # interpreter's own start-up and depends on the installed packages, so it is kept apart
+    top_level = [(name.strip(), us) for name, us in imports if not name.startswith("  ")]
+    site_ms = sum(us for name, us in top_level if name == "site") / 1000
+    total_ms = sum(us for name, us in top_level if name != "site") / 1000
+    wall_ms = wall * 1000
+
+    print("Slowest imports:")
+    for name, us in sorted(top_level, key=lambda x: -x[1])[:args.top]:
+        print(f'{us / 1000:9.2f} ms  {name}')
+    print(f'\nInterpreter site: {site_ms:.1f} ms')
+    print(f'Import time: {total_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)')
+    print(f'Wall time:   {wall_ms:.1f} ms (budget {args.wall_budget_ms:.0f} ms)')
+
+    if total_ms > args.import_budget_ms or wall_ms > args.wall_budget_ms:
+        print("\nStartup is over budget.")
+        sys.exit(1)
+
+    if not check_search():
+        print(f'\nSearching ingredients for "{SEARCH_CHECK[0]}" no longer finds {SEARCH_CHECK[1]}.')
+        sys.exit(1)
+    print(f'Ingredient search: "{SEARCH_CHECK[0]}" finds {SEARCH_CHECK[1]}')
+
+if __name__ == "__main__":
+    main()
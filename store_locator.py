@@ -0,0 +1,160 @@
+'''
+File:        store_locator.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     NumPy
+             Pandas
+             ArgParse
+             Math
+
+Imported By: FeedMe.py
+             catalogue.py
+             store_map.py
+             store_supply.py
+
+This file finds supermarkets near a location. Stores are bucketed into a grid
+of latitude/longitude cells, so a query only measures the distance to stores
+in the cells around the location instead of every store in the table.
+Distances are great-circle (haversine) distances in kilometres. The index
+answers "k nearest stores" and "all stores within R km" queries, optionally
+limited to one category.
+
+Usage: python store_locator.py LAT LON [-k 5] [--radius KM] [--category Supermarket]
+'''
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.05
+KM_PER_DEGREE = 111.32
+
+# Function to get the haversine distance in kilometres between points, pairing up arrays as NumPy broadcasts them
+def haversine(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+# Function to get the matrix of haversine distances in kilometres between every pair of points
+def distance_matrix(lats, lons):
+    lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+    return haversine(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+
+# Class to answer nearest-store and radius queries over a grid of cells
+class StoreIndex:
+    def __init__(self, stores, cell_degrees=CELL_DEGREES):
+        stores = stores.dropna(subset=["Lat", "Lon"])
+        stores = stores[stores["Lat"].between(-90, 90) & stores["Lon"].between(-180, 180)]
+        self.cell_degrees = cell_degrees
+
+        # Rows are sorted by cell so each cell is one contiguous slice
+        rows = np.floor(stores["Lat"].to_numpy() / cell_degrees).astype(np.int64)
+        cols = np.floor(stores["Lon"].to_numpy() / cell_degrees).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.stores = stores.iloc[order].reset_index(drop=True)
+        self.lats = self.stores["Lat"].to_numpy(dtype=np.float64)
+        self.lons = self.stores["Lon"].to_numpy(dtype=np.float64)
+        self.categories = self.stores["Category"].to_numpy()
+
+        keys = list(zip(rows[order].tolist(), cols[order].tolist()))
+        self.cells = {}
+        for i, key in enumerate(keys):
+            start, _ = self.cells.get(key, (i, i))
+            self.cells[key] = (start, i + 1)
+
+    def __len__(self):
+        return len(self.stores)
+
+    # Function to get the rows of every store in the cells around a location, or None when
+    # the cells would cover the whole grid
+    def _candidates(self, lat, lon, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 1e-6))
+        row_range = range(math.floor((lat - lat_span) / self.cell_degrees), math.floor((lat + lat_span) / self.cell_degrees) + 1)
+        col_range = range(math.floor((lon - lon_span) / self.cell_degrees), math.floor((lon + lon_span) / self.cell_degrees) + 1)
+        # A box wider than the index itself is cheaper to answer by scanning every store
+        if len(row_range) * len(col_range) >= len(self.cells) or abs(lon) + lon_span > 180:
+            return None
+        slices = [self.cells[(r, c)] for r in row_range for c in col_range if (r, c) in self.cells]
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in slices])
+
+    # Function to turn row numbers and distances into a result table, nearest first
+    def _result(self, rows, distances, limit=None):
+        if limit is not None and len(distances) > limit:
+            nearest = np.argpartition(distances, limit)[:limit]
+            rows, distances = rows[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+        result = self.stores.iloc[rows[order]].copy()
+        result["Distance"] = distances[order]
+        return result.reset_index(drop=True)
+
+    # Function to get the rows and distances of every store within a radius
+    def _within(self, lat, lon, radius_km, category=None):
+        rows = self._candidates(lat, lon, radius_km)
+        if rows is None:
+            rows = np.arange(len(self.stores))
+        if category is not None:
+            rows = rows[self.categories[rows] == category]
+        distances = haversine(lat, lon, self.lats[rows], self.lons[rows])
+        keep = distances <= radius_km
+        return rows[keep], distances[keep]
+
+    # Function to find every store within a radius, nearest first
+    def within(self, lat, lon, radius_km, category=None):
+        return self._result(*self._within(lat, lon, radius_km, category))
+
+    # Function to find the k stores nearest to a location
+    def nearest(self, lat, lon, k=5, category=None):
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while self._candidates(lat, lon, radius_km) is not None:
+            rows, distances = self._within(lat, lon, radius_km, category)
+            # Every store closer than the radius is found, so k of them are the true k nearest
+            if len(rows) >= k:
+                return self._result(rows, distances, k)
+            radius_km *= 4
+        # Once the search box covers the whole grid, measure every store once
+        return self._result(*self._within(lat, lon, math.pi * EARTH_RADIUS_KM, category), k)
+
+# Function to parse a "lat, lon" string into a pair of floats
+def parse_location(text):
+    parts = [x for x in text.replace(",", " ").split() if x]
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def main():
+    parser = argparse.ArgumentParser(description="Find supermarkets near a location.")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("-k", type=int, default=5, help="number of nearest stores to list")
+    parser.add_argument("--radius", type=float, help="list every store within this many kilometres instead")
+    parser.add_argument("--category", help="only list stores of this category, e.g. Supermarket")
+    parser.add_argument("--stores", default="stores_default.csv", help="store CSV file to search")
+    args = parser.parse_args()
+
+    index = StoreIndex(pd.read_csv(args.stores, index_col=0))
+    if args.radius is not None:
+        found = index.within(args.lat, args.lon, args.radius, args.category)
+    else:
+        found = index.nearest(args.lat, args.lon, args.k, args.category)
+    for _, row in found.iterrows():
+        print(f'{row["Distance"]:7.2f} km\t{row["Name"]} ({row["Category"]})')
+
+if __name__ == "__main__":
+    main()
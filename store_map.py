@@ -0,0 +1,96 @@
+'''
+File:        store_map.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     store_locator.py
+             instrumentation.py
+             Folium
+             HTML
+
+Imported By: feedme_core.py
+             map_benchmark.py
+
+This file draws the supermarket map. The clustered renderer passes every store
+to a single marker-cluster layer as one compact array built from the Lat, Lon,
+Name and Category columns, and the browser creates the markers, so the saved
+page holds one short row per store instead of a full marker definition. Past
+a fixed number of rows, stores of the same category that share a grid cell are
+merged into one marker, so the page stops growing with the store count. The
+map can also be limited to the stores within a radius of the user. The
+original renderer, with one Folium Marker per store, is kept for comparison.
+'''
+
+import html
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+import instrumentation
+import store_locator
+
+DEFAULT_CENTER = [40.44062, -79.99589]
+NEARBY_RADIUS_KM = 25
+MAX_POINTS = 5000
+
+# Marker drawn by the browser for each [lat, lon, name, category, count] row
+MARKER_CALLBACK = """function (row) {
+    var color = row[3] === "Convenience Store" ? "blue" : "red";
+    var radius = 7 + 3 * Math.log(row[4]);
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {radius: radius, color: color, fillOpacity: 0.8});
+    marker.bindPopup(row[2]);
+    return marker;
+}"""
+
+# Function to draw every store as its own Folium Marker
+@instrumentation.timed("map_render")
+def render_markers(stores, center=None):
+    map = folium.Map(location=center or DEFAULT_CENTER)
+    stores = stores.dropna(subset=["Lat", "Lon"])
+    for index, row in stores.iterrows():
+        iconColor = "red"
+        if row["Category"] == "Convenience Store":
+            iconColor = "blue"
+        folium.Marker(
+            location=[row["Lat"], row["Lon"]],
+            popup=row["Name"],
+            icon=folium.Icon(color=iconColor)
+        ).add_to(map)
+    return map
+
+# Function to draw the stores as one clustered layer, optionally only those near a location
+@instrumentation.timed("map_render")
+def render_clustered(stores, center=None, radius_km=None, index=None, max_points=MAX_POINTS):
+    map = folium.Map(location=center or DEFAULT_CENTER, zoom_start=12 if center else 10)
+    if center is not None and radius_km is not None:
+        index = index or store_locator.StoreIndex(stores)
+        stores = index.within(center[0], center[1], radius_km)
+        folium.Marker(location=center, popup="You are here", icon=folium.Icon(color="green")).add_to(map)
+    stores = stores.dropna(subset=["Lat", "Lon"])
+    FastMarkerCluster(_marker_rows(stores, max_points), callback=MARKER_CALLBACK).add_to(map)
+    return map
+
+# Function to build the marker rows, merging nearby stores once there are too many to draw
+def _marker_rows(stores, max_points=MAX_POINTS):
+    data = stores[["Lat", "Lon", "Category"]].copy()
+    data["Name"] = stores["Name"].astype(str).map(html.escape)
+    data["Count"] = 1
+    cell_degrees = 0.005
+    # Stores of different categories are never merged, so no fewer markers than categories can be drawn
+    max_points = max(max_points, data["Category"].nunique(dropna=False))
+    while len(data) > max_points:
+        # Stores of the same category in one grid cell become a single marker at their centre; the grid starts
+        # at the south pole and the antimeridian, so once a cell is as large as the globe it holds every store
+        data["Row"] = ((data["Lat"] + 90) // cell_degrees).astype("int64")
+        data["Col"] = ((data["Lon"] + 180) // cell_degrees).astype("int64")
+        data = data.groupby(["Row", "Col", "Category"], as_index=False, dropna=False).agg(
+            Lat=("Lat", "mean"), Lon=("Lon", "mean"), Name=("Name", "first"), Count=("Count", "sum"))
+        merged = data["Count"] > 1
+        data.loc[merged, "Name"] = data.loc[merged, "Count"].astype(str) + " stores"
+        cell_degrees *= 2
+    data[["Lat", "Lon"]] = data[["Lat", "Lon"]].round(5)
+    return data[["Lat", "Lon", "Name", "Category", "Count"]].to_numpy().tolist()
+
@@ -1,35 +1,154 @@
 '''
-File:        FeedMe.py
+File:        store_scraper.py
 
 Author(s):   Simon Corpuz (scorpuz)
              Bonnie Li (bonnieli)
              Suryaa Raman (ssuryaar)
              Yiyang Yao (yiyangya)
 
-Imports:     Pandas
+Imports:     fetcher.py
+             instrumentation.py
+             Pandas
+             NumPy
              Requests
+             HashLib
+             IO
+             OS
 
-Imported By: FeedMe.py
+Imported By: feedme_core.py
 
 This file serves to download the map data from the Western Pennsylvania Regional
-Data Center and convert it to a CSV format for the main application.
+Data Center and convert it to a CSV format for the main application. When given
+an HTTP cache, the dataset is only downloaded and rewritten if it changed.
+
+The dataset is streamed rather than held in memory: the response is read a
+block at a time and parsed a chunk of rows at a time, keeping only the name,
+coordinates and category of each store. Rows without a name or category, or
+with coordinates that are missing or off the globe, are dropped, as are stores
+already seen earlier in the file. Each clean chunk is appended to a temporary
+file, which replaces the old one only once the whole dataset has been read, so
+memory use stays the same however many stores the dataset holds, and a failed
+download never leaves a half-written store file behind.
 '''
 
+import hashlib
+import io
+import os
+import numpy as np
 import pandas as pd
 import requests
+import fetcher
+import instrumentation
+
+STORES_URL = "https://data.wprdc.org/dataset/690409e3-27e2-47a1-beed-fd600097f951/resource/626357fa-c95d-465f-9a02-3121655b2b78/download/data-conveniencesupermarkets.csv"
+STORE_COLUMNS = ["Name", "Lat", "Lon", "Category"]
+# Coordinates are read as text and checked afterwards, so one bad value only drops its own row
+STORE_DTYPES = {"Name": str, "Lat": str, "Lon": str, "Category": str}
+CHUNK_ROWS = 50000
+CHUNK_BYTES = 1 << 16
+
+# Class to read a streamed response as a file, hashing the bytes as they go past
+class ResponseStream(io.RawIOBase):
+    def __init__(self, response):
+        self.chunks = response.iter_content(CHUNK_BYTES)
+        self.left = b""
+        self.hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.left:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.hash.update(chunk)
+            self.left = chunk
+        size = min(len(buffer), len(self.left))
+        buffer[:size] = self.left[:size]
+        self.left = self.left[size:]
+        return size
+
+# Function to keep the rows of a chunk with a name, a category and coordinates on the globe
+def clean_stores(chunk):
+    chunk = chunk.assign(Name=chunk["Name"].str.strip(), Category=chunk["Category"].str.strip(),
+                         Lat=pd.to_numeric(chunk["Lat"], errors="coerce"), Lon=pd.to_numeric(chunk["Lon"], errors="coerce"))
+    valid = (chunk["Name"].str.len() > 0) & (chunk["Category"].str.len() > 0) \
+        & chunk["Lat"].between(-90, 90) & chunk["Lon"].between(-180, 180) & ((chunk["Lat"] != 0) | (chunk["Lon"] != 0))
+    return chunk[valid]
+
+# Class to remember which stores have been seen, as sorted runs of 8-byte hashes merged like a binary counter
+class SeenStores:
+    def __init__(self):
+        self.runs = []
+
+    # Function to mark the rows of a chunk whose key has not been seen before, and remember them
+    def first_seen(self, keys):
+        fresh = ~pd.Series(keys).duplicated().to_numpy()
+        for run in self.runs:
+            found = run[np.minimum(np.searchsorted(run, keys), len(run) - 1)] == keys
+            fresh &= ~found
+        # A chunk of stores all seen before adds no run, so every run holds at least one key
+        if not fresh.any():
+            return fresh
+        self.runs.append(np.sort(keys[fresh]))
+        # Runs of similar size are merged, so there are only ever a few and each key is re-sorted a few times
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+        return fresh
+
+# Function to drop stores already seen, matching on name, category and coordinates to about a metre
+def drop_duplicates(chunk, seen):
+    keys = pd.util.hash_pandas_object(pd.DataFrame({"Name": chunk["Name"].str.lower(), "Category": chunk["Category"],
+                                                    "Lat": chunk["Lat"].round(5), "Lon": chunk["Lon"].round(5)}), index=False)
+    return chunk[seen.first_seen(keys.to_numpy())]
+
+# Function to download map data and convert to CSV, a chunk of rows at a time
+@instrumentation.timed("download_stores")
+def download_stores(file="stores_default.csv", url=STORES_URL, cache=None, chunk_rows=CHUNK_ROWS):
+    headers = cache.conditional_headers(url) if cache is not None and os.path.isfile(file) else None
+    temp = file + ".tmp"
+    with requests.get(url, headers=headers, stream=True, timeout=fetcher.DEFAULT_TIMEOUT) as response:
+        result = fetcher.FetchResult(url, response.status_code, b"", dict(response.headers))
+        if cache is not None and os.path.isfile(file) and response.status_code == 304 and cache.is_unchanged(result):
+            cache.update(result)
+            return False
+        if response.status_code != 200:
+            print("Failed to download CSV file. Status code:", response.status_code)
+            return False
+
+        # Only the needed columns of one chunk of rows are in memory at a time
+        stream = ResponseStream(response)
+        read = kept = 0
+        seen = SeenStores()
+        try:
+            with open(temp, "wt", encoding="utf-8", newline="") as out:
+                chunks = pd.read_csv(io.BufferedReader(stream, CHUNK_BYTES), usecols=STORE_COLUMNS, dtype=STORE_DTYPES,
+                                     chunksize=chunk_rows, keep_default_na=False)
+                for chunk in chunks:
+                    read += len(chunk)
+                    chunk = drop_duplicates(clean_stores(chunk), seen)[STORE_COLUMNS]
+                    chunk.index = range(kept, kept + len(chunk))
+                    chunk.to_csv(out, header=out.tell() == 0)
+                    kept += len(chunk)
+        except BaseException:
+            os.remove(temp)
+            raise
 
-# Function to download map data and convert to CSV
-def download_stores(file="stores_default.csv"):
-    url = "https://data.wprdc.org/dataset/690409e3-27e2-47a1-beed-fd600097f951/resource/626357fa-c95d-465f-9a02-3121655b2b78/download/data-conveniencesupermarkets.csv"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        fin = open(file, "wb")
-        fin.write(response.content)
-    else:
-        print("Failed to download CSV file. Status code:", response.status_code)
-
-    stores = pd.read_csv(file)
-    stores = stores[["Name", "Lat", "Lon", "Category"]]
-    stores = stores.dropna()
-    stores.to_csv(file)
+    digest = stream.hash.hexdigest()
+    if cache is not None and os.path.isfile(file) and cache.is_unchanged(result, digest):
+        os.remove(temp)
+        cache.update(result, hash=digest)
+        return False
+    # A dataset without a single usable store must not replace the working one
+    if kept == 0:
+        os.remove(temp)
+        print("Failed to read any stores from the CSV file")
+        return False
+    if kept < read:
+        print("Skipped", read - kept, "invalid or duplicate stores")
+    os.replace(temp, file)
+    if cache is not None:
+        cache.update(result, hash=digest)
+    return True
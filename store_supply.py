@@ -0,0 +1,181 @@
+'''
+File:        store_supply.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     store_locator.py
+             NumPy
+             Pandas
+             FuncTools
+             IterTools
+
+Imported By: catalogue.py
+             supply_benchmark.py
+
+This file finds the nearby stores that can supply a recipe and the order to
+visit them in. The products read from every ingredient line when the catalogue
+was built are sorted into store sections (produce, meat, dairy and so on) by
+the inventory file, store_inventory.csv. The file also gives, for each section,
+how likely each category of store is to stock it: a supermarket nearly always
+has fresh produce and a convenience store seldom does. A product is matched by
+its whole name, then by the shorter endings of its name, then by its words from
+the last, so "extra-virgin olive oil" is found as "olive oil" and
+"chicken breast halve" as "chicken". Products that match nothing go in the
+section listed without products. Sections with no availability given, such as
+tap water, are not shopped for. Stores of a category the file does not list
+are taken to stock nothing.
+
+For a recipe and a location, the nearest stores of each category in the file,
+within 25 km, are scored with one matrix of ingredient lines by stores. Taking
+each category's nearest stores keeps a dense patch of convenience stores from
+crowding out the supermarkets a little further away. A store's score is the
+share of the recipe it is likely to supply, less a penalty for every kilometre
+away. The best store is chosen first, and further stores are added while one
+supplies enough of what is still missing to be worth the extra distance. The
+chosen stores are then ordered as the shortest round trip from the location,
+measured over the distance matrix between every pair of stops. Each ingredient
+line is bought at the stop most likely to stock it.
+
+The stores and the lines to buy at each are cached by recipe and by the grid
+cell of the location, about a kilometre across, and are chosen from the centre
+of the cell, so repeated lookups from the same neighbourhood are answered at
+once. A point near the edge of its cell may therefore be given stores that are
+slightly less suited to it than those chosen from the point itself would be.
+The order of the stops and every distance are worked out again from the exact
+location on each lookup.
+'''
+
+import functools
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import store_locator
+
+INVENTORY_FILE = "store_inventory.csv"
+# Nearest stores of each category in the inventory file weighed for a plan
+CANDIDATE_STORES = 10
+MAX_DISTANCE_KM = 25.0
+MAX_STOPS = 3
+# Share of a recipe a store must supply to be worth one more kilometre
+KM_PENALTY = 0.02
+COVERAGE_TARGET = 0.95
+CELL_DEGREES = 0.01
+PLAN_CACHE_SIZE = 4096
+
+# Function to find the section of a product by its whole name, then the endings of its name, then its words from the last
+def section_of(name, products, default):
+    words = name.split()
+    for x in [" ".join(words[i:]) for i in range(len(words))] + words[::-1]:
+        if x in products:
+            return products[x]
+    return default
+
+# Class to plan which nearby stores to buy a recipe's ingredients at, in the order to visit them
+class StoreSupply:
+    def __init__(self, recipes, store_index, inventory_file=INVENTORY_FILE, cell_degrees=CELL_DEGREES):
+        self.recipes = recipes
+        self.store_index = store_index
+        self.cell_degrees = cell_degrees
+
+        table = pd.read_csv(inventory_file)
+        self.sections = table["Section"].tolist()
+        self.categories = pd.Index([x for x in table.columns if x not in ("Section", "Products")])
+        availability = table[list(self.categories)].to_numpy(dtype=np.float64)
+        shopped = ~np.isnan(availability).all(axis=1)
+        # A last column of zeros stands for every store category the file does not list
+        self.availability = np.column_stack([np.nan_to_num(availability), np.zeros(len(availability))])
+
+        products, default = {}, None
+        for section, names in enumerate(table["Products"].fillna("").tolist()):
+            names = [" ".join(x.split()) for x in names.split(";") if x.strip()]
+            if not names:
+                default = section
+            for x in names:
+                products.setdefault(x, section)
+        if default is None:
+            raise ValueError(inventory_file + " needs one section without products for everything else")
+
+        # Section of every product as the catalogue numbers them, or -1 for products not shopped for
+        parsed = recipes.parsed_ingredients()
+        sections = np.array([section_of(x, products, default) for x in parsed["items"]], dtype=np.int64)
+        sections[~shopped[sections]] = -1
+        sections[[i for i, x in enumerate(parsed["items"]) if not x]] = -1
+        self.line_sections = sections[parsed["item"]]
+        self.offsets = recipes.lists["Ingredients"].offsets
+        self._plan = functools.lru_cache(maxsize=PLAN_CACHE_SIZE)(self._plan_cell)
+
+    # Function to get the text and section of every ingredient line of a recipe that is shopped for
+    def _lines(self, index):
+        sections = self.line_sections[self.offsets[index]:self.offsets[index + 1]]
+        keep = sections >= 0
+        lines = self.recipes.lists["Ingredients"][index]
+        return [x for x, y in zip(lines, keep.tolist()) if y], sections[keep]
+
+    # Function to choose the stores for a recipe from the centre of one grid cell, with the lines to buy at each
+    def _plan_cell(self, index, row, col):
+        lat, lon = (row + 0.5) * self.cell_degrees, (col + 0.5) * self.cell_degrees
+        lines, sections = self._lines(index)
+        stores = pd.concat([self.store_index.nearest(lat, lon, k=CANDIDATE_STORES, category=x) for x in self.categories],
+                           ignore_index=True)
+        stores = stores[stores["Distance"] <= MAX_DISTANCE_KM].reset_index(drop=True)
+        if len(lines) == 0 or len(stores) == 0:
+            return [], 0.0, lines
+
+        # Likelihood of every store stocking every ingredient line, one row a line and one column a store
+        supply = self.availability[sections][:, self.categories.get_indexer(stores["Category"])]
+        penalty = KM_PENALTY * stores["Distance"].to_numpy()
+        # Stores of one category stock alike, so a line is as likely to be found as at the best store chosen for it
+        found = np.zeros(len(lines))
+        chosen = []
+        while len(chosen) < MAX_STOPS:
+            score = np.maximum(supply - found[:, None], 0).mean(axis=0) - penalty
+            score[chosen] = -np.inf
+            best = int(np.argmax(score))
+            # The first store is always chosen, and later ones only when what they add is worth the distance
+            if chosen and score[best] <= 0:
+                break
+            chosen.append(best)
+            found = np.maximum(found, supply[:, best])
+            if found.mean() >= COVERAGE_TARGET:
+                break
+
+        # Each line is bought at the stop most likely to stock it, the first one chosen on a tie
+        stocked = supply[:, chosen]
+        buy = np.array(chosen)[np.argmax(stocked, axis=1)]
+        buy[stocked.max(axis=1) == 0] = -1
+        stops = []
+        for x in chosen:
+            store = stores.iloc[x]
+            stops.append({"name": store["Name"], "category": store["Category"], "lat": float(store["Lat"]),
+                          "lon": float(store["Lon"]), "supply": round(float(supply[:, x].mean()), 3),
+                          "items": [y for y, z in zip(lines, buy.tolist()) if z == x]})
+        unavailable = [y for y, z in zip(lines, buy.tolist()) if z == -1]
+        return stops, round(float(found.mean()), 3), unavailable
+
+    # Function to plan where to buy a recipe's ingredients near a location, giving the stops in the order to visit them
+    def route(self, index, lat, lon):
+        row, col = int(np.floor(lat / self.cell_degrees)), int(np.floor(lon / self.cell_degrees))
+        stops, coverage, unavailable = self._plan(index, row, col)
+        if not stops:
+            return {"stops": [], "route_km": 0.0, "coverage": coverage, "unavailable": list(unavailable)}
+
+        # Every order of the stops is measured at once as a round trip from the exact location
+        lats = np.array([lat] + [x["lat"] for x in stops])
+        lons = np.array([lon] + [x["lon"] for x in stops])
+        distances = store_locator.distance_matrix(lats, lons)
+        orders = np.array(list(itertools.permutations(range(1, len(stops) + 1))))
+        lengths = (distances[0, orders[:, 0]] + distances[orders[:, :-1], orders[:, 1:]].sum(axis=1)
+                   + distances[orders[:, -1], 0])
+        order = orders[np.argmin(lengths)].tolist()
+
+        route = []
+        for previous, x in zip([0] + order, order):
+            route.append(dict(stops[x - 1], leg_km=round(float(distances[previous, x]), 3),
+                              distance_km=round(float(distances[0, x]), 3)))
+        return {"stops": route, "route_km": round(float(lengths.min()), 3), "coverage": coverage,
+                "unavailable": list(unavailable)}
@@ -0,0 +1,98 @@
+'''
+File:        supply_benchmark.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     store_supply.py
+             store_locator.py
+             recipe_store.py
+             synthetic_data.py
+             NumPy
+             Pandas
+             ArgParse
+             Time
+             OS
+
+Imported By: N/A
+
+This file measures planning which nearby stores to buy a recipe at, on a
+synthetic catalogue and store table of the same size (see synthetic_data.py).
+It times sorting every product of the catalogue into store sections, planning
+routes for random recipes from random locations, asking again from the same
+locations, which the plan cache answers, and asking from other points in the
+same grid cells. It also reports how many stops the routes have, how much of
+each recipe they are likely to supply, and the share of fresh produce bought
+at supermarkets.
+
+Usage: python supply_benchmark.py [--rows 20000] [--lookups 500] [--directory benchmark_data]
+'''
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import recipe_store
+import store_locator
+import store_supply
+import synthetic_data
+
+# Function to time a call, returning the seconds it took and its result
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Time planning the stores to buy recipes at and the plan cache.")
+    parser.add_argument("--rows", type=int, default=20000, help="recipes and stores in the synthetic files")
+    parser.add_argument("--lookups", type=int, default=500, help="recipe and location pairs to plan for")
+    parser.add_argument("--directory", default=synthetic_data.DEFAULT_DIRECTORY, help="where the synthetic files are kept")
+    args = parser.parse_args()
+
+    recipes_file, stores_file = synthetic_data.dataset(args.rows, args.directory)
+    file = os.path.join(args.directory, "allrecipes_" + str(args.rows) + ".catalogue")
+    if not os.path.isfile(file):
+        recipe_store.build_snapshot([recipes_file], file)
+    recipes = recipe_store.RecipeStore.load(file)
+    index = store_locator.StoreIndex(pd.read_csv(stores_file, index_col=0))
+    seconds, supply = timed(lambda: store_supply.StoreSupply(recipes, index))
+    print(f'{len(recipes)} recipes, {len(index)} stores: products sorted into sections in {seconds:.2f} s')
+
+    # Locations are spread over the same area as the synthetic stores
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(recipes), size=args.lookups).tolist()
+    lats, lons = rng.normal(40.44, 0.3, args.lookups).tolist(), rng.normal(-79.99, 0.4, args.lookups).tolist()
+    cold, plans = timed(lambda: [supply.route(x, y, z) for x, y, z in zip(picks, lats, lons)])
+    cached, _ = timed(lambda: [supply.route(x, y, z) for x, y, z in zip(picks, lats, lons)])
+    # Other points in the same cells, found by moving each location towards the centre of its cell
+    cell = supply.cell_degrees
+    near_lats = [(np.floor(x / cell) + 0.5) * cell * 0.5 + x * 0.5 for x in lats]
+    near_lons = [(np.floor(x / cell) + 0.5) * cell * 0.5 + x * 0.5 for x in lons]
+    nearby, _ = timed(lambda: [supply.route(x, y, z) for x, y, z in zip(picks, near_lats, near_lons)])
+    print(f'Plan a route: {cold * 1000 / args.lookups:.2f} ms each, again from the same place '
+          f'{cached * 1e6 / args.lookups:.1f} us, from elsewhere in the same cell {nearby * 1e6 / args.lookups:.1f} us')
+
+    stops = np.bincount([len(x["stops"]) for x in plans], minlength=store_supply.MAX_STOPS + 1)
+    coverage = np.mean([x["coverage"] for x in plans])
+    print("Routes by number of stops:", ", ".join(f'{i}: {x}' for i, x in enumerate(stops.tolist())),
+          f'- {coverage:.1%} of each recipe likely to be found')
+
+    # Fresh produce lines, by the category of store they are bought at
+    produce = supply.sections.index("produce")
+    found = {}
+    for pick, plan in zip(picks, plans):
+        lines, sections = supply._lines(pick)
+        fresh = {x for x, y in zip(lines, sections.tolist()) if y == produce}
+        for stop in plan["stops"]:
+            found[stop["category"]] = found.get(stop["category"], 0) + len(fresh.intersection(stop["items"]))
+    total = max(1, sum(found.values()))
+    print("Fresh produce bought at:", ", ".join(f'{x} {y / total:.1%}' for x, y in sorted(found.items())))
+
+if __name__ == "__main__":
+    main()
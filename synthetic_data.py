@@ -0,0 +1,134 @@
+'''
+File:        synthetic_data.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     NumPy
+             Pandas
+             ArgParse
+             OS
+
+Imported By: benchmark_suite.py
+             catalogue_benchmark.py
+             supply_benchmark.py
+
+This file writes synthetic recipe and store files in the same formats the
+scrapers write, so the application can be measured on catalogues far larger
+than the saved ones. Recipe files have the columns of allrecipes.csv, with the
+time, nutrition, ingredient and direction lists written as Python list strings,
+and store files have the columns of stores.csv, with stores spread around
+Pittsburgh. Rows are generated and written a chunk at a time from a fixed
+seed, so a million rows need little memory and the same size always gives the
+same file. Files that already exist are kept.
+
+Usage: python synthetic_data.py [--sizes 1000 100000 1000000] [--directory benchmark_data]
+'''
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DIRECTORY = "benchmark_data"
+DEFAULT_SIZES = [1000, 100000, 1000000]
+CHUNK_ROWS = 50000
+
+DISHES = ["Chicken", "Beef", "Tofu", "Salmon", "Pasta", "Rice", "Soup", "Salad", "Curry", "Taco",
+          "Gnocchi", "Potato", "Corn", "Bean", "Lentil", "Noodle", "Pie", "Bread", "Cake", "Stew"]
+STYLES = ["Easy", "Quick", "Classic", "Spicy", "Creamy", "Baked", "Grilled", "Roasted", "Vegan", "Homemade"]
+INGREDIENTS = ["cup all-purpose flour", "teaspoon salt", "tablespoons olive oil", "pound chicken breast",
+               "cups cooked rice", "cloves garlic, minced", "onion, chopped", "cup milk", "large eggs",
+               "cup white sugar", "teaspoon ground black pepper", "cups chicken broth", "tomatoes, diced",
+               "cup shredded Cheddar cheese", "tablespoons butter", "carrots, sliced", "(15 ounce) can black beans",
+               "cup sour cream", "teaspoon paprika", "cups baby spinach"]
+AMOUNTS = ["1", "2", "3", "½", "¼", "1 ½", "2 ½", "¾", "1/2", "1/3"]
+STEPS = ["Preheat the oven to 400 degrees F (200 degrees C).", "Stir everything together in a large bowl.",
+         "Cook over medium heat until tender, about 10 minutes.", "Season to taste and serve warm.",
+         "Bake until golden brown, 25 to 30 minutes.", "Let cool for 5 minutes before slicing."]
+CATEGORIES = ["Supermarket", "Convenience Store"]
+
+# Function to write a list of strings the way the scrapers write list columns
+def _list_string(items):
+    return str(list(items))
+
+# Function to build one chunk of recipe rows in the scraper CSV format
+def recipe_chunk(start, rows, rng):
+    dishes = rng.integers(0, len(DISHES), size=(rows, 2))
+    styles = rng.integers(0, len(STYLES), size=rows)
+    prep, cook = rng.integers(5, 60, size=rows), rng.integers(0, 180, size=rows)
+    servings = rng.integers(1, 12, size=rows)
+    nutrition = np.column_stack([rng.integers(50, 1200, size=rows), rng.integers(0, 80, size=(rows, 3))])
+    counts = rng.integers(4, 12, size=rows)
+    picks = rng.integers(0, len(INGREDIENTS), size=int(counts.sum()))
+    amounts = rng.integers(0, len(AMOUNTS), size=len(picks))
+    steps = rng.integers(2, 5, size=rows)
+    bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+
+    names, times, facts, ingredients, directions, urls = [], [], [], [], [], []
+    for i in range(rows):
+        id = start + i
+        names.append(STYLES[styles[i]] + " " + DISHES[dishes[i, 0]] + " " + DISHES[dishes[i, 1]] + " " + str(id))
+        total = prep[i] + cook[i]
+        times.append(_list_string(["Prep Time: " + str(prep[i]) + " mins", "Cook Time: " + str(cook[i]) + " mins",
+                                   "Total Time: " + (str(total // 60) + " hrs " if total >= 60 else "") + str(total % 60) + " mins",
+                                   "Servings: " + str(servings[i])]))
+        calories, fat, carbs, protein = nutrition[i]
+        facts.append(_list_string([str(calories) + " Calories", str(fat) + "g Fat", str(carbs) + "g Carbs", str(protein) + "g Protein"]))
+        ingredients.append(_list_string(AMOUNTS[amounts[j]] + " " + INGREDIENTS[picks[j]] for j in range(bounds[i], bounds[i + 1])))
+        directions.append(_list_string(STEPS[(id + j) % len(STEPS)] for j in range(steps[i])))
+        urls.append("https://www.allrecipes.com/recipe/" + str(id) + "/synthetic-recipe-" + str(id) + "/")
+    return pd.DataFrame({"Name": names, "Time": times, "Nutrition": facts, "Ingredients": ingredients,
+                         "Directions": directions, "URL": urls}, index=range(start, start + rows))
+
+# Function to build one chunk of store rows in the stores.csv format
+def store_chunk(start, rows, rng):
+    return pd.DataFrame({
+        "Name": ["Store #" + str(i) for i in range(start, start + rows)],
+        "Lat": rng.normal(40.44, 0.3, rows).round(6),
+        "Lon": rng.normal(-79.99, 0.4, rows).round(6),
+        "Category": rng.choice(CATEGORIES, rows, p=[0.25, 0.75])
+    }, index=range(start, start + rows))
+
+# Function to write a synthetic file a chunk at a time, replacing any partial file atomically
+def _write(file, rows, chunk, seed, chunk_rows):
+    rng = np.random.default_rng(seed)
+    temp = file + ".tmp"
+    with open(temp, "wt", encoding="utf-8", newline="") as out:
+        for start in range(0, rows, chunk_rows):
+            chunk(start, min(chunk_rows, rows - start), rng).to_csv(out, header=start == 0)
+    os.replace(temp, file)
+
+# Function to write a synthetic recipe file in the allrecipes.csv format
+def write_recipes(file, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    _write(file, rows, recipe_chunk, seed, chunk_rows)
+
+# Function to write a synthetic store file in the stores.csv format
+def write_stores(file, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    _write(file, rows, store_chunk, seed, chunk_rows)
+
+# Function to get the recipe and store files of one size, writing them if they do not exist yet
+def dataset(rows, directory=DEFAULT_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    recipes = os.path.join(directory, "allrecipes_" + str(rows) + ".csv")
+    stores = os.path.join(directory, "stores_" + str(rows) + ".csv")
+    if not os.path.isfile(recipes):
+        write_recipes(recipes, rows)
+    if not os.path.isfile(stores):
+        write_stores(stores, rows)
+    return recipes, stores
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic recipe and store files in the scraper formats.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="rows in each pair of files")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY)
+    args = parser.parse_args()
+    for rows in args.sizes:
+        for file in dataset(rows, args.directory):
+            print(file, round(os.path.getsize(file) / 1e6, 1), "MB")
+
+if __name__ == "__main__":
+    main()
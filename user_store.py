@@ -0,0 +1,216 @@
+'''
+File:        user_store.py
+
+Author(s):   Simon Corpuz (scorpuz)
+             Bonnie Li (bonnieli)
+             Suryaa Raman (ssuryaar)
+             Yiyang Yao (yiyangya)
+
+Imports:     SQLite3
+             DateTime
+             Time
+             OS
+
+Imported By: feedme_core.py
+             feedme_server.py
+
+This file keeps every user's calorie limit, meals and favorite recipes in one
+SQLite database. Meals are an append-only log with the time each was eaten, so
+today's calories are the sum of today's rows rather than a running total that
+each session rewrites, and sessions logging meals at the same time never
+overwrite each other. Favorites are stored by stable recipe ID, so they keep
+pointing at the same recipes when the catalogue is rebuilt in a different
+order. The database uses write-ahead logging, which lets readers carry on
+while another session writes. Meals are queued and written together in one
+transaction once enough have built up or enough time has passed, while the
+queued meals still count towards today's total straight away. Databases whose
+favorites and meals were stored by the older, name-based recipe IDs are moved
+to the current IDs the first time they are opened (see SCHEMA_VERSION).
+
+Settings and favorites saved by older versions in user_settings.txt and
+favorites.txt are imported the first time a user is opened.
+'''
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+DATABASE_FILE = "feedme.db"
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+BUSY_TIMEOUT = 30
+# Version 2 stores recipes by the ID of their URL rather than of their name
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    calorie_limit REAL
+);
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    recipe_id INTEGER,
+    calories INTEGER NOT NULL,
+    eaten_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meals_by_user ON meals (user_id, eaten_at);
+CREATE TABLE IF NOT EXISTS favorites (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    recipe_id INTEGER NOT NULL,
+    added_at TEXT NOT NULL,
+    UNIQUE (user_id, recipe_id)
+);
+"""
+
+# Function to get the current local time as stored in the database
+def timestamp(when=None):
+    return (when or datetime.now()).isoformat(sep=" ", timespec="seconds")
+
+# Function to get the timestamp at which today began
+def start_of_today():
+    return datetime.now().strftime("%Y-%m-%d") + " 00:00:00"
+
+# Class to store users, their meal logs and their favorites in SQLite
+class UserStore:
+    def __init__(self, file=DATABASE_FILE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.file = file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.connection = sqlite3.connect(file, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        # A new database starts at the current version, with nothing stored by older recipe IDs
+        if self.version() == 0 and self.connection.execute("SELECT 1 FROM users").fetchone() is None:
+            self.connection.execute("PRAGMA user_version = " + str(SCHEMA_VERSION))
+        self.user_ids = {}
+        self.pending = []
+        self.pending_since = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Function to run statements in one transaction that is rolled back if any of them fails
+    def _transaction(self, statements):
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for sql, rows in statements:
+                self.connection.executemany(sql, rows)
+
+    # Function to get a user's row ID, adding the user if they are new
+    def user_id(self, name):
+        id = self.user_ids.get(name)
+        if id is None:
+            self.connection.execute("INSERT OR IGNORE INTO users (name) VALUES (?)", (name,))
+            id = self.connection.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()[0]
+            self.user_ids[name] = id
+        return id
+
+    # Function to get the schema version the stored recipe IDs were written with
+    def version(self):
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+    # Function to check whether favorites and meals are still stored by older recipe IDs
+    def needs_recipe_ids(self):
+        return self.version() < SCHEMA_VERSION
+
+    # Function to move every favorite and meal from the old recipe IDs to the new ones, given as (old, new) pairs
+    def remap_recipe_ids(self, pairs):
+        pairs = [(new, old) for old, new in pairs if old != new]
+        self.flush()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany("UPDATE OR IGNORE favorites SET recipe_id = ? WHERE recipe_id = ?", pairs)
+            self.connection.executemany("UPDATE meals SET recipe_id = ? WHERE recipe_id = ?", pairs)
+            self.connection.execute("PRAGMA user_version = " + str(SCHEMA_VERSION))
+
+    # Function to check whether a user has been added
+    def has_user(self, name):
+        return self.connection.execute("SELECT 1 FROM users WHERE name = ?", (name,)).fetchone() is not None
+
+    # Function to get a user's daily calorie limit, or None if it has not been set
+    def calorie_limit(self, name):
+        row = self.connection.execute("SELECT calorie_limit FROM users WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_calorie_limit(self, name, calorie_limit):
+        self.connection.execute("UPDATE users SET calorie_limit = ? WHERE id = ?", (calorie_limit, self.user_id(name)))
+
+    # Function to queue a meal, writing the queue once it is full or old enough
+    def log_meal(self, name, recipe_id, calories, eaten_at=None):
+        self.pending.append((self.user_id(name), recipe_id, int(calories), timestamp(eaten_at)))
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        self.flush_if_due()
+
+    # Function to write the queue if it has reached the batch size or the flush interval
+    def flush_if_due(self):
+        if self.pending and (len(self.pending) >= self.batch_size or time.monotonic() - self.pending_since >= self.flush_interval):
+            self.flush()
+
+    # Function to write every queued meal in one transaction
+    def flush(self):
+        if not self.pending:
+            return
+        self._transaction([("INSERT INTO meals (user_id, recipe_id, calories, eaten_at) VALUES (?, ?, ?, ?)", self.pending)])
+        self.pending = []
+        self.pending_since = None
+
+    # Function to get the calories a user has eaten since a time, counting queued meals
+    def calories_since(self, name, since):
+        id = self.user_id(name)
+        row = self.connection.execute("SELECT COALESCE(SUM(calories), 0) FROM meals WHERE user_id = ? AND eaten_at >= ?",
+                                      (id, since)).fetchone()
+        return row[0] + sum(x[2] for x in self.pending if x[0] == id and x[3] >= since)
+
+    # Function to get a user's meals since a time as (recipe ID, calories, time eaten), oldest first
+    def meals(self, name, since=""):
+        self.flush()
+        return self.connection.execute("SELECT recipe_id, calories, eaten_at FROM meals WHERE user_id = ? AND eaten_at >= ? "
+                                       "ORDER BY eaten_at, id", (self.user_id(name), since)).fetchall()
+
+    # Function to get the recipe IDs of a user's favorites, in the order they were added
+    def favorites(self, name):
+        rows = self.connection.execute("SELECT recipe_id FROM favorites WHERE user_id = ? ORDER BY rowid", (self.user_id(name),))
+        return [x[0] for x in rows]
+
+    def add_favorite(self, name, recipe_id):
+        self.connection.execute("INSERT OR IGNORE INTO favorites (user_id, recipe_id, added_at) VALUES (?, ?, ?)",
+                                (self.user_id(name), recipe_id, timestamp()))
+
+    def remove_favorite(self, name, recipe_id):
+        self.connection.execute("DELETE FROM favorites WHERE user_id = ? AND recipe_id = ?", (self.user_id(name), recipe_id))
+
+    # Function to import a user's calorie limit, today's total and favorites from the old text files, adding the
+    # user in the same transaction, so an import that fails part way leaves no user behind and is tried again
+    def import_files(self, name, settings_file, favorites_file, recipe_ids):
+        user = "(SELECT id FROM users WHERE name = ?)"
+        statements = [("INSERT OR IGNORE INTO users (name) VALUES (?)", [(name,)])]
+        if settings_file is not None and os.path.isfile(settings_file):
+            with open(settings_file, "rt", encoding="utf-8") as f:
+                content = f.readlines()
+            statements.append(("UPDATE users SET calorie_limit = ? WHERE name = ?", [(float(content[0]), name)]))
+            # The old file only kept a running total, so it becomes one meal with no recipe
+            date = datetime.strptime(content[2].strip(), "%m/%d/%Y")
+            if float(content[1]) > 0 and date.date() == datetime.today().date():
+                statements.append(("INSERT INTO meals (user_id, recipe_id, calories, eaten_at) VALUES (" + user + ", NULL, ?, ?)",
+                                   [(name, round(float(content[1])), timestamp(date))]))
+        if favorites_file is not None and os.path.isfile(favorites_file):
+            with open(favorites_file, "rt", encoding="utf-8") as f:
+                positions = [int(x) for x in f if x.strip()]
+            if positions:
+                added_at = timestamp()
+                statements.append(("INSERT OR IGNORE INTO favorites (user_id, recipe_id, added_at) VALUES (" + user + ", ?, ?)",
+                                   [(name, x, added_at) for x in recipe_ids(positions)]))
+        self._transaction(statements)
+
+    # Function to write any queued meals and close the database
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -1,72 +1,64 @@
 '''
-File:        FeedMe.py
+File:        well_scraper.py
 
 Author(s):   Simon Corpuz (scorpuz)
              Bonnie Li (bonnieli)
              Suryaa Raman (ssuryaar)
              Yiyang Yao (yiyangya)
 
-Imports:     UrlLib
+Imports:     recipe_scraper.py
+             recipe_sources.py
              BeautifulSoup
-             Pandas
 
-Imported By: FeedMe.py
+Imported By: feedme_core.py
+             parse_benchmark.py
 
 This file serves to download the recipe data from EatingWell and convert it to
-a CSV format for the main application.
+a CSV format for the main application. The site's pages and selectors are
+described by its source in recipe_sources.py.
 '''
 
-from urllib.request import urlopen
 from bs4 import BeautifulSoup
-import pandas as pd
+from recipe_scraper import download_source
+import recipe_sources
 
-# Function to download recipe data and convert to CSV
-def download_eatingwell(file="eatingwell_default.csv"):
-    html_list = ["https://www.eatingwell.com/recipe/270291/mermaid-smoothie-bowl/",                     # Mermaid Smoothie Bowl
-                "https://www.eatingwell.com/recipe/272746/mascarpone-berries-toast/",                   # Mascarpone & Berries Toast
-                "https://www.eatingwell.com/recipe/8030933/egg-spinach-cheddar-breakfast-sandwich/",    # Egg, Spinach & Cheddar Breakfast Sandwich
-                "https://www.eatingwell.com/recipe/272745/apple-peanut-butter-toast/",                  # Apple & Peanut Butter Toast
-                "https://www.eatingwell.com/recipe/269844/vegan-superfood-grain-bowls/",                # Vegan Superfood Grain Bowls
-                "https://www.eatingwell.com/sauteed-corn-with-basil-shallots-8661227",                  # Sautéed Corn with Basil & Shallots
-                "https://www.eatingwell.com/cucumber-cream-cheese-roll-8660948",                        # Cucumber Cream Cheese Roll
-                "https://www.eatingwell.com/recipe/8052446/best-tomato-sandwich/",                      # The Best Tomato Sandwich to Make All Summer Long
-                "https://www.eatingwell.com/recipe/8069814/tomato-burrata-sandwich/",                   # Tomato & Burrata Sandwich
-                "https://www.eatingwell.com/recipe/262096/edamame-veggie-rice-bowl/"]                   # Edamame & Veggie Rice Bowl
-
-    recipes = pd.DataFrame(columns = ["Name", "Time", "Nutrition", "Ingredients", "Directions"])
+HTML_LIST = recipe_sources.EATINGWELL.seed_urls
 
-    for html_x in html_list:
-        html = urlopen(html_x)
-        soup = BeautifulSoup(html.read(), "lxml")
-        soup = soup.find("body")
+# Function to extract a single recipe from an EatingWell page
+parse_eatingwell = recipe_sources.EATINGWELL.parse
 
-        # Recipe name
-        name = soup.find("h1").text
+# Function to extract a single recipe from an EatingWell page with BeautifulSoup, kept for comparison
+def parse_eatingwell_soup(page):
+    soup = BeautifulSoup(page, "lxml")
+    soup = soup.find("body")
 
-        # Recipe time measurements
-        time = soup.find("div", {"class": "mm-recipes-details__content"}).text.strip().replace(":\n", ": ").split("\n")
-        time = [x for x in time if x != ""]
+    # Recipe name
+    name = soup.find("h1").text
 
-        # Recipe nutrition facts
-        nutrition = soup.find("table", {"class": "mm-recipes-nutrition-facts-summary__table"}).text.strip().replace("\n\n", "|").replace("\n", " ").split("|")
-        nutrition = [" ".join(x.strip().split()) for x in nutrition if x != ""]
+    # Recipe time measurements
+    time = soup.find("div", {"class": "mm-recipes-details__content"}).text.strip().replace(":\n", ": ").split("\n")
+    time = [x for x in time if x != ""]
 
-        # Recipe ingredients
-        ingredients = soup.find("ul", {"class": "mm-recipes-structured-ingredients__list"}).text.strip().split("\n")
-        ingredients = [" ".join(x.strip().split()) for x in ingredients if x != ""]
+    # Recipe nutrition facts
+    nutrition = soup.find("table", {"class": "mm-recipes-nutrition-facts-summary__table"}).text.strip().replace("\n\n", "|").replace("\n", " ").split("|")
+    nutrition = [" ".join(x.strip().split()) for x in nutrition if x != ""]
 
-        # Recipe directions
-        directions = soup.find("div", {"id": "mm-recipes-steps_1-0"}).find("ol").find_all("li")
-        directions = [" ".join(x.text.strip().split()) for x in directions]
+    # Recipe ingredients
+    ingredients = soup.find("ul", {"class": "mm-recipes-structured-ingredients__list"}).text.strip().split("\n")
+    ingredients = [" ".join(x.strip().split()) for x in ingredients if x != ""]
 
-        new_recipe = pd.DataFrame({
-            "Name": [name],
-            "Time": [time],
-            "Nutrition": [nutrition],
-            "Ingredients": [ingredients],
-            "Directions": [directions]
-        })
+    # Recipe directions
+    directions = soup.find("div", {"id": "mm-recipes-steps_1-0"}).find("ol").find_all("li")
+    directions = [" ".join(x.text.strip().split()) for x in directions]
 
-        recipes = recipes._append(new_recipe, ignore_index = True)
+    return {
+        "Name": name,
+        "Time": time,
+        "Nutrition": nutrition,
+        "Ingredients": ingredients,
+        "Directions": directions
+    }
 
-    recipes.to_csv(file)
+# Function to download recipe data and convert to CSV
+def download_eatingwell(file="eatingwell_default.csv", html_list=HTML_LIST, engine=None, cache=None, workers=None):
+    return download_source(recipe_sources.EATINGWELL, file, html_list, engine, cache, workers)